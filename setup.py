@@ -65,6 +65,9 @@ setup(
         "cache": [
             "redis>=5.0.1",
         ],
+        "columns": [
+            "numpy>=1.24.0",
+        ],
     },
     entry_points={
         "console_scripts": [
@@ -1,8 +1,9 @@
 """Calculator package initialization."""
 
+from . import ops
 from .calculator import Calculator, add, subtract, multiply, divide
 
 __version__ = "1.0.0"
 __author__ = "DevOps Team"
 
-__all__ = ["Calculator", "add", "subtract", "multiply", "divide"]
+__all__ = ["Calculator", "ops", "add", "subtract", "multiply", "divide"]
@@ -0,0 +1,184 @@
+"""
+Cheap representations of very large integer results.
+
+``factorial`` and ``power`` can produce integers with many thousands of
+digits. Converting those with ``str()`` is quadratic and, beyond
+``sys.get_int_max_str_digits()``, raises ValueError. The helpers here give
+scientific, truncated and hex forms without building the full decimal
+string, plus a divide-and-conquer converter for when every digit is needed.
+"""
+
+import decimal
+import math
+from functools import lru_cache
+
+# Results with at most this many digits are shown in full.
+DEFAULT_MAX_DIGITS = 100
+
+# Digits kept at each end of a truncated representation.
+DEFAULT_EDGE_DIGITS = 10
+
+# Forms accepted by represent().
+RESULT_FORMATS = ('compact', 'full', 'scientific', 'hex')
+
+_LOG10_2 = math.log10(2)
+
+
+# Powers of ten up to this exponent are cached (at most about 1.7 KB each,
+# so the cache stays under half a megabyte). Larger ones are rebuilt.
+_POW10_CACHE_MAX_EXPONENT = 4096
+
+
+def _pow10(exponent: int) -> int:
+    """Power of ten, cached for small exponents."""
+    if exponent <= _POW10_CACHE_MAX_EXPONENT:
+        return _cached_pow10(exponent)
+    return 10 ** exponent
+
+
+@lru_cache(maxsize=256)
+def _cached_pow10(exponent: int) -> int:
+    """Cached power of ten (digit counts repeat across requests)."""
+    return 10 ** exponent
+
+
+def digit_count(n: int) -> int:
+    """Number of decimal digits in n, without converting it to a string."""
+    n = abs(n)
+    if n < 10:
+        return 1
+    # Lower bound from the bit length, corrected exactly by comparison.
+    digits = int((n.bit_length() - 1) * _LOG10_2) + 1
+    while n >= _pow10(digits):
+        digits += 1
+    while digits > 1 and n < _pow10(digits - 1):
+        digits -= 1
+    return digits
+
+
+def leading_digits(n: int, k: int = DEFAULT_EDGE_DIGITS) -> str:
+    """First k decimal digits of |n|."""
+    n = abs(n)
+    digits = digit_count(n)
+    if digits <= k:
+        return str(n)
+    scale = _pow10(digits - k)
+    # Estimate from the top bits, then settle the last digit exactly.
+    shift = max(n.bit_length() - (int(k / _LOG10_2) + 64), 0)
+    with decimal.localcontext() as ctx:
+        ctx.prec = k + 30
+        ctx.Emax = decimal.MAX_EMAX
+        estimate = decimal.Decimal(n >> shift) * decimal.Decimal(2) ** shift
+        lead = int(estimate.scaleb(-(digits - k)))
+    while lead * scale > n:
+        lead -= 1
+    while (lead + 1) * scale <= n:
+        lead += 1
+    return str(lead)
+
+
+def trailing_digits(n: int, k: int = DEFAULT_EDGE_DIGITS) -> str:
+    """Last k decimal digits of |n| (zero-padded)."""
+    n = abs(n)
+    if digit_count(n) <= k:
+        return str(n)
+    return str(n % _pow10(k)).zfill(k)
+
+
+def scientific(n: int, significant: int = DEFAULT_EDGE_DIGITS) -> str:
+    """Scientific notation with the given number of (truncated) significant digits."""
+    sign = '-' if n < 0 else ''
+    lead = leading_digits(n, significant)
+    exponent = digit_count(n) - 1
+    mantissa = lead[0] + ('.' + lead[1:] if len(lead) > 1 else '')
+    return f"{sign}{mantissa}e+{exponent}"
+
+
+def truncated(n: int, k: int = DEFAULT_EDGE_DIGITS) -> str:
+    """First and last k digits plus the digit count: '4023...0000 (5736 digits)'."""
+    digits = digit_count(n)
+    if digits <= 2 * k:
+        return to_decimal_string(n)
+    sign = '-' if n < 0 else ''
+    return f"{sign}{leading_digits(n, k)}...{trailing_digits(n, k)} ({digits} digits)"
+
+
+def to_hex(n: int) -> str:
+    """Hexadecimal form (linear time, no digit limit)."""
+    return hex(n)
+
+
+def to_decimal_string(n: int) -> str:
+    """Full decimal string of n, for any size.
+
+    Small values use ``str()``. Large values are split recursively on bit
+    boundaries and reassembled with ``decimal`` arithmetic, whose
+    multiplication is subquadratic and which has no digit limit.
+    """
+    if n.bit_length() <= 4096:
+        return str(n)
+    sign = '-' if n < 0 else ''
+    n = abs(n)
+    powers = {}
+
+    def pow2(width):
+        result = powers.get(width)
+        if result is None:
+            if width <= 128:
+                result = decimal.Decimal(2) ** width
+            else:
+                half = width >> 1
+                result = pow2(half) * pow2(width - half)
+            powers[width] = result
+        return result
+
+    def convert(value, width):
+        if width <= 128:
+            return decimal.Decimal(value)
+        half = width >> 1
+        high = value >> half
+        low = value - (high << half)
+        return convert(low, half) + convert(high, width - half) * pow2(half)
+
+    with decimal.localcontext() as ctx:
+        ctx.prec = decimal.MAX_PREC
+        ctx.Emax = decimal.MAX_EMAX
+        ctx.Emin = decimal.MIN_EMIN
+        ctx.traps[decimal.Inexact] = True
+        return sign + format(convert(n, n.bit_length()), 'f')
+
+
+def is_large(value, max_digits: int = DEFAULT_MAX_DIGITS) -> bool:
+    """Whether value is an integer too long to show in full."""
+    if not isinstance(value, int) or isinstance(value, bool):
+        return False
+    # Cheap bit-length check first; digit_count only near the boundary.
+    if value.bit_length() <= max_digits / _LOG10_2 - 1:
+        return False
+    return digit_count(value) > max_digits
+
+
+def compact(value, max_digits: int = DEFAULT_MAX_DIGITS):
+    """Value itself if it is short, otherwise its truncated form."""
+    if is_large(value, max_digits):
+        return truncated(value)
+    return value
+
+
+def represent(value, form: str = 'compact'):
+    """Represent a result in the requested form.
+
+    Forms: ``compact`` (default), ``full``, ``scientific`` and ``hex``.
+    Non-integers and short integers are returned unchanged for ``compact``.
+    """
+    if not isinstance(value, int) or isinstance(value, bool):
+        return value
+    if form == 'compact':
+        return compact(value)
+    if form == 'full':
+        return to_decimal_string(value) if is_large(value) else value
+    if form == 'scientific':
+        return scientific(value)
+    if form == 'hex':
+        return to_hex(value)
+    raise ValueError(f"Unknown result format: {form}")
@@ -2,117 +2,248 @@
 Calculator module providing basic and advanced mathematical operations.
 """
 
-import math
+import heapq
+import itertools
+import threading
+import weakref
+from collections import deque
 from typing import Union
 
+try:
+    from . import ops, sequences
+    from .bigint import compact
+except ImportError:  # imported as a top-level module with src/ on sys.path
+    import ops
+    import sequences
+    from bigint import compact
+
+# Number of operations kept in history.
+HISTORY_LIMIT = 100
+
 
 class Calculator:
     """A comprehensive calculator class with basic and advanced operations."""
 
-    def __init__(self):
-        """Initialize calculator with operation history."""
+    def __init__(self, record_history: bool = True, thread_safe: bool = False,
+                 kernels=ops):
+        """Initialize calculator with operation history.
+
+        With record_history=False the calculator skips history formatting
+        entirely and only runs the stateless kernels from ``ops``.
+
+        With thread_safe=True one calculator can be shared between threads:
+        each thread records into its own buffer and get_history() merges
+        them in call order. In this mode ``history`` is unused; read the
+        history through get_history().
+
+        kernels is the namespace of arithmetic kernels (``ops`` by default,
+        or a typed set from ``numeric`` such as numeric.INT_KERNELS).
+        """
         self.history = []
+        self.record_history = record_history
+        self.kernels = kernels
+        self._thread_history = None
+        if thread_safe:
+            self._thread_history = _ThreadLocalHistory(HISTORY_LIMIT)
+
+    @property
+    def thread_safe(self) -> bool:
+        """Whether history is recorded in per-thread buffers."""
+        return self._thread_history is not None
 
     def add(self, a: Union[int, float], b: Union[int, float]) -> Union[int, float]:
         """Add two numbers."""
-        result = a + b
-        self._add_to_history(f"{a} + {b} = {result}")
+        result = self.kernels.add(a, b)
+        if self.record_history:
+            self._add_to_history(f"{compact(a)} + {compact(b)} = {compact(result)}")
         return result
 
     def subtract(self, a: Union[int, float], b: Union[int, float]) -> Union[int, float]:
         """Subtract b from a."""
-        result = a - b
-        self._add_to_history(f"{a} - {b} = {result}")
+        result = self.kernels.subtract(a, b)
+        if self.record_history:
+            self._add_to_history(f"{compact(a)} - {compact(b)} = {compact(result)}")
         return result
 
     def multiply(self, a: Union[int, float], b: Union[int, float]) -> Union[int, float]:
         """Multiply two numbers."""
-        result = a * b
-        self._add_to_history(f"{a} * {b} = {result}")
+        result = self.kernels.multiply(a, b)
+        if self.record_history:
+            self._add_to_history(f"{compact(a)} * {compact(b)} = {compact(result)}")
         return result
 
     def divide(self, a: Union[int, float], b: Union[int, float]) -> Union[int, float]:
         """Divide a by b."""
-        if b == 0:
-            raise ValueError("Cannot divide by zero")
-        result = a / b
-        self._add_to_history(f"{a} / {b} = {result}")
+        result = self.kernels.divide(a, b)
+        if self.record_history:
+            self._add_to_history(f"{compact(a)} / {compact(b)} = {compact(result)}")
         return result
 
     def power(self, base: Union[int, float], exponent: Union[int, float]) -> Union[int, float]:
         """Raise base to the power of exponent."""
-        result = base ** exponent
-        self._add_to_history(f"{base} ^ {exponent} = {result}")
+        result = self.kernels.power(base, exponent)
+        if self.record_history:
+            self._add_to_history(
+                f"{compact(base)} ^ {compact(exponent)} = {compact(result)}")
         return result
 
     def square_root(self, number: Union[int, float]) -> float:
         """Calculate square root of a number."""
-        if number < 0:
-            raise ValueError("Cannot calculate square root of negative number")
-        result = math.sqrt(number)
-        self._add_to_history(f"√{number} = {result}")
+        result = self.kernels.square_root(number)
+        if self.record_history:
+            self._add_to_history(f"√{compact(number)} = {compact(result)}")
         return result
 
     def percentage(self, value: Union[int, float], percent: Union[int, float]) -> Union[int, float]:
         """Calculate percentage of a value."""
-        result = (value * percent) / 100
-        self._add_to_history(f"{percent}% of {value} = {result}")
+        result = self.kernels.percentage(value, percent)
+        if self.record_history:
+            self._add_to_history(
+                f"{compact(percent)}% of {compact(value)} = {compact(result)}")
         return result
 
     def factorial(self, n: int) -> int:
         """Calculate factorial of a number."""
-        if n < 0:
-            raise ValueError("Factorial is not defined for negative numbers")
-        if not isinstance(n, int):
-            raise ValueError("Factorial is only defined for integers")
-        result = math.factorial(n)
-        self._add_to_history(f"{n}! = {result}")
+        result = self.kernels.factorial(n)
+        if self.record_history:
+            self._add_to_history(f"{compact(n)}! = {compact(result)}")
         return result
 
     def modulo(self, a: Union[int, float], b: Union[int, float]) -> Union[int, float]:
         """Calculate modulo (remainder) of a divided by b."""
-        if b == 0:
-            raise ValueError("Cannot perform modulo with zero")
-        result = a % b
-        self._add_to_history(f"{a} % {b} = {result}")
+        result = self.kernels.modulo(a, b)
+        if self.record_history:
+            self._add_to_history(f"{compact(a)} % {compact(b)} = {compact(result)}")
         return result
 
+    # Lazy sequences: generators that are not recorded in history.
+    def cumulative_sum(self, values):
+        """Lazily yield running totals of values."""
+        return sequences.cumulative_sum(values)
+
+    def cumulative_product(self, values):
+        """Lazily yield running products of values."""
+        return sequences.cumulative_product(values)
+
+    def scan(self, operation, values, initial=None):
+        """Lazily yield a running accumulation with any binary operation."""
+        return sequences.scan(operation, values, initial)
+
+    def compound_growth(self, principal, rate, periods=None):
+        """Lazily yield the balance after each compounding period."""
+        return sequences.compound_growth(principal, rate, periods)
+
+    def amortization_schedule(self, principal, annual_rate, periods,
+                              periods_per_year=12):
+        """Lazily yield a level-payment loan schedule."""
+        return sequences.amortization_schedule(principal, annual_rate, periods,
+                                               periods_per_year)
+
     def get_history(self) -> list:
         """Get calculation history."""
+        if self._thread_history is not None:
+            return self._thread_history.snapshot()
         return self.history.copy()
 
     def clear_history(self) -> None:
         """Clear calculation history."""
+        if self._thread_history is not None:
+            self._thread_history.clear()
         self.history.clear()
 
     def _add_to_history(self, operation: str) -> None:
         """Add operation to history."""
+        if self._thread_history is not None:
+            self._thread_history.append(operation)
+            return
         self.history.append(operation)
         # Keep only last 100 operations
-        if len(self.history) > 100:
+        if len(self.history) > HISTORY_LIMIT:
             self.history.pop(0)
 
 
-# Convenience functions for direct use
-def add(a: Union[int, float], b: Union[int, float]) -> Union[int, float]:
-    """Add two numbers (convenience function)."""
-    calc = Calculator()
-    return calc.add(a, b)
-
-
-def subtract(a: Union[int, float], b: Union[int, float]) -> Union[int, float]:
-    """Subtract b from a (convenience function)."""
-    calc = Calculator()
-    return calc.subtract(a, b)
-
-
-def multiply(a: Union[int, float], b: Union[int, float]) -> Union[int, float]:
-    """Multiply two numbers (convenience function)."""
-    calc = Calculator()
-    return calc.multiply(a, b)
-
-
-def divide(a: Union[int, float], b: Union[int, float]) -> Union[int, float]:
-    """Divide a by b (convenience function)."""
-    calc = Calculator()
-    return calc.divide(a, b)
+class _ThreadLocalHistory:
+    """History recorded into per-thread buffers and merged on read.
+
+    Writers only take their own thread's lock, so recording never contends
+    with other writers; readers briefly take each buffer's lock in turn.
+    A global sequence number restores call order when merging. Buffers of
+    finished threads are folded into a single retired buffer, so threads
+    that come and go do not accumulate buffers.
+    """
+
+    def __init__(self, limit: int):
+        """Initialize with no buffers; each thread registers on first use."""
+        self.limit = limit
+        self._local = threading.local()
+        self._buffers = []
+        self._retired = deque(maxlen=limit)
+        self._registry_lock = threading.Lock()
+        self._sequence = itertools.count()
+
+    def append(self, operation: str) -> None:
+        """Record an operation in the calling thread's buffer."""
+        try:
+            buffer, lock = self._local.buffer, self._local.lock
+        except AttributeError:
+            buffer, lock = self._register()
+        with lock:
+            buffer.append((next(self._sequence), operation))
+
+    def snapshot(self) -> list:
+        """The last ``limit`` operations across all threads, oldest first."""
+        with self._registry_lock:
+            self._prune()
+            buffers = list(self._buffers)
+            entries = [list(self._retired)]
+        for _, buffer, lock in buffers:
+            with lock:
+                entries.append(list(buffer))
+        merged = list(heapq.merge(*entries))
+        return [operation for _, operation in merged[-self.limit:]]
+
+    def clear(self) -> None:
+        """Empty every thread's buffer."""
+        with self._registry_lock:
+            self._retired.clear()
+            buffers = list(self._buffers)
+        for _, buffer, lock in buffers:
+            with lock:
+                buffer.clear()
+
+    def _register(self):
+        """Create and register the calling thread's buffer."""
+        buffer = deque(maxlen=self.limit)
+        lock = threading.Lock()
+        self._local.buffer = buffer
+        self._local.lock = lock
+        thread = weakref.ref(threading.current_thread())
+        with self._registry_lock:
+            self._prune()
+            self._buffers.append((thread, buffer, lock))
+        return buffer, lock
+
+    def _prune(self) -> None:
+        """Fold the buffers of finished threads into the retired buffer.
+
+        Called with the registry lock held.
+        """
+        live = []
+        for entry in self._buffers:
+            thread, buffer, lock = entry
+            owner = thread()
+            if owner is not None and owner.is_alive():
+                live.append(entry)
+                continue
+            with lock:
+                self._retired = deque(heapq.merge(self._retired, buffer),
+                                      maxlen=self.limit)
+        self._buffers = live
+
+
+# Convenience functions for direct use: the stateless kernels themselves,
+# so calling them allocates no Calculator and formats no history.
+add = ops.add
+subtract = ops.subtract
+multiply = ops.multiply
+divide = ops.divide
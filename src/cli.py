@@ -3,8 +3,13 @@
 Command Line Interface for Calculator App.
 """
 
+import sys
+
 import click
 from calculator import Calculator
+from bigint import RESULT_FORMATS, compact, represent
+import columns as columnar
+from sequences import BINARY_OPERATIONS
 
 
 @click.group(invoke_without_command=True)
@@ -93,12 +98,105 @@ def percentage(value, percent):
 
 @cli.command()
 @click.argument('n', type=int)
-def factorial(n):
+@click.option('--format', 'form', default='compact',
+              type=click.Choice(RESULT_FORMATS),
+              help='How to show large results.')
+def factorial(n, form):
     """Calculate factorial of a number."""
     calc = Calculator()
     try:
         result = calc.factorial(n)
-        click.echo(f"{n}! = {result}")
+        click.echo(f"{n}! = {represent(result, form)}")
+    except ValueError as e:
+        click.echo(f"Error: {e}", err=True)
+
+
+@cli.command()
+@click.argument('csv_path', type=click.Path(exists=True, dir_okay=False))
+@click.argument('expression')
+@click.option('--output', '-o', type=click.File('w'), default='-',
+              help='Where to write the result (default: stdout).')
+@click.option('--name', default='result', help='Name of the output column.')
+@click.option('--augment', is_flag=True,
+              help='Write the full input CSV with the result columns appended.')
+def columns(csv_path, expression, output, name, augment):
+    """Evaluate EXPRESSION column-wise over a CSV file.
+
+    EXPRESSION is an operation call such as 'percentage(price, rate)' or
+    'sqrt(x)', or an infix form such as 'a / b'. Operands are column names
+    or numbers. Rows that fail (e.g. division by zero) are reported in a
+    separate <name>_error column.
+    """
+    try:
+        values, errors = columnar.evaluate_csv(csv_path, expression)
+    except ValueError as e:
+        click.echo(f"Error: {e}", err=True)
+        sys.exit(1)
+    if augment:
+        columnar.write_augmented(csv_path, output, name, values, errors)
+    else:
+        columnar.write_column(output, name, values, errors)
+    if errors:
+        click.echo(f"{len(errors)} of {len(values)} rows failed", err=True)
+
+
+@cli.command()
+@click.argument('kind', type=click.Choice(('sum', 'product') + BINARY_OPERATIONS))
+@click.argument('values', nargs=-1, type=float)
+def series(kind, values):
+    """Print the running accumulation of VALUES, one result per line.
+
+    KIND is 'sum', 'product' or any binary operation to scan with. Without
+    VALUES, numbers are read lazily from stdin, one per line.
+    """
+    calc = Calculator()
+    operation = {'sum': 'add', 'product': 'multiply'}.get(kind, kind)
+    if not values:
+        stdin = click.get_text_stream('stdin')
+        values = (float(line) for line in stdin if line.strip())
+    try:
+        for result in calc.scan(operation, values):
+            click.echo(compact(result))
+    except OverflowError:
+        click.echo("Error: Result too large", err=True)
+    except (ArithmeticError, ValueError) as e:
+        click.echo(f"Error: {e}", err=True)
+
+
+@cli.command()
+@click.argument('principal', type=float)
+@click.argument('rate', type=float)
+@click.argument('periods', type=int, required=False)
+def compound(principal, rate, periods):
+    """Print the balance after each compounding period.
+
+    Without PERIODS the schedule is unbounded (stop it with Ctrl+C).
+    """
+    calc = Calculator()
+    try:
+        balances = calc.compound_growth(principal, rate, periods)
+        for period, balance in enumerate(balances, 1):
+            click.echo(f"{period}\t{balance}")
+    except OverflowError:
+        click.echo("Error: Result too large", err=True)
+    except (ArithmeticError, ValueError) as e:
+        click.echo(f"Error: {e}", err=True)
+
+
+@cli.command()
+@click.argument('principal', type=float)
+@click.argument('annual_rate', type=float)
+@click.argument('periods', type=int)
+@click.option('--per-year', default=12, type=int, help='Payments per year.')
+def amortization(principal, annual_rate, periods, per_year):
+    """Print a level-payment loan schedule."""
+    calc = Calculator()
+    try:
+        schedule = calc.amortization_schedule(principal, annual_rate, periods, per_year)
+        click.echo("period\tpayment\tinterest\tprincipal\tbalance")
+        for row in schedule:
+            click.echo(f"{row.period}\t{row.payment:.2f}\t{row.interest:.2f}\t"
+                       f"{row.principal:.2f}\t{row.balance:.2f}")
     except ValueError as e:
         click.echo(f"Error: {e}", err=True)
 
@@ -134,7 +232,7 @@ def interactive():
             # Parse and execute command
             result = parse_and_execute(command, calc)
             if result is not None:
-                click.echo(f"Result: {result}")
+                click.echo(f"Result: {compact(result)}")
                 
         except (ValueError, KeyboardInterrupt) as e:
             if isinstance(e, KeyboardInterrupt):
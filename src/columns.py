@@ -0,0 +1,263 @@
+"""
+Columnar evaluation of calculator operations over CSV files.
+
+The CSV is memory-mapped and only the referenced columns are parsed, into
+typed ``array('d')`` buffers. The operation is then applied column-wise
+(vectorized with NumPy when it is installed) and the result is written in
+bulk. Rows that fail validation, such as division by zero or the square
+root of a negative number, get an entry in a separate error column instead
+of aborting the run.
+"""
+
+import csv
+import io
+import math
+import mmap
+import re
+from array import array
+
+import ops
+from bigint import to_decimal_string
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency; the pure-Python path is used
+    np = None
+
+# Operation names accepted in expressions, mapped to their number of operands.
+OPERATIONS = {
+    'add': 2, 'subtract': 2, 'multiply': 2, 'divide': 2, 'power': 2,
+    'modulo': 2, 'percentage': 2, 'sqrt': 1, 'square_root': 1, 'factorial': 1,
+}
+
+INFIX_OPERATORS = {
+    '+': 'add', '-': 'subtract', '*': 'multiply', '/': 'divide',
+    '^': 'power', '**': 'power', '%': 'modulo',
+}
+
+_CALL = re.compile(r'^\s*(\w+)\s*\((.*)\)\s*$')
+_INFIX = re.compile(r'^\s*(.+?)\s*(\*\*|[-+*/^%])\s*(.+?)\s*$')
+_NUMBER = re.compile(r'^[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?$')
+
+
+class Expression:
+    """A parsed column expression: an operation and its operands.
+
+    Each operand is either a column name (str) or a numeric constant (float).
+    """
+
+    def __init__(self, operation, operands):
+        """Initialize expression."""
+        self.operation = operation
+        self.operands = operands
+
+    @property
+    def columns(self) -> list:
+        """Column names the expression reads."""
+        return [op for op in self.operands if isinstance(op, str)]
+
+
+def parse_expression(text: str) -> Expression:
+    """Parse 'percentage(price, rate)', 'sqrt(x)' or 'a / b'."""
+    match = _CALL.match(text)
+    if match:
+        operation = match.group(1).lower()
+        operands = [part.strip() for part in match.group(2).split(',')]
+    else:
+        match = _INFIX.match(text)
+        if not match or match.group(2) not in INFIX_OPERATORS:
+            raise ValueError(f"Cannot parse expression: {text}")
+        operation = INFIX_OPERATORS[match.group(2)]
+        operands = [match.group(1), match.group(3)]
+
+    if operation not in OPERATIONS:
+        raise ValueError(f"Unknown operation: {operation}")
+    if len(operands) != OPERATIONS[operation] or not all(operands):
+        raise ValueError(f"{operation} takes {OPERATIONS[operation]} operand(s)")
+    return Expression(
+        operation,
+        [float(op) if _NUMBER.match(op) else op for op in operands],
+    )
+
+
+def read_columns(path: str, names: list):
+    """Parse the named columns of a CSV into array('d') buffers.
+
+    Returns (header, columns, row_count, parse_errors) where columns maps
+    each name to its buffer and parse_errors maps row index to a message.
+    Unparseable cells are stored as NaN.
+    """
+    with open(path, 'rb') as fh:
+        try:
+            mapped = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            raise ValueError(f"{path} is empty")
+        with mapped:
+            header = _split(mapped.readline())
+            missing = [name for name in names if name not in header]
+            if missing:
+                raise ValueError(f"Unknown column(s): {', '.join(missing)}")
+            indices = [header.index(name) for name in names]
+            buffers = [array('d') for _ in names]
+            errors = {}
+            row = 0
+            for line in iter(mapped.readline, b''):
+                if not line.strip():
+                    continue
+                cells = _split(line)
+                for index, buffer, name in zip(indices, buffers, names):
+                    try:
+                        buffer.append(float(cells[index]))
+                    except (IndexError, ValueError):
+                        buffer.append(math.nan)
+                        errors.setdefault(row, f"Invalid number in column {name}")
+                row += 1
+    return header, dict(zip(names, buffers)), row, errors
+
+
+def _split(line: bytes) -> list:
+    """Split one CSV line, using the csv module only when it is quoted."""
+    text = line.decode('utf-8').rstrip('\r\n')
+    if '"' in text:
+        return next(csv.reader([text]))
+    return text.split(',')
+
+
+def evaluate(expression: Expression, columns: dict, rows: int):
+    """Apply the expression column-wise.
+
+    Returns (values, errors): values is an array('d') (a list of ints for
+    factorial) with NaN/None in failed rows, and errors maps row index to
+    the validation message.
+    """
+    operands = [
+        columns[op] if isinstance(op, str) else array('d', [op]) * rows
+        for op in expression.operands
+    ]
+    if np is not None and expression.operation != 'factorial':
+        return _evaluate_numpy(expression.operation, operands)
+    return _evaluate_python(expression.operation, operands, rows)
+
+
+def _evaluate_python(operation, operands, rows):
+    """Row-by-row evaluation through the stateless ops kernels."""
+    kernel = getattr(ops, operation)
+    factorial = operation == 'factorial'
+    values = [] if factorial else array('d')
+    errors = {}
+    failed = None if factorial else math.nan
+    for row, args in enumerate(zip(*operands)):
+        try:
+            if any(math.isnan(arg) for arg in args):
+                raise ValueError("Missing operand")
+            if factorial:
+                value = args[0]
+                args = (int(value) if value.is_integer() else value,)
+            result = kernel(*args)
+            if isinstance(result, complex):
+                raise ValueError("Result is not a real number")
+        except OverflowError:
+            errors[row] = "Result too large"
+            result = failed
+        except (ValueError, ZeroDivisionError) as e:
+            errors[row] = str(e)
+            result = failed
+        values.append(result)
+    return values, errors
+
+
+def _evaluate_numpy(operation, operands):
+    """Vectorized evaluation with the same validation as the ops kernels."""
+    arrays = [np.frombuffer(buffer, dtype=np.float64) for buffer in operands]
+    invalid = np.zeros(len(arrays[0]), dtype=bool)
+    messages = []
+
+    def reject(mask, message):
+        mask = mask & ~invalid
+        messages.append((mask, message))
+        invalid[mask] = True
+
+    reject(np.logical_or.reduce([np.isnan(a) for a in arrays]), "Missing operand")
+    with np.errstate(all='ignore'):
+        if operation in ('sqrt', 'square_root'):
+            (x,) = arrays
+            reject(x < 0, "Cannot calculate square root of negative number")
+            result = np.sqrt(x)
+        else:
+            a, b = arrays
+            if operation == 'divide':
+                reject(b == 0, "Cannot divide by zero")
+                result = a / b
+            elif operation == 'modulo':
+                reject(b == 0, "Cannot perform modulo with zero")
+                result = np.mod(a, b)
+            elif operation == 'power':
+                reject((a == 0) & (b < 0), "0.0 cannot be raised to a negative power")
+                result = np.power(a, b)
+                reject(np.isnan(result), "Result is not a real number")
+                reject(np.isinf(result) & np.isfinite(a) & np.isfinite(b),
+                       "Result too large")
+            elif operation == 'percentage':
+                result = (a * b) / 100
+            else:
+                result = {'add': np.add, 'subtract': np.subtract,
+                          'multiply': np.multiply}[operation](a, b)
+    result[invalid] = np.nan
+
+    errors = {}
+    for mask, message in messages:
+        for row in np.flatnonzero(mask):
+            errors[int(row)] = message
+    return array('d', result.tobytes()), errors
+
+
+def _format(value) -> str:
+    """Render one result cell (integers in full, beyond str()'s digit limit)."""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ''
+    return repr(value) if isinstance(value, float) else to_decimal_string(value)
+
+
+def write_column(out, name: str, values, errors: dict) -> None:
+    """Write the result and error columns as a two-column CSV."""
+    out.write(f"{name},{name}_error\n")
+    out.write(''.join(
+        f"{_format(value)},{_quote(errors.get(row, ''))}\n"
+        for row, value in enumerate(values)
+    ))
+
+
+def write_augmented(path: str, out, name: str, values, errors: dict) -> None:
+    """Write the input CSV with the result and error columns appended."""
+    with open(path, 'r', encoding='utf-8', newline='') as fh:
+        header = fh.readline().rstrip('\r\n')
+        chunks = [f"{header},{name},{name}_error\n"]
+        row = 0
+        for line in fh:
+            line = line.rstrip('\r\n')
+            if not line.strip():
+                continue
+            chunks.append(
+                f"{line},{_format(values[row])},{_quote(errors.get(row, ''))}\n"
+            )
+            row += 1
+    out.write(''.join(chunks))
+
+
+def _quote(text: str) -> str:
+    """Quote an error message if it needs it."""
+    if not any(ch in text for ch in ',"\n'):
+        return text
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator='').writerow([text])
+    return buffer.getvalue()
+
+
+def evaluate_csv(path: str, expression: str):
+    """Evaluate an expression over a CSV file; returns (values, errors)."""
+    parsed = parse_expression(expression)
+    _, columns, rows, errors = read_columns(path, parsed.columns)
+    values, eval_errors = evaluate(parsed, columns, rows)
+    # Parse errors take precedence (they also show up as "Missing operand").
+    eval_errors.update(errors)
+    return values, eval_errors
@@ -0,0 +1,85 @@
+"""
+Production gunicorn configuration.
+
+    gunicorn --config src/gunicorn_conf.py
+
+The master preloads web_app, warms it up from a snapshot (WARMUP_SNAPSHOT,
+see warmup.py) and freezes the heap before forking. Workers recycled by
+max_requests are forked from that warm master, so they start with shared,
+warm caches instead of re-importing and re-rendering everything. Each
+worker's boot time is logged and reported under "worker" in /api/metrics.
+
+With more than one worker the jobs API needs JOBS_REDIS_URL (see jobs.py);
+without it /api/jobs answers 503.
+"""
+
+import gc
+import os
+import sys
+import time
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+import warmup  # noqa: E402
+
+wsgi_app = 'web_app:app'
+pythonpath = SRC_DIR
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get('GUNICORN_WORKERS', 4))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'sync')
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+timeout = 30
+keepalive = 2
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 100))
+preload_app = True
+
+# A job is run by the worker that accepted it; with several workers its
+# state must be shared through Redis or polls hit the wrong worker.
+if workers > 1:
+    os.environ.setdefault('JOBS_REQUIRE_SHARED_STORE', '1')
+
+# No collections while preloading: they would dirty pages that the freeze
+# in when_ready is meant to keep shared. warmup.prepare() re-enables it.
+# This module is executed again on every reload (SIGHUP), which preloads
+# the app again; on_reload then repeats the warm-up.
+gc.disable()
+
+
+def when_ready(server):
+    """Warm the preloaded app and freeze its heap before the first fork."""
+    _prepare(server)
+
+
+def on_reload(server):
+    """Warm the re-preloaded app and re-enable collection after a reload."""
+    _prepare(server)
+
+
+def _prepare(server):
+    try:
+        stats = warmup.prepare(server.app.wsgi(),
+                               warmup.load_snapshot(os.environ.get('WARMUP_SNAPSHOT')))
+    finally:
+        gc.enable()
+    server.log.info("Warmed up %d requests in %.1f ms; %d objects frozen",
+                    stats['computed'], stats['warmup_ms'], stats['frozen_objects'])
+
+
+def pre_fork(server, worker):
+    """Stamp the fork; also freeze anything the master allocated since."""
+    gc.freeze()
+    worker.boot_started = time.monotonic()
+
+
+def post_fork(server, worker):
+    """Make sure workers collect, whatever state the master is in."""
+    gc.enable()
+
+
+def post_worker_init(worker):
+    """Record how long the worker took from fork to serving."""
+    boot_ms = warmup.record_boot(worker.boot_started)
+    worker.log.info("Worker %s booted in %.1f ms", worker.pid, boot_ms)
@@ -0,0 +1,556 @@
+#!/usr/bin/env python3
+"""
+Session history sharded across history nodes by consistent hashing.
+
+Each session's history lives on ``replication`` nodes chosen clockwise on a
+hash ring of virtual nodes, so any web_app replica can serve any session
+without sticky routing, and adding a node only moves the sessions whose
+replica set changed.
+
+Every write bumps a per-session version on each replica. Reads ask all
+replicas at once, return the highest version and repair replicas that
+missed writes (read-repair), so a replica that was down, or a node that
+has just joined, never serves stale history. To add a node:
+
+    python src/history_service.py rebalance --nodes h1:7070,h2:7070 --add h3:7070
+
+then switch HISTORY_NODES to include h3 and, once every web worker runs
+with it, repeat the command with ``--prune`` to drop moved copies.
+
+Nodes speak newline-delimited JSON over TCP: one ``{"op": ..., ...}``
+request per line, answered in order by one ``{"ok": ..., ...}`` line.
+Clients keep a pool of open connections per node and pipeline batches of
+requests over a single round trip. HistoryServer is a small stand-in node
+for running several "nodes" on one machine.
+"""
+
+import bisect
+import hashlib
+import json
+import queue
+import socket
+import socketserver
+import threading
+
+import click
+
+DEFAULT_LIMIT = 100
+
+
+class HistoryUnavailable(Exception):
+    """Raised when no replica of a session's history can be reached."""
+
+
+class LocalHistoryStore:
+    """Thread-safe in-memory history store (also the state of a HistoryServer).
+
+    Each session has a version that every write increments; a cleared
+    session keeps its version so that stale copies cannot bring it back.
+    """
+
+    def __init__(self):
+        """Initialize an empty store."""
+        self._histories = {}
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> list:
+        """History of a session (empty if unknown)."""
+        with self._lock:
+            return list(self._histories.get(key, ()))
+
+    def read(self, key: str) -> list:
+        """[version, entries] of a session (version 0 if unknown)."""
+        with self._lock:
+            return [self._versions.get(key, 0), list(self._histories.get(key, ()))]
+
+    def set(self, key: str, entries: list, version: int = None) -> bool:
+        """Replace a session's history.
+
+        With a version (when copying between replicas) the history is only
+        replaced if that version is newer than the stored one.
+        """
+        with self._lock:
+            current = self._versions.get(key, 0)
+            if version is None:
+                version = current + 1
+            elif version <= current:
+                return False
+            self._versions[key] = version
+            if entries:
+                self._histories[key] = list(entries)
+            else:
+                self._histories.pop(key, None)
+            return True
+
+    def append(self, key: str, entry: str, limit: int = DEFAULT_LIMIT) -> None:
+        """Append one entry, keeping only the last ``limit``."""
+        with self._lock:
+            entries = self._histories.setdefault(key, [])
+            entries.append(entry)
+            del entries[:-limit]
+            self._versions[key] = self._versions.get(key, 0) + 1
+
+    def clear(self, key: str) -> None:
+        """Empty a session's history (a new version with no entries)."""
+        self.set(key, [])
+
+    def delete(self, key: str) -> None:
+        """Forget a session, version included."""
+        with self._lock:
+            self._histories.pop(key, None)
+            self._versions.pop(key, None)
+
+    def keys(self) -> list:
+        """Sessions held by this store (cleared ones included)."""
+        with self._lock:
+            return list(self._versions)
+
+    def execute(self, command: dict):
+        """Run one protocol command and return its value."""
+        op = command.get('op')
+        if op == 'get':
+            return self.get(command['key'])
+        if op == 'read':
+            return self.read(command['key'])
+        if op == 'set':
+            return self.set(command['key'], command['entries'], command.get('version'))
+        if op == 'append':
+            return self.append(command['key'], command['entry'],
+                               command.get('limit', DEFAULT_LIMIT))
+        if op == 'clear':
+            return self.clear(command['key'])
+        if op == 'delete':
+            return self.delete(command['key'])
+        if op == 'keys':
+            return self.keys()
+        raise ValueError(f"Unknown command: {op}")
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """Answer each request line with one response line, in order."""
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections.add(self.connection)
+
+    def finish(self):
+        with self.server.lock:
+            self.server.connections.discard(self.connection)
+        super().finish()
+
+    def handle(self):
+        store = self.server.store
+        for line in self.rfile:
+            try:
+                value = store.execute(json.loads(line))
+                response = {'ok': True, 'value': value}
+            except (KeyError, TypeError, ValueError) as e:
+                response = {'ok': False, 'error': str(e)}
+            line = json.dumps(response, separators=(',', ':')).encode()
+            self.wfile.write(line + b'\n')
+
+
+class HistoryServer(socketserver.ThreadingTCPServer):
+    """Local TCP history node backed by a LocalHistoryStore."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host='127.0.0.1', port=0, store=None):
+        """Bind the server; port 0 picks a free port."""
+        super().__init__((host, port), _Handler)
+        self.store = store if store is not None else LocalHistoryStore()
+        self.connections = set()
+        self.lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def address(self) -> str:
+        """'host:port' the server listens on."""
+        host, port = self.server_address[:2]
+        return f'{host}:{port}'
+
+    def start(self) -> 'HistoryServer':
+        """Serve from a background thread."""
+        self._thread = threading.Thread(target=self.serve_forever, args=(0.05,),
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and drop every client connection, like a dead node."""
+        self.shutdown()
+        self.server_close()
+        with self.lock:
+            connections = list(self.connections)
+        for connection in connections:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if self._thread is not None:
+            self._thread.join()
+
+
+class _Connection:
+    """One open socket to a history node."""
+
+    def __init__(self, host, port, timeout):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.rfile = self.sock.makefile('rb')
+
+    def close(self):
+        self.rfile.close()
+        self.sock.close()
+
+
+class HistoryClient:
+    """Pooled, pipelining client for one history node."""
+
+    def __init__(self, address: str, pool_size=8, timeout=2.0):
+        """Initialize client; connections are opened on demand."""
+        host, _, port = address.rpartition(':')
+        self.address = address
+        self.host, self.port = host, int(port)
+        self.timeout = timeout
+        self._idle = queue.LifoQueue(maxsize=pool_size)
+        self._lock = threading.Lock()
+        self._connects = 0
+
+    def pipeline(self, commands: list) -> list:
+        """Send commands in one write and return their values in order."""
+        return self.send(commands)()
+
+    def send(self, commands: list):
+        """Send commands in one write; returns a function that awaits their values.
+
+        Sending to several nodes before waiting on any of them overlaps
+        their round trips.
+        """
+        if not commands:
+            return lambda: []
+        connection = self._acquire()
+        try:
+            connection.sock.sendall(b''.join(
+                json.dumps(command, separators=(',', ':')).encode() + b'\n'
+                for command in commands
+            ))
+        except OSError:
+            connection.close()
+            raise
+
+        def receive():
+            try:
+                responses = []
+                for _ in commands:
+                    line = connection.rfile.readline()
+                    if not line:
+                        raise ConnectionError(f"{self.address} closed the connection")
+                    responses.append(json.loads(line))
+            except (OSError, ValueError):
+                connection.close()
+                raise
+            self._release(connection)
+            for response in responses:
+                if not response['ok']:
+                    raise ValueError(response['error'])
+            return [response['value'] for response in responses]
+
+        return receive
+
+    def execute(self, command: dict):
+        """Send a single command and return its value."""
+        return self.pipeline([command])[0]
+
+    def get_stats(self) -> dict:
+        """Connection pool counters."""
+        with self._lock:
+            connects = self._connects
+        return {'connects': connects, 'idle': self._idle.qsize()}
+
+    def close(self) -> None:
+        """Close all idle connections."""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def _acquire(self) -> _Connection:
+        """Reuse an idle connection or open a new one."""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        connection = _Connection(self.host, self.port, self.timeout)
+        with self._lock:
+            self._connects += 1
+        return connection
+
+    def _release(self, connection: _Connection) -> None:
+        """Return a healthy connection to the pool (or close it if full)."""
+        try:
+            self._idle.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+
+class HashRing:
+    """Consistent-hash ring with virtual nodes."""
+
+    def __init__(self, nodes=(), vnodes=64):
+        """Initialize ring with node names."""
+        self.vnodes = vnodes
+        self._points = []
+        self._owners = []
+        self.nodes = []
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node: str) -> None:
+        """Place a node's virtual points on the ring."""
+        if node in self.nodes:
+            return
+        self.nodes.append(node)
+        for index in range(self.vnodes):
+            point = _hash(f'{node}#{index}')
+            position = bisect.bisect(self._points, point)
+            self._points.insert(position, point)
+            self._owners.insert(position, node)
+
+    def remove(self, node: str) -> None:
+        """Take a node off the ring."""
+        self.nodes.remove(node)
+        kept = [(p, o) for p, o in zip(self._points, self._owners) if o != node]
+        self._points = [p for p, _ in kept]
+        self._owners = [o for _, o in kept]
+
+    def nodes_for(self, key: str, count: int = 1) -> list:
+        """The first ``count`` distinct nodes clockwise from the key's hash."""
+        count = min(count, len(self.nodes))
+        if not count:
+            return []
+        chosen = []
+        start = bisect.bisect(self._points, _hash(key))
+        for offset in range(len(self._owners)):
+            node = self._owners[(start + offset) % len(self._owners)]
+            if node not in chosen:
+                chosen.append(node)
+                if len(chosen) == count:
+                    break
+        return chosen
+
+
+def _hash(key: str) -> int:
+    """Stable 64-bit hash (the same in every process, unlike hash())."""
+    digest = hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+
+class ShardedHistory:
+    """Session histories replicated across history nodes."""
+
+    def __init__(self, clients: dict, replication=2, limit=DEFAULT_LIMIT, vnodes=64):
+        """Initialize with a mapping of node name to client.
+
+        A client is anything with ``pipeline(commands)`` and ``send(commands)``:
+        a HistoryClient, or a LocalHistoryStore wrapped by LocalClient for tests.
+        """
+        self.clients = dict(clients)
+        self.replication = replication
+        self.limit = limit
+        self.ring = HashRing(self.clients, vnodes=vnodes)
+
+    def replicas(self, session_id: str) -> list:
+        """Nodes holding a session, primary first."""
+        return self.ring.nodes_for(session_id, self.replication)
+
+    def get(self, session_id: str) -> list:
+        """A session's history: the newest version among reachable replicas.
+
+        Replicas holding an older version are repaired with the newest one.
+        """
+        command = {'op': 'read', 'key': session_id}
+        replies = self._broadcast(self.replicas(session_id), [command])
+        if not replies:
+            raise HistoryUnavailable(f"No replica of session {session_id} is reachable")
+        held = {node: values[0] for node, values in replies.items()}
+        version, entries = max(held.values(), key=lambda copy: copy[0])
+        stale = [node for node, (older, _) in held.items() if older < version]
+        self._broadcast(stale, [{'op': 'set', 'key': session_id,
+                                 'entries': entries, 'version': version}])
+        return entries
+
+    def set(self, session_id: str, entries: list) -> None:
+        """Write a session's history to all of its replicas."""
+        self._write(session_id, [{'op': 'set', 'key': session_id,
+                                  'entries': list(entries)[-self.limit:]}])
+
+    def append(self, session_id: str, entry: str) -> None:
+        """Append one entry on all replicas."""
+        self.extend(session_id, [entry])
+
+    def extend(self, session_id: str, entries: list) -> None:
+        """Append entries on all replicas, pipelined per replica.
+
+        Appends are applied by each node, so concurrent requests on one
+        session never overwrite each other's entries.
+        """
+        self._write(session_id, [{'op': 'append', 'key': session_id,
+                                  'entry': entry, 'limit': self.limit}
+                                 for entry in entries])
+
+    def clear(self, session_id: str) -> None:
+        """Clear a session's history on all replicas."""
+        self._write(session_id, [{'op': 'clear', 'key': session_id}])
+
+    def _write(self, session_id, commands) -> None:
+        """Apply writes to every reachable replica (at least one)."""
+        if not commands:
+            return
+        if not self._broadcast(self.replicas(session_id), commands):
+            raise HistoryUnavailable(f"No replica of session {session_id} is reachable")
+
+    def _broadcast(self, nodes, commands) -> dict:
+        """Send commands to each node, then collect; unreachable nodes are left out.
+
+        Every pending reply is read, even after a node answers with an error
+        (or garbage), so no connection is left mid-response; such a node
+        then makes the whole call raise HistoryUnavailable.
+        """
+        pending = {}
+        failed = []
+        for node in nodes:
+            try:
+                pending[node] = self.clients[node].send(commands)
+            except OSError:
+                continue
+            except ValueError:
+                failed.append(node)
+        replies = {}
+        for node, receive in pending.items():
+            try:
+                replies[node] = receive()
+            except OSError:
+                continue
+            except ValueError:
+                failed.append(node)
+        if failed:
+            raise HistoryUnavailable(f"History node {failed[0]} failed the request")
+        return replies
+
+    def add_node(self, name: str, client, prune=True) -> int:
+        """Join a node and copy sessions onto it; returns sessions copied.
+
+        Every session whose replica set now includes the new node is copied
+        to it from its old replicas (the newest version wins). With prune,
+        copies on nodes that dropped out of a replica set are deleted. Reads
+        take the newest version among a session's replicas, so sessions not
+        yet copied are still served from the old replicas that remain.
+        """
+        old_ring = HashRing(self.ring.nodes, vnodes=self.ring.vnodes)
+        self.clients[name] = client
+        self.ring.add(name)
+
+        moved = 0
+        for node in old_ring.nodes:
+            keys = self.clients[node].execute({'op': 'keys'})
+            reads = [{'op': 'read', 'key': key} for key in keys]
+            histories = dict(zip(keys, self.clients[node].pipeline(reads)))
+            copies, deletes = {}, []
+            for key, (version, entries) in histories.items():
+                new = self.replicas(key)
+                old = old_ring.nodes_for(key, self.replication)
+                for target in set(new) - set(old):
+                    copies.setdefault(target, []).append({
+                        'op': 'set', 'key': key, 'entries': entries,
+                        'version': version})
+                if prune and node not in new:
+                    deletes.append({'op': 'delete', 'key': key})
+            for target, commands in copies.items():
+                moved += sum(self.clients[target].pipeline(commands))
+            self.clients[node].pipeline(deletes)
+        return moved
+
+    def get_stats(self) -> dict:
+        """Node membership and connection pool counters."""
+        return {
+            'nodes': list(self.ring.nodes),
+            'replication': self.replication,
+            'clients': {name: client.get_stats()
+                        for name, client in self.clients.items()
+                        if hasattr(client, 'get_stats')},
+        }
+
+
+class LocalClient:
+    """Adapter giving a LocalHistoryStore the HistoryClient interface."""
+
+    def __init__(self, store=None):
+        """Wrap a store (a new one by default)."""
+        self.store = store if store is not None else LocalHistoryStore()
+
+    def pipeline(self, commands: list) -> list:
+        """Run commands in order against the store."""
+        return [self.store.execute(command) for command in commands]
+
+    def send(self, commands: list):
+        """Run commands now; returns a function giving their values."""
+        values = self.pipeline(commands)
+        return lambda: values
+
+    def execute(self, command: dict):
+        """Run a single command."""
+        return self.store.execute(command)
+
+
+def connect(addresses, replication=2, pool_size=8, timeout=2.0) -> ShardedHistory:
+    """ShardedHistory over 'host:port' addresses (node name = address)."""
+    return ShardedHistory(
+        {address: HistoryClient(address, pool_size, timeout) for address in addresses},
+        replication=replication,
+    )
+
+
+@click.group(invoke_without_command=True)
+@click.option('--host', default='127.0.0.1', help='Interface to listen on.')
+@click.option('--port', default=7070, type=int, help='Port to listen on.')
+@click.pass_context
+def main(ctx, host, port):
+    """Run a local history node (or a subcommand)."""
+    if ctx.invoked_subcommand is not None:
+        return
+    server = HistoryServer(host, port)
+    click.echo(f"History node listening on {server.address}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+@main.command()
+@click.option('--nodes', required=True,
+              help='Current HISTORY_NODES, comma-separated host:port.')
+@click.option('--add', 'new_node', required=True, help='host:port of the joining node.')
+@click.option('--replication', default=2, type=int,
+              help='HISTORY_REPLICATION of the web workers.')
+@click.option('--prune', is_flag=True,
+              help='Also delete moved copies (once every worker uses the new ring).')
+def rebalance(nodes, new_node, replication, prune):
+    """Copy the sessions a joining node now owns onto it."""
+    addresses = [node.strip() for node in nodes.split(',') if node.strip()]
+    sharded = connect(addresses, replication)
+    moved = sharded.add_node(new_node, HistoryClient(new_node), prune=prune)
+    click.echo(f"Copied {moved} sessions to {new_node}")
+    if not prune:
+        click.echo(f"Now set HISTORY_NODES={','.join(addresses + [new_node])}; "
+                   "once every web worker uses it, run again with --prune")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,383 @@
+"""
+Asynchronous calculation jobs backed by a bounded process pool.
+
+Long-running calculations are queued onto worker processes so they neither
+block a web worker slot nor get killed by the gunicorn request timeout.
+
+With several web workers, give the JobManager a RedisJobStore: a job then
+runs in the process that accepted it, but its status and result are
+published to Redis so any worker can answer polls and cancellations.
+"""
+
+import functools
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from decimal import Decimal
+
+import numeric
+
+try:
+    import redis
+except ImportError:  # optional dependency, see the "cache" extra in setup.py
+    redis = None
+
+# Operations a job may run, mapped to their number of operands.
+JOB_OPERATIONS = {
+    'add': 2, 'subtract': 2, 'multiply': 2, 'divide': 2, 'power': 2,
+    'modulo': 2, 'percentage': 2, 'sqrt': 1, 'factorial': 1,
+}
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+TIMED_OUT = 'timed_out'
+
+FINISHED_STATES = (SUCCEEDED, FAILED, CANCELLED, TIMED_OUT)
+
+# Operand bounds, so a single job cannot hold a worker for minutes.
+MAX_FACTORIAL_OPERAND = 100_000
+MAX_OPERAND_BITS = 1 << 20
+
+
+class JobQueueFull(Exception):
+    """Raised when too many jobs are already queued or running."""
+
+
+def check_operands(operation, args) -> None:
+    """Reject operands whose calculation would be unreasonably large."""
+    for arg in args:
+        if type(arg) is int and arg.bit_length() > MAX_OPERAND_BITS:
+            raise ValueError("Operand too large")
+    if operation == 'factorial' and args[0] > MAX_FACTORIAL_OPERAND:
+        raise ValueError(f"Factorial operand must be at most {MAX_FACTORIAL_OPERAND}")
+
+
+def execute(operation, args):
+    """Run an operation in a worker process, on the kernels for the operand types."""
+    name = 'square_root' if operation == 'sqrt' else operation
+    return getattr(numeric.kernels_for(args, numeric.JOB_INT_KERNELS), name)(*args)
+
+
+class Job:
+    """A queued calculation and its outcome."""
+
+    def __init__(self, operation, args, deadline):
+        """Initialize a queued job."""
+        self.id = uuid.uuid4().hex
+        self.operation = operation
+        self.args = args
+        self.deadline = deadline
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.finished_at = None
+        self.future = None
+        self.watchdog = None
+
+    @classmethod
+    def from_record(cls, job_id, record, outcome):
+        """Rebuild a job published to a RedisJobStore by another process."""
+        job = cls(record['operation'], (), record['deadline'])
+        job.id = job_id
+        if outcome is not None:
+            job.status = outcome['status']
+            job.result = outcome['result']
+            job.error = outcome['error']
+        return job
+
+    def to_dict(self) -> dict:
+        """Public view of the job (result left as computed)."""
+        return {
+            'job_id': self.id,
+            'operation': self.operation,
+            'status': self.status,
+            'result': self.result,
+            'error': self.error,
+        }
+
+
+class RedisJobStore:
+    """Publish job state to Redis so every web worker can read it.
+
+    Each job has a record (operation and wall-clock deadline) and, once it
+    finishes, an outcome. Outcomes are written with SET NX, so the first of
+    "succeeded", "cancelled" or "timed out" wins no matter which process
+    reports it.
+    """
+
+    def __init__(self, client, prefix='calc:jobs:', clock=time.time):
+        """Initialize store with a redis client."""
+        self.client = client
+        self.prefix = prefix
+        self._clock = clock
+
+    @classmethod
+    def from_url(cls, url, **kwargs):
+        """Create store from a redis URL."""
+        if redis is None:
+            raise RuntimeError("A shared job store requires the 'redis' package")
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def publish(self, job, timeout, ttl) -> None:
+        """Record a newly queued job."""
+        record = {'operation': job.operation, 'deadline': self._clock() + timeout}
+        self.client.set(f"{self.prefix}{job.id}", json.dumps(record),
+                        px=int((timeout + ttl) * 1000))
+
+    def finish(self, job_id, status, result, error, ttl) -> bool:
+        """Store a job's outcome unless one was stored first."""
+        outcome = {'status': status, 'result': _encode_result(result), 'error': error}
+        key = f"{self.prefix}{job_id}:outcome"
+        return bool(self.client.set(key, json.dumps(outcome), nx=True,
+                                    px=int(ttl * 1000)))
+
+    def load(self, job_id, ttl):
+        """The job as published, or None if unknown or expired.
+
+        A job past its deadline without an outcome is marked timed out.
+        """
+        record = self.client.get(f"{self.prefix}{job_id}")
+        if record is None:
+            return None
+        record = json.loads(record)
+        outcome = self._outcome(job_id)
+        if outcome is None and self._clock() > record['deadline']:
+            self.finish(job_id, TIMED_OUT, None, 'Job exceeded its deadline', ttl)
+            outcome = self._outcome(job_id)
+        return Job.from_record(job_id, record, outcome)
+
+    def _outcome(self, job_id):
+        payload = self.client.get(f"{self.prefix}{job_id}:outcome")
+        if payload is None:
+            return None
+        outcome = json.loads(payload)
+        outcome['result'] = _decode_result(outcome['result'])
+        return outcome
+
+
+def _encode_result(value):
+    """JSON-safe form of a result (big ints as hex, floats exactly)."""
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, int):
+        return {'i': hex(value)}
+    if isinstance(value, float):
+        return {'f': value.hex()}
+    if isinstance(value, Decimal):
+        return {'d': str(value)}
+    return value
+
+
+def _decode_result(value):
+    """Reverse of _encode_result."""
+    if not isinstance(value, dict):
+        return value
+    if 'i' in value:
+        return int(value['i'], 16)
+    if 'd' in value:
+        return Decimal(value['d'])
+    return float.fromhex(value['f'])
+
+
+class JobManager:
+    """Queue calculations onto a bounded ProcessPoolExecutor."""
+
+    def __init__(self, max_workers=2, max_pending=32, timeout=300.0,
+                 result_ttl=600.0, executor_factory=None, clock=time.monotonic,
+                 store=None):
+        """Initialize manager; the pool is created on first submit.
+
+        store is an optional RedisJobStore shared by all web workers.
+        """
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.result_ttl = result_ttl
+        self.store = store
+        self._executor_factory = executor_factory or ProcessPoolExecutor
+        self._clock = clock
+        self._executor = None
+        self._jobs = {}
+        # Reentrant: cancelling a future runs its done callback immediately.
+        self._lock = threading.RLock()
+
+    def submit(self, operation, args, timeout=None) -> Job:
+        """Queue a job; raises JobQueueFull when the pool is saturated."""
+        if JOB_OPERATIONS.get(operation) != len(args):
+            raise ValueError('Invalid operation')
+        check_operands(operation, args)
+        timeout = self.timeout if timeout is None else min(timeout, self.timeout)
+        with self._lock:
+            for job in self._jobs.values():
+                self._refresh(job)
+            self._evict_expired()
+            pending = sum(1 for job in self._jobs.values()
+                          if job.status in (QUEUED, RUNNING))
+            if pending >= self.max_pending:
+                raise JobQueueFull("Too many pending jobs")
+            job = Job(operation, args, self._clock() + timeout)
+            if self.store is not None:
+                self.store.publish(job, timeout, self.result_ttl)
+            self._start(job)
+            self._jobs[job.id] = job
+            # Enforce the deadline even if nobody polls the job.
+            job.watchdog = threading.Timer(timeout, self._on_deadline, (job,))
+            job.watchdog.daemon = True
+            job.watchdog.start()
+        return job
+
+    def get(self, job_id):
+        """Get a job with its status refreshed, or None if unknown/evicted."""
+        with self._lock:
+            self._evict_expired()
+            job = self._jobs.get(job_id)
+            if job is not None:
+                self._refresh(job)
+        if self.store is not None:
+            return self._shared(job_id, job)
+        return job
+
+    def cancel(self, job_id):
+        """Cancel a job; a running job's worker process is terminated."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                self._refresh(job)
+                if job.status in (QUEUED, RUNNING):
+                    self._stop(job)
+                    self._finish(job, CANCELLED)
+        if self.store is None:
+            return job
+        if job is None:
+            # Owned by another worker: record the cancellation unless the
+            # job already finished; the owner discards its result.
+            if self.store.load(job_id, self.result_ttl) is None:
+                return None
+            self.store.finish(job_id, CANCELLED, None, None, self.result_ttl)
+        return self._shared(job_id, job)
+
+    def get_stats(self) -> dict:
+        """Count jobs by status."""
+        with self._lock:
+            for job in self._jobs.values():
+                self._refresh(job)
+            counts = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            return counts
+
+    def shutdown(self) -> None:
+        """Stop the worker pool."""
+        with self._lock:
+            for job in self._jobs.values():
+                if job.watchdog is not None:
+                    job.watchdog.cancel()
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def _refresh(self, job) -> None:
+        """Update job status from its future and deadline (lock held)."""
+        if job.status in FINISHED_STATES:
+            return
+        future = job.future
+        if future.done():
+            try:
+                job.result = future.result()
+                self._finish(job, SUCCEEDED)
+            except CancelledError:
+                self._finish(job, CANCELLED)
+            except ValueError as e:
+                job.error = str(e)
+                self._finish(job, FAILED)
+            except BrokenProcessPool:
+                job.error = 'Worker process died'
+                self._finish(job, FAILED)
+                self._executor = None
+            except Exception:
+                job.error = 'Calculation error'
+                self._finish(job, FAILED)
+        elif self._clock() > job.deadline:
+            self._stop(job)
+            job.error = 'Job exceeded its deadline'
+            self._finish(job, TIMED_OUT)
+        elif future.running():
+            job.status = RUNNING
+
+    def _finish(self, job, status) -> None:
+        """Mark a job finished and publish its outcome (lock held)."""
+        job.status = status
+        job.finished_at = self._clock()
+        job.future = None
+        if job.watchdog is not None:
+            job.watchdog.cancel()
+        if self.store is not None:
+            self.store.finish(job.id, status, job.result, job.error, self.result_ttl)
+
+    def _start(self, job) -> None:
+        """Submit a job to the pool, creating the pool if needed (lock held)."""
+        if self._executor is None:
+            self._executor = self._executor_factory(max_workers=self.max_workers)
+        job.status = QUEUED
+        job.future = self._executor.submit(execute, job.operation, job.args)
+        if self.store is not None:
+            # Publish the outcome even if no poll reaches this process.
+            job.future.add_done_callback(functools.partial(self._on_done, job))
+
+    def _stop(self, job) -> None:
+        """Stop a queued or running job (lock held).
+
+        A queued future is simply cancelled. A running computation cannot be
+        interrupted, so the pool is torn down and its processes terminated;
+        the other unfinished jobs are requeued on a fresh pool.
+        """
+        if job.future.cancel():
+            return
+        job.future = None
+        for other in self._jobs.values():
+            if other.future is not None and other.future.done():
+                self._refresh(other)
+        executor, self._executor = self._executor, None
+        for other in self._jobs.values():
+            if other.future is not None:
+                self._start(other)
+        if executor is None:
+            return
+        processes = list((getattr(executor, '_processes', None) or {}).values())
+        executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.terminate()
+
+    def _on_done(self, job, future) -> None:
+        """Done callback: settle the job as soon as its future completes."""
+        with self._lock:
+            # Futures of a torn-down pool no longer belong to the job.
+            if future is job.future:
+                self._refresh(job)
+
+    def _on_deadline(self, job) -> None:
+        """Watchdog timer: time the job out if it is still unfinished."""
+        with self._lock:
+            self._refresh(job)
+
+    def _shared(self, job_id, local):
+        """The job as every worker sees it; a local view fills in RUNNING."""
+        job = self.store.load(job_id, self.result_ttl)
+        if job is not None and local is not None and job.status == QUEUED:
+            job.status = local.status
+        return job
+
+    def _evict_expired(self) -> None:
+        """Drop finished jobs whose result TTL has passed (lock held)."""
+        now = self._clock()
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished_at is not None
+                   and now - job.finished_at >= self.result_ttl]
+        for job_id in expired:
+            del self._jobs[job_id]
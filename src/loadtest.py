@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Concurrent throughput measurement for web_app.
+
+Many client threads post calculations for a fixed duration, either in-process
+(a test client per thread, exercising the app the way a threaded gthread
+worker does) or over HTTP against a running deployment.
+"""
+
+import json
+import threading
+import time
+
+import click
+
+import numeric
+from bigint import represent
+from replay import app_sender, http_sender, percentile
+
+# Single-operand operations, mapped to the names /api/calculate-single accepts.
+_SINGLE_OPERATIONS = {'sqrt': 'sqrt', 'square_root': 'sqrt', 'factorial': 'factorial'}
+
+
+def request_for(operation, a=12, b=5, precision=None):
+    """(path, body) of one calculation request."""
+    query = f'?precision={precision}' if precision else ''
+    if operation in _SINGLE_OPERATIONS:
+        return '/api/calculate-single' + query, {
+            'operation': _SINGLE_OPERATIONS[operation], 'value': a}
+    return '/api/calculate' + query, {'operation': operation, 'a': a, 'b': b}
+
+
+def run(make_sender, threads=8, duration=5.0, operation='add', precision=None,
+        clock=time.perf_counter):
+    """Drive requests from several threads; returns throughput statistics.
+
+    make_sender is called once per thread, so each thread keeps its own
+    client (and session cookie).
+    """
+    path, body = request_for(operation, precision=precision)
+    latencies = [[] for _ in range(threads)]
+    errors = [0] * threads
+    start = threading.Barrier(threads + 1)
+
+    def worker(index):
+        send = make_sender()
+        start.wait()
+        deadline = clock() + duration
+        while clock() < deadline:
+            sent = clock()
+            status, _ = send('POST', path, body)
+            latencies[index].append((clock() - sent) * 1000)
+            if status != 200:
+                errors[index] += 1
+
+    workers = [threading.Thread(target=worker, args=(i,), daemon=True)
+               for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    start.wait()
+    started = clock()
+    for thread in workers:
+        thread.join()
+    elapsed = clock() - started
+
+    merged = [ms for per_thread in latencies for ms in per_thread]
+    return {
+        'threads': threads,
+        'requests': len(merged),
+        'errors': sum(errors),
+        'seconds': elapsed,
+        'requests_per_second': len(merged) / elapsed if elapsed else 0.0,
+        'latency_ms': {'p50': percentile(merged, 0.5),
+                       'p99': percentile(merged, 0.99)},
+    }
+
+
+def kernel_benchmark(operation='add', a=12, b=5, number=100000,
+                     precisions=numeric.PRECISION_MODES):
+    """Nanoseconds per parse + kernel + JSON encode, for each precision mode.
+
+    This isolates the cost the precision mode controls from the fixed
+    per-request overhead of the web stack.
+    """
+    timings = {}
+    for precision in precisions:
+        started = time.perf_counter()
+        for _ in range(number):
+            kernels, operands = numeric.parse_operands((a, b), precision)
+            result = getattr(kernels, operation)(*operands)
+            json.dumps({'result': represent(result)}, default=str)
+        timings[precision] = (time.perf_counter() - started) / number * 1e9
+    return timings
+
+
+@click.command()
+@click.option('--target', default='http://localhost:5000',
+              help='Base URL of the web_app to load.')
+@click.option('--in-process', is_flag=True,
+              help='Load web_app imported in this process instead.')
+@click.option('--threads', default=8, type=int, help='Concurrent client threads.')
+@click.option('--duration', default=5.0, type=float, help='Seconds to run.')
+@click.option('--operation', default='add', help='Calculator operation to request.')
+@click.option('--precision', type=click.Choice(['auto', 'float', 'decimal']),
+              help='Operand precision mode to request.')
+@click.option('--trace-sample-rate', type=float,
+              help='Override TRACE_SAMPLE_RATE (with --in-process) to measure '
+                   'the cost of tracing.')
+@click.option('--kernels-only', is_flag=True,
+              help='Time operand parsing and kernels per precision mode instead.')
+@click.option('--json', 'as_json', is_flag=True, help='Print the result as JSON.')
+def main(target, in_process, threads, duration, operation, precision,
+         trace_sample_rate, kernels_only, as_json):
+    """Measure request throughput against web_app."""
+    if kernels_only:
+        timings = kernel_benchmark(operation)
+        if as_json:
+            click.echo(json.dumps(timings, indent=2))
+            return
+        for mode, ns in timings.items():
+            click.echo(f"{operation} ({mode}): {ns:.0f} ns")
+        return
+
+    if in_process:
+        from web_app import app, tracer
+        if trace_sample_rate is not None:
+            tracer.sample_rate = trace_sample_rate
+        make_sender = lambda: app_sender(app)  # noqa: E731
+    else:
+        make_sender = lambda: http_sender(target)  # noqa: E731
+
+    stats = run(make_sender, threads=threads, duration=duration, operation=operation,
+                precision=precision)
+    if as_json:
+        click.echo(json.dumps(stats, indent=2))
+        return
+    click.echo(f"{stats['requests']} requests in {stats['seconds']:.2f}s "
+               f"from {threads} threads ({stats['errors']} errors)")
+    click.echo(f"  {stats['requests_per_second']:.1f} req/s, "
+               f"p50 {stats['latency_ms']['p50']:.2f} ms, "
+               f"p99 {stats['latency_ms']['p99']:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Stateless calculator kernels.
+
+These functions hold the arithmetic and validation behind every Calculator
+operation. They keep no history and allocate nothing beyond their result,
+so they are suitable for tight loops.
+"""
+
+import math
+from typing import Union
+
+
+def add(a: Union[int, float], b: Union[int, float]) -> Union[int, float]:
+    """Add two numbers."""
+    return a + b
+
+
+def subtract(a: Union[int, float], b: Union[int, float]) -> Union[int, float]:
+    """Subtract b from a."""
+    return a - b
+
+
+def multiply(a: Union[int, float], b: Union[int, float]) -> Union[int, float]:
+    """Multiply two numbers."""
+    return a * b
+
+
+def divide(a: Union[int, float], b: Union[int, float]) -> Union[int, float]:
+    """Divide a by b."""
+    if b == 0:
+        raise ValueError("Cannot divide by zero")
+    return a / b
+
+
+def power(base: Union[int, float], exponent: Union[int, float]) -> Union[int, float]:
+    """Raise base to the power of exponent."""
+    return base ** exponent
+
+
+def square_root(number: Union[int, float]) -> float:
+    """Calculate square root of a number."""
+    if number < 0:
+        raise ValueError("Cannot calculate square root of negative number")
+    return math.sqrt(number)
+
+
+sqrt = square_root
+
+
+def percentage(value: Union[int, float],
+               percent: Union[int, float]) -> Union[int, float]:
+    """Calculate percentage of a value."""
+    return (value * percent) / 100
+
+
+def factorial(n: int) -> int:
+    """Calculate factorial of a number."""
+    if n < 0:
+        raise ValueError("Factorial is not defined for negative numbers")
+    if not isinstance(n, int):
+        raise ValueError("Factorial is only defined for integers")
+    return math.factorial(n)
+
+
+def modulo(a: Union[int, float], b: Union[int, float]) -> Union[int, float]:
+    """Calculate modulo (remainder) of a divided by b."""
+    if b == 0:
+        raise ValueError("Cannot perform modulo with zero")
+    return a % b
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Deterministic replay of captured /api/* traffic against a local web_app.
+
+Captured requests are re-sent in timestamp order at the original pace (or
+N times faster) and each response is compared with the captured one.
+"""
+
+import glob
+import json
+import os
+import re
+import time
+import urllib.error
+import urllib.request
+from collections import namedtuple
+
+import click
+
+from traffic_capture import read_records
+
+ReplayResult = namedtuple('ReplayResult', 'record status latency_ms result')
+
+_JOB_ID = re.compile(r'^(/api/jobs/)[^/?]+')
+
+_QUANTILES = (('p50', 0.5), ('p95', 0.95), ('p99', 0.99))
+
+
+def load_records(paths):
+    """Load records from capture files or directories, ordered by timestamp."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, 'capture-*.bin*'))))
+        else:
+            files.append(path)
+    records = [record for path in files for record in read_records(path)]
+    records.sort(key=lambda record: record.timestamp)
+    return records
+
+
+def http_sender(base_url):
+    """Send requests to a running web_app over HTTP."""
+    base_url = base_url.rstrip('/')
+
+    def send(method, path, body):
+        data = None if body is None else json.dumps(body).encode('utf-8')
+        req = urllib.request.Request(base_url + path, data=data, method=method,
+                                     headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(req, timeout=60) as response:
+                return response.status, _parse(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, _parse(e.read())
+
+    return send
+
+
+def app_sender(app):
+    """Send requests to a Flask app in-process through its test client."""
+    client = app.test_client()
+
+    def send(method, path, body):
+        response = client.open(path, method=method, json=body)
+        return response.status_code, response.get_json(silent=True)
+
+    return send
+
+
+def _parse(data):
+    """Decode a JSON response body, tolerating empty or non-JSON bodies."""
+    try:
+        return json.loads(data)
+    except ValueError:
+        return None
+
+
+def replay(records, send, speed=1.0, clock=time.perf_counter, sleep=time.sleep):
+    """Re-drive records through send; speed=0 sends as fast as possible."""
+    results = []
+    if not records:
+        return results
+    first = records[0].timestamp
+    started = clock()
+    for record in records:
+        if speed > 0:
+            delay = (record.timestamp - first) / speed - (clock() - started)
+            if delay > 0:
+                sleep(delay)
+        method, path = record.route.split(' ', 1)
+        body = None
+        if method != 'GET':
+            body = dict(record.operands)
+            if record.operation is not None:
+                body['operation'] = record.operation
+        sent = clock()
+        status, response = send(method, path, body)
+        latency_ms = (clock() - sent) * 1000
+        if isinstance(response, dict):
+            result = response.get('result', response.get('error'))
+        else:
+            result = None
+        results.append(ReplayResult(record, status, latency_ms, result))
+    return results
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))
+    return ordered[index]
+
+
+def route_key(route):
+    """Group routes by method and path, ignoring query strings and job ids."""
+    method, path = route.split(' ', 1)
+    path = _JOB_ID.sub(r'\1<id>', path.split('?', 1)[0])
+    return f'{method} {path}'
+
+
+def summarize(results) -> dict:
+    """Compare replayed latencies and results against the capture, per route."""
+    groups = {}
+    for item in results:
+        groups.setdefault(route_key(item.record.route), []).append(item)
+
+    summary = {}
+    for key, items in sorted(groups.items()):
+        captured = [item.record.latency_ms for item in items]
+        replayed = [item.latency_ms for item in items]
+        mismatches = [
+            item for item in items
+            if item.status != item.record.status or item.result != item.record.result
+        ]
+        summary[key] = {
+            'requests': len(items),
+            'mismatches': len(mismatches),
+            'captured_ms': {name: percentile(captured, q) for name, q in _QUANTILES},
+            'replayed_ms': {name: percentile(replayed, q) for name, q in _QUANTILES},
+        }
+    return summary
+
+
+@click.command()
+@click.argument('captures', nargs=-1, required=True, type=click.Path(exists=True))
+@click.option('--target', default='http://localhost:5000',
+              help='Base URL of the web_app to replay against.')
+@click.option('--in-process', is_flag=True,
+              help='Replay against web_app imported in this process.')
+@click.option('--speed', default=1.0, type=float,
+              help='Pace multiplier (2 = twice as fast, 0 = no pacing).')
+@click.option('--json', 'as_json', is_flag=True, help='Print the summary as JSON.')
+def main(captures, target, in_process, speed, as_json):
+    """Replay captured traffic and compare latencies and results."""
+    records = load_records(captures)
+    if in_process:
+        from web_app import app
+        send = app_sender(app)
+    else:
+        send = http_sender(target)
+
+    summary = summarize(replay(records, send, speed=speed))
+    if as_json:
+        click.echo(json.dumps(summary, indent=2))
+        return
+    click.echo(f"Replayed {len(records)} requests")
+    for route, stats in summary.items():
+        click.echo(f"{route}: {stats['requests']} requests, "
+                   f"{stats['mismatches']} mismatches")
+        for name, _ in _QUANTILES:
+            captured = stats['captured_ms'][name]
+            replayed = stats['replayed_ms'][name]
+            click.echo(f"  {name}: captured {captured:.2f} ms, "
+                       f"replayed {replayed:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
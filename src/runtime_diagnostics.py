@@ -0,0 +1,176 @@
+"""
+Runtime memory and allocation diagnostics.
+
+Everything here is pull-based: GC pauses are recorded by a cheap callback,
+while object counts and tracemalloc snapshots are only taken when queried.
+"""
+
+import gc
+import sys
+import threading
+import time
+import tracemalloc
+
+
+class GCMonitor:
+    """Record per-generation GC collection counts and pause times."""
+
+    def __init__(self):
+        """Initialize empty per-generation statistics."""
+        self._lock = threading.Lock()
+        self._started = None
+        self._generations = [
+            {'collections': 0, 'collected': 0, 'uncollectable': 0,
+             'total_pause_ms': 0.0, 'max_pause_ms': 0.0}
+            for _ in range(3)
+        ]
+        self.installed = False
+
+    def install(self) -> None:
+        """Register the GC callback (idempotent)."""
+        if not self.installed:
+            gc.callbacks.append(self._callback)
+            self.installed = True
+
+    def uninstall(self) -> None:
+        """Remove the GC callback."""
+        if self.installed:
+            gc.callbacks.remove(self._callback)
+            self.installed = False
+
+    def _callback(self, phase, info) -> None:
+        """Time each collection between its start and stop phases."""
+        if phase == 'start':
+            self._started = time.perf_counter()
+            return
+        if self._started is None:
+            return
+        pause_ms = (time.perf_counter() - self._started) * 1000
+        self._started = None
+        with self._lock:
+            stats = self._generations[info['generation']]
+            stats['collections'] += 1
+            stats['collected'] += info['collected']
+            stats['uncollectable'] += info['uncollectable']
+            stats['total_pause_ms'] += pause_ms
+            stats['max_pause_ms'] = max(stats['max_pause_ms'], pause_ms)
+
+    def get_stats(self) -> dict:
+        """Get GC statistics, including the interpreter's own counters."""
+        with self._lock:
+            generations = [dict(g) for g in self._generations]
+        return {
+            'generations': generations,
+            'thresholds': gc.get_threshold(),
+            'pending': gc.get_count(),
+            'frozen': gc.get_freeze_count(),
+        }
+
+
+class AllocationTracker:
+    """Report tracemalloc top allocation sites and diffs between queries."""
+
+    def __init__(self, frames: int = 1):
+        """Initialize tracker; tracing is not started until requested."""
+        self.frames = frames
+        self._lock = threading.Lock()
+        self._previous = None
+
+    @property
+    def tracing(self) -> bool:
+        """Whether tracemalloc is active."""
+        return tracemalloc.is_tracing()
+
+    def start(self) -> None:
+        """Start tracing allocations."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        with self._lock:
+            self._previous = None
+
+    def stop(self) -> None:
+        """Stop tracing and drop the stored snapshot."""
+        tracemalloc.stop()
+        with self._lock:
+            self._previous = None
+
+    def report(self, limit: int = 10) -> dict:
+        """Top allocation sites, and the diff against the previous report."""
+        if not tracemalloc.is_tracing():
+            return {'tracing': False}
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        ))
+        with self._lock:
+            previous, self._previous = self._previous, snapshot
+
+        current, peak = tracemalloc.get_traced_memory()
+        report = {
+            'tracing': True,
+            'traced_kb': round(current / 1024, 1),
+            'peak_kb': round(peak / 1024, 1),
+            'top': [_format_stat(s) for s in snapshot.statistics('lineno')[:limit]],
+            'diff': None,
+        }
+        if previous is not None:
+            diff = snapshot.compare_to(previous, 'lineno')
+            report['diff'] = [_format_stat(s) for s in diff[:limit]]
+        return report
+
+
+def _format_stat(stat) -> dict:
+    """Convert a tracemalloc Statistic/StatisticDiff to plain data."""
+    frame = stat.traceback[0]
+    result = {
+        'site': f"{frame.filename}:{frame.lineno}",
+        'size_kb': round(stat.size / 1024, 1),
+        'count': stat.count,
+    }
+    if hasattr(stat, 'size_diff'):
+        result['size_diff_kb'] = round(stat.size_diff / 1024, 1)
+        result['count_diff'] = stat.count_diff
+    return result
+
+
+def live_object_counts() -> dict:
+    """Count live calculators and the history records they hold."""
+    calculators = 0
+    history_records = 0
+    history_bytes = 0
+    objects = gc.get_objects()
+    for obj in objects:
+        # Match by name: src.calculator and calculator may both be loaded.
+        if any(cls.__name__ == 'Calculator' for cls in type(obj).__mro__):
+            calculators += 1
+            history = getattr(obj, 'history', None)
+            if isinstance(history, list):
+                history_records += len(history)
+                history_bytes += sum(sys.getsizeof(entry) for entry in history)
+    return {
+        'calculators': calculators,
+        'history_records': history_records,
+        'history_kb': round(history_bytes / 1024, 1),
+        'gc_tracked_objects': len(objects),
+    }
+
+
+class RuntimeDiagnostics:
+    """Aggregate GC, object and allocation diagnostics for one process."""
+
+    def __init__(self):
+        """Create monitors; call enable() to start recording GC pauses."""
+        self.gc_monitor = GCMonitor()
+        self.allocations = AllocationTracker()
+
+    def enable(self) -> None:
+        """Start recording GC pauses."""
+        self.gc_monitor.install()
+
+    def report(self, top: int = 10) -> dict:
+        """Build a full diagnostics report."""
+        return {
+            'gc': self.gc_monitor.get_stats(),
+            'objects': live_object_counts(),
+            'tracemalloc': self.allocations.report(top),
+        }
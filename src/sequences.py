@@ -0,0 +1,126 @@
+"""
+Lazy series and schedule generators built on the stateless ops kernels.
+
+Every function returns a generator that produces values only on demand,
+so very long (or unbounded) sequences never sit in memory and no step is
+recorded in a calculator's history. Arguments are validated when the
+function is called, not when the first value is requested.
+"""
+
+import itertools
+from collections import namedtuple
+
+try:
+    from . import ops
+except ImportError:  # imported as a top-level module with src/ on sys.path
+    import ops
+
+BINARY_OPERATIONS = ('add', 'subtract', 'multiply', 'divide', 'power',
+                     'modulo', 'percentage')
+
+AmortizationRow = namedtuple(
+    'AmortizationRow', 'period payment interest principal balance'
+)
+
+
+def scan(operation, values, initial=None):
+    """Running accumulation of values with a binary operation.
+
+    operation is an ops name such as 'add' or any two-argument callable.
+    Without initial, the first value starts the accumulation.
+    """
+    if isinstance(operation, str):
+        if operation not in BINARY_OPERATIONS:
+            raise ValueError(f"Unknown operation: {operation}")
+        operation = getattr(ops, operation)
+    elif not callable(operation):
+        raise ValueError(f"Unknown operation: {operation!r}")
+    return _scan(operation, iter(values), initial)
+
+
+def _scan(operation, values, accumulator):
+    if accumulator is None:
+        try:
+            accumulator = next(values)
+        except StopIteration:
+            return
+        yield accumulator
+    for value in values:
+        accumulator = operation(accumulator, value)
+        yield accumulator
+
+
+def cumulative_sum(values):
+    """Running totals of values."""
+    return scan(ops.add, values)
+
+
+def cumulative_product(values):
+    """Running products of values."""
+    return scan(ops.multiply, values)
+
+
+def geometric(first, ratio, terms=None):
+    """Terms first, first*ratio, first*ratio**2, ... (unbounded if terms is None)."""
+    _check_count(terms, 'terms')
+    return _geometric(first, ratio, terms)
+
+
+def _geometric(first, ratio, terms):
+    for k in _counter(terms, start=0):
+        yield ops.multiply(first, ops.power(ratio, k))
+
+
+def compound_growth(principal, rate, periods=None):
+    """Balance after each period of compounding: principal * (1 + rate) ** t."""
+    _check_count(periods, 'periods')
+    return _compound_growth(principal, rate, periods)
+
+
+def _compound_growth(principal, rate, periods):
+    factor = ops.add(1, rate)
+    for t in _counter(periods, start=1):
+        # Direct power per period avoids drift from repeated multiplication.
+        yield ops.multiply(principal, ops.power(factor, t))
+
+
+def amortization_schedule(principal, annual_rate, periods, periods_per_year=12):
+    """Level-payment loan schedule, one AmortizationRow per period."""
+    _check_count(periods, 'periods')
+    if not periods:
+        raise ValueError("Amortization requires at least one period")
+    if periods_per_year <= 0:
+        raise ValueError("periods_per_year must be positive")
+    rate = ops.divide(annual_rate, periods_per_year)
+    if rate == 0:
+        payment = ops.divide(principal, periods)
+    else:
+        payment = principal * rate / (1 - ops.power(1 + rate, -periods))
+    return _amortization(principal, rate, periods, payment)
+
+
+def _amortization(balance, rate, periods, payment):
+    for period in range(1, periods + 1):
+        interest = balance * rate
+        if period == periods:
+            # Settle rounding drift so the loan ends exactly at zero.
+            payment = balance + interest
+        repaid = payment - interest
+        balance = balance - repaid
+        yield AmortizationRow(period, payment, interest, repaid,
+                              0.0 if period == periods else balance)
+
+
+def _check_count(count, name):
+    """Validate an optional non-negative integer length."""
+    if count is None:
+        return
+    if not isinstance(count, int) or count < 0:
+        raise ValueError(f"{name} must be a non-negative integer")
+
+
+def _counter(limit, start):
+    """start, start+1, ... for limit values (unbounded if limit is None)."""
+    if limit is None:
+        return itertools.count(start)
+    return range(start, start + limit)
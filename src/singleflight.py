@@ -0,0 +1,240 @@
+"""
+Request coalescing (single-flight) for expensive calculations.
+
+Concurrent identical calls wait on one in-flight computation and share its
+result instead of each computing it separately.
+"""
+
+import hashlib
+import json
+import threading
+import time
+import uuid
+from decimal import Decimal
+
+import ops
+from calculator import Calculator
+
+try:
+    import redis
+except ImportError:  # optional dependency, see the "cache" extra in setup.py
+    redis = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share the same key into one computation."""
+
+    def __init__(self, backend=None):
+        """Initialize with an optional cross-process backend."""
+        self._backend = backend
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._calls = 0
+        self._computations = 0
+        self._coalesced = 0
+
+    def do(self, key, fn):
+        """Return fn(), sharing the result with concurrent callers of key."""
+        with self._lock:
+            self._calls += 1
+            call = self._in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._in_flight[key] = call
+            else:
+                self._coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            if self._backend is not None:
+                call.result, computed = self._backend.run(key, fn)
+            else:
+                call.result, computed = fn(), True
+            with self._lock:
+                if computed:
+                    self._computations += 1
+                else:
+                    self._coalesced += 1
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            call.done.set()
+
+    def get_stats(self) -> dict:
+        """Get coalescing counters."""
+        with self._lock:
+            return {
+                'calls': self._calls,
+                'computations': self._computations,
+                'coalesced': self._coalesced,
+                'in_flight': len(self._in_flight),
+                'cross_process': self._backend is not None,
+            }
+
+
+class _Call:
+    """An in-flight computation that followers wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+# Delete the lock only if this process still holds it, in one atomic step:
+# a separate GET and DEL could delete a lock another process took after ours
+# expired.
+_RELEASE_LOCK = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class RedisFlightBackend:
+    """Coalesce computations across processes using a lock in a shared Redis."""
+
+    def __init__(self, client, prefix='calc:singleflight:', lock_ttl=30.0,
+                 result_ttl=5.0, poll_interval=0.01):
+        """Initialize backend with a redis client and timing settings."""
+        self.client = client
+        self.prefix = prefix
+        self.lock_ttl = lock_ttl
+        self.result_ttl = result_ttl
+        self.poll_interval = poll_interval
+
+    @classmethod
+    def from_url(cls, url, **kwargs):
+        """Create backend from a redis URL."""
+        if redis is None:
+            raise RuntimeError("Cross-process coalescing requires the 'redis' package")
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def run(self, key, fn):
+        """Run fn once across processes; return (result, computed_here)."""
+        digest = hashlib.sha256(repr(key).encode('utf-8')).hexdigest()
+        lock_key = f"{self.prefix}lock:{digest}"
+        result_key = f"{self.prefix}result:{digest}"
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.lock_ttl
+
+        while True:
+            if self.client.set(lock_key, token, nx=True, px=int(self.lock_ttl * 1000)):
+                return self._compute(fn, lock_key, result_key, token), True
+
+            while time.monotonic() < deadline:
+                payload = self.client.get(result_key)
+                if payload is not None:
+                    return _decode(payload), False
+                if self.client.get(lock_key) is None:
+                    # Leader finished without publishing (or died); retry.
+                    break
+                time.sleep(self.poll_interval)
+            else:
+                # Leader never published in time; compute locally.
+                return fn(), True
+
+    def _compute(self, fn, lock_key, result_key, token):
+        """Compute as the cross-process leader and publish the outcome."""
+        try:
+            result = fn()
+            payload = _encode(result)
+        except ValueError as e:
+            self.client.set(result_key, json.dumps({'error': str(e)}),
+                            px=int(self.result_ttl * 1000))
+            raise
+        else:
+            self.client.set(result_key, payload, px=int(self.result_ttl * 1000))
+            return result
+        finally:
+            self.client.eval(_RELEASE_LOCK, 1, lock_key, token)
+
+
+def _encode(value) -> str:
+    """Encode a computed value for the shared cache."""
+    return json.dumps({'value': _encode_item(value)})
+
+
+def _encode_item(item):
+    """Encode numbers so that big integers and floats round-trip exactly."""
+    if isinstance(item, tuple):
+        return {'t': [_encode_item(i) for i in item]}
+    if isinstance(item, bool) or item is None or isinstance(item, str):
+        return item
+    if isinstance(item, int):
+        return {'i': hex(item)}
+    if isinstance(item, float):
+        return {'f': item.hex()}
+    if isinstance(item, Decimal):
+        return {'d': str(item)}
+    raise TypeError(f"Cannot share value of type {type(item).__name__}")
+
+
+def _decode(payload):
+    """Decode a value published by another process."""
+    data = json.loads(payload)
+    if 'error' in data:
+        raise ValueError(data['error'])
+    return _decode_item(data['value'])
+
+
+def _decode_item(item):
+    """Reverse of _encode_item."""
+    if isinstance(item, dict):
+        if 't' in item:
+            return tuple(_decode_item(i) for i in item['t'])
+        if 'i' in item:
+            return int(item['i'], 16)
+        if 'd' in item:
+            return Decimal(item['d'])
+        return float.fromhex(item['f'])
+    return item
+
+
+class CoalescingCalculator(Calculator):
+    """Calculator whose expensive operations are coalesced through a SingleFlight."""
+
+    def __init__(self, flight, kernels=ops):
+        """Initialize calculator sharing the given SingleFlight."""
+        super().__init__(kernels=kernels)
+        self._flight = flight
+
+    def power(self, base, exponent):
+        """Raise base to the power of exponent (coalesced)."""
+        return self._coalesce('power', base, exponent)
+
+    def factorial(self, n):
+        """Calculate factorial of a number (coalesced)."""
+        return self._coalesce('factorial', n)
+
+    def _coalesce(self, operation, *args):
+        """Run operation once for all identical concurrent callers."""
+        # 2 and 2.0 compare equal but produce results of different types,
+        # and operand types also select the kernel set. Equal Decimals keep
+        # their exponent in results (2 ^ 3 = 8, 2.0 ^ 3 = 8.000), so they are
+        # keyed by their string form.
+        key = (operation,) + tuple(
+            (type(a).__name__, str(a) if isinstance(a, Decimal) else a) for a in args)
+        result, entry = self._flight.do(
+            key, lambda: _compute(operation, args, self.kernels))
+        if self.record_history:
+            self._add_to_history(entry)
+        return result
+
+
+def _compute(operation, args, kernels):
+    """Compute operation on a scratch calculator; return result and history entry."""
+    scratch = Calculator(kernels=kernels)
+    result = getattr(scratch, operation)(*args)
+    return result, scratch.history[-1]
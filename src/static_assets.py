@@ -0,0 +1,148 @@
+"""
+In-memory, precompressed static asset delivery with strong ETags.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+
+from flask import Response, abort
+
+try:
+    import brotli
+except ImportError:  # optional dependency; gzip is always available
+    brotli = None
+
+
+class StaticAsset:
+    """A static asset held in memory together with its compressed variants."""
+
+    def __init__(self, body: bytes, content_type: str, cache_control: str):
+        """Precompress body and compute the validators for each encoding."""
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.content_type = content_type
+        self.cache_control = cache_control
+        # A strong ETag identifies exact bytes, so each encoding gets its own.
+        self.variants = {'identity': (body, f'"{digest}"')}
+
+        compressed = gzip.compress(body, compresslevel=9, mtime=0)
+        if len(compressed) < len(body):
+            self.variants['gzip'] = (compressed, f'"{digest}-gz"')
+        if brotli is not None:
+            compressed = brotli.compress(body, quality=11)
+            if len(compressed) < len(body):
+                self.variants['br'] = (compressed, f'"{digest}-br"')
+
+    @property
+    def etags(self) -> set:
+        """All ETags this asset may be served with."""
+        return {etag for _, etag in self.variants.values()}
+
+    def select(self, accept_encoding: str) -> str:
+        """Pick the best encoding the client accepts."""
+        accepted = _parse_accept_encoding(accept_encoding)
+        wildcard = accepted.get('*', 0)
+        for encoding in ('br', 'gzip'):
+            if encoding in self.variants and accepted.get(encoding, wildcard) > 0:
+                return encoding
+        return 'identity'
+
+
+class AssetStore:
+    """Registry of in-memory static assets keyed by URL path."""
+
+    def __init__(self, max_age: int = 31536000):
+        """Initialize an empty store; max_age applies to non-HTML assets."""
+        self.max_age = max_age
+        self._assets = {}
+
+    def add(self, path: str, body, content_type: str = None) -> StaticAsset:
+        """Register an asset under a URL path."""
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        if content_type is None:
+            content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        if content_type.startswith('text/') and 'charset' not in content_type:
+            content_type += '; charset=utf-8'
+        if content_type.startswith('text/html'):
+            # HTML lives at stable URLs, so always revalidate (cheap 304s)
+            # instead of pinning a stale page for max_age after a deploy.
+            cache_control = 'public, no-cache'
+        else:
+            cache_control = f'public, max-age={self.max_age}'
+        asset = StaticAsset(body, content_type, cache_control)
+        self._assets[path] = asset
+        return asset
+
+    def add_directory(self, url_prefix: str, directory: str) -> int:
+        """Register every file below directory under url_prefix."""
+        count = 0
+        for root, _, files in os.walk(directory):
+            for name in files:
+                file_path = os.path.join(root, name)
+                relative = os.path.relpath(file_path, directory).replace(os.sep, '/')
+                with open(file_path, 'rb') as fh:
+                    self.add(f"{url_prefix.rstrip('/')}/{relative}", fh.read())
+                count += 1
+        return count
+
+    def get(self, path: str):
+        """Get the asset registered for path, or None."""
+        return self._assets.get(path)
+
+    def serve(self, path: str, request) -> Response:
+        """Build the response for path, honouring conditional requests."""
+        asset = self._assets.get(path)
+        if asset is None:
+            abort(404)
+
+        encoding = asset.select(request.headers.get('Accept-Encoding', ''))
+        body, etag = asset.variants[encoding]
+        headers = {
+            'ETag': etag,
+            'Cache-Control': asset.cache_control,
+            'Vary': 'Accept-Encoding',
+        }
+
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match and _etag_matches(if_none_match, asset.etags):
+            return Response(status=304, headers=headers)
+
+        if encoding != 'identity':
+            headers['Content-Encoding'] = encoding
+        return Response(body, status=200, headers=headers,
+                        content_type=asset.content_type)
+
+
+def _parse_accept_encoding(header: str) -> dict:
+    """Parse an Accept-Encoding header into {coding: qvalue}."""
+    accepted = {}
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+def _etag_matches(if_none_match: str, etags: set) -> bool:
+    """Check an If-None-Match header against a set of strong ETags."""
+    if if_none_match.strip() == '*':
+        return True
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        # If-None-Match uses weak comparison.
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate in etags:
+            return True
+    return False
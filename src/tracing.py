@@ -0,0 +1,278 @@
+"""
+Lightweight local tracing with W3C traceparent propagation.
+
+Spans nest through a context variable and are handed to pluggable
+exporters (an in-memory ring buffer and a JSON-lines file are provided)
+when they end. Sampling is decided once per trace at its root: unsampled
+requests only pay for a context-variable lookup per instrumented call.
+"""
+
+import functools
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+
+_TRACEPARENT = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+
+_current_span = ContextVar('current_span', default=None)
+
+
+class Span:
+    """A timed operation within a trace."""
+
+    __slots__ = ('tracer', 'trace_id', 'span_id', 'parent_id', 'name',
+                 'attributes', 'status', 'start_ns', 'duration_ns',
+                 '_started', '_token')
+
+    def __init__(self, tracer, name, trace_id, parent_id=None, attributes=None):
+        """Initialize a span; it starts when entered."""
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = _random_hex(16)
+        self.parent_id = parent_id
+        self.attributes = attributes or {}
+        self.status = 'ok'
+        self.start_ns = None
+        self.duration_ns = None
+        self._started = None
+        self._token = None
+
+    @property
+    def traceparent(self) -> str:
+        """W3C traceparent header value identifying this span."""
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def set_attribute(self, key, value) -> None:
+        """Attach an attribute to the span."""
+        self.attributes[key] = value
+
+    def __enter__(self):
+        self.start_ns = time.time_ns()
+        self._started = time.perf_counter_ns()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration_ns = time.perf_counter_ns() - self._started
+        try:
+            _current_span.reset(self._token)
+        except ValueError:
+            # Ended from another context (e.g. after a streamed response).
+            pass
+        if exc_type is not None:
+            self.status = 'error'
+            self.attributes.setdefault('error.type', exc_type.__name__)
+        self.tracer.export(self)
+        return False
+
+    def to_dict(self) -> dict:
+        """Plain-data form used by exporters."""
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start_unix_nano': self.start_ns,
+            'duration_ms': self.duration_ns / 1e6,
+            'status': self.status,
+            'attributes': self.attributes,
+        }
+
+
+class _NoopSpan:
+    """Stand-in used when there is no sampled trace in progress."""
+
+    traceparent = None
+
+    def set_attribute(self, key, value) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class RingBufferExporter:
+    """Keep the most recent finished spans in memory."""
+
+    def __init__(self, capacity=2048):
+        """Initialize an empty ring buffer."""
+        self._spans = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+
+    def export(self, span_data: dict) -> None:
+        """Store a finished span."""
+        with self._lock:
+            self._spans.append(span_data)
+
+    def get_spans(self, trace_id=None) -> list:
+        """Finished spans, optionally only those of one trace."""
+        with self._lock:
+            spans = list(self._spans)
+        if trace_id is not None:
+            spans = [s for s in spans if s['trace_id'] == trace_id]
+        return spans
+
+    def clear(self) -> None:
+        """Drop all stored spans."""
+        with self._lock:
+            self._spans.clear()
+
+
+class JsonLinesExporter:
+    """Append finished spans to a JSON-lines file."""
+
+    def __init__(self, path):
+        """Initialize exporter; the file is opened on first export."""
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+        self._pid = None
+
+    def export(self, span_data: dict) -> None:
+        """Write one span as a JSON line."""
+        line = json.dumps(span_data, separators=(',', ':'), default=str) + '\n'
+        with self._lock:
+            if self._file is None or self._pid != os.getpid():
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._file = open(self.path, 'a', encoding='utf-8', buffering=1)
+                self._pid = os.getpid()
+            self._file.write(line)
+
+    def close(self) -> None:
+        """Close the file."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class RateLimiter:
+    """Token bucket allowing ``rate`` events per second (bursts of ``rate``)."""
+
+    def __init__(self, rate, clock=time.monotonic):
+        """Initialize a full bucket; a rate of 0 allows nothing."""
+        self.rate = rate
+        self.capacity = max(rate, 1) if rate > 0 else 0
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Take a token if one is available."""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity,
+                               self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class Tracer:
+    """Create spans, make head-based sampling decisions and export spans."""
+
+    def __init__(self, exporters=(), sample_rate=0.0, incoming_limit=None,
+                 clock=time.monotonic):
+        """Initialize tracer with exporters and a root sampling probability.
+
+        incoming_limit caps how many traces per second an incoming sampled
+        traceparent may force: None honours every one, 0 ignores the flag.
+        """
+        self.exporters = list(exporters)
+        self.sample_rate = sample_rate
+        self.incoming = None
+        if incoming_limit is not None:
+            self.incoming = RateLimiter(incoming_limit, clock)
+
+    def start_trace(self, name, traceparent=None, attributes=None):
+        """Start a root span, continuing an incoming W3C trace context.
+
+        An incoming sampled traceparent is honoured within incoming_limit;
+        otherwise the trace is sampled with probability sample_rate (keeping
+        any incoming trace id). Returns NOOP_SPAN for unsampled traces.
+        """
+        parent = parse_traceparent(traceparent) if traceparent else None
+        if parent is not None:
+            trace_id, parent_id, sampled = parent
+            if sampled and self.incoming is not None and not self.incoming.allow():
+                sampled = self._sample()
+        else:
+            trace_id, parent_id = _random_hex(32), None
+            sampled = self._sample()
+        if not sampled or not self.exporters:
+            return NOOP_SPAN
+        return Span(self, name, trace_id, parent_id, attributes)
+
+    def _sample(self) -> bool:
+        """Head-based sampling decision for a trace the caller did not force."""
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def export(self, span: Span) -> None:
+        """Hand a finished span to every exporter."""
+        data = span.to_dict()
+        for exporter in self.exporters:
+            exporter.export(data)
+
+
+def span(name, **attributes):
+    """Child span of the current span, or a no-op outside a sampled trace."""
+    parent = _current_span.get()
+    if parent is None:
+        return NOOP_SPAN
+    return Span(parent.tracer, name, parent.trace_id, parent.span_id, attributes)
+
+
+def current_span():
+    """The active span, or None."""
+    return _current_span.get()
+
+
+def parse_traceparent(header: str):
+    """Parse a traceparent header into (trace_id, parent_id, sampled) or None."""
+    match = _TRACEPARENT.match(header.strip().lower())
+    if not match:
+        return None
+    trace_id, parent_id, flags = match.groups()
+    if trace_id == '0' * 32 or parent_id == '0' * 16:
+        return None
+    return trace_id, parent_id, bool(int(flags, 16) & 0x01)
+
+
+def instrument_class(cls, methods, prefix):
+    """Subclass cls with a span around each named method."""
+    namespace = {name: _traced(getattr(cls, name), f'{prefix}.{name}')
+                 for name in methods}
+    return type(f'Traced{cls.__name__}', (cls,), namespace)
+
+
+def _traced(method, span_name):
+    """Wrap method so it runs inside a span when a trace is active."""
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        if _current_span.get() is None:
+            return method(*args, **kwargs)
+        with span(span_name):
+            return method(*args, **kwargs)
+    return wrapper
+
+
+def _random_hex(length: int) -> str:
+    """Random lowercase hex id of the given length."""
+    return f'{random.getrandbits(length * 4):0{length}x}'
@@ -0,0 +1,182 @@
+"""
+Opt-in capture of /api/* traffic as compact binary records.
+
+Each record holds the request timestamp, route, operation, operands,
+status, latency and result, so production traffic can later be replayed
+against a local web_app (see replay.py).
+
+File layout: the 8-byte MAGIC header, then records of
+``<uint32 length><float64 timestamp><float32 latency_ms><uint16 status>``
+followed by four uint16-length-prefixed UTF-8 fields: route, operation,
+operands (JSON) and result (JSON).
+"""
+
+import atexit
+import json
+import os
+import struct
+import threading
+import time
+from collections import namedtuple
+
+from flask import g, request
+
+MAGIC = b'CALCCAP1'
+
+_HEADER = struct.Struct('<IdfH')
+_FIELD_LENGTH = struct.Struct('<H')
+_MAX_FIELD = 0xFFFF
+
+CaptureRecord = namedtuple(
+    'CaptureRecord',
+    'timestamp latency_ms status route operation operands result',
+)
+
+
+def _json_field(value) -> bytes:
+    """JSON-encode a field; values too long to store are recorded as null."""
+    data = json.dumps(value, separators=(',', ':')).encode('utf-8')
+    return data if len(data) <= _MAX_FIELD else b'null'
+
+
+def encode_record(record: CaptureRecord) -> bytes:
+    """Serialize a record (including its length prefix)."""
+    fields = b''.join(
+        _FIELD_LENGTH.pack(len(data)) + data
+        for data in (
+            record.route.encode('utf-8')[:_MAX_FIELD],
+            (record.operation or '').encode('utf-8')[:_MAX_FIELD],
+            _json_field(record.operands),
+            _json_field(record.result),
+        )
+    )
+    length = _HEADER.size - 4 + len(fields)
+    return _HEADER.pack(length, record.timestamp, record.latency_ms,
+                        record.status) + fields
+
+
+def read_records(path):
+    """Yield the CaptureRecords stored in a capture file."""
+    with open(path, 'rb') as fh:
+        if fh.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a traffic capture file")
+        while True:
+            prefix = fh.read(4)
+            if len(prefix) < 4:
+                return
+            (length,) = struct.unpack('<I', prefix)
+            body = fh.read(length)
+            if len(body) < length:
+                return  # truncated tail of a file that was still being written
+            timestamp, latency_ms, status = struct.unpack_from('<dfH', body)
+            offset = _HEADER.size - 4
+            fields = []
+            for _ in range(4):
+                (size,) = _FIELD_LENGTH.unpack_from(body, offset)
+                offset += _FIELD_LENGTH.size
+                fields.append(body[offset:offset + size].decode('utf-8'))
+                offset += size
+            route, operation, operands, result = fields
+            yield CaptureRecord(timestamp, latency_ms, status, route,
+                                operation or None, json.loads(operands),
+                                json.loads(result))
+
+
+class CaptureWriter:
+    """Append records to size-rotated capture files, one set per process."""
+
+    def __init__(self, directory, max_bytes=64 * 1024 * 1024, backup_count=5):
+        """Initialize writer; files are opened lazily on first write."""
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._lock = threading.Lock()
+        self._file = None
+        self._pid = None
+        self._size = 0
+
+    @property
+    def path(self) -> str:
+        """Current capture file (per process, since workers are forked)."""
+        return os.path.join(self.directory, f'capture-{os.getpid()}.bin')
+
+    def write(self, record: CaptureRecord) -> None:
+        """Append a record, rotating the file when it grows too large."""
+        data = encode_record(record)
+        with self._lock:
+            if self._file is None or self._pid != os.getpid():
+                self._open()
+            if self._size + len(data) > self.max_bytes:
+                self._rotate()
+            self._file.write(data)
+            self._size += len(data)
+
+    def flush(self) -> None:
+        """Flush buffered records to disk."""
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+
+    def close(self) -> None:
+        """Flush and close the current file."""
+        with self._lock:
+            if self._file is not None and self._pid == os.getpid():
+                self._file.close()
+            self._file = None
+
+    def _open(self) -> None:
+        """Open (or continue) this process's capture file (lock held)."""
+        os.makedirs(self.directory, exist_ok=True)
+        self._pid = os.getpid()
+        self._file = open(self.path, 'ab')
+        self._size = self._file.tell()
+        if self._size == 0:
+            self._file.write(MAGIC)
+            self._size = len(MAGIC)
+
+    def _rotate(self) -> None:
+        """Shift capture-<pid>.bin to .1, .1 to .2, ... (lock held)."""
+        self._file.close()
+        path = self.path
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f'{path}.{index}'
+            if os.path.exists(source):
+                os.replace(source, f'{path}.{index + 1}')
+        if self.backup_count > 0:
+            os.replace(path, f'{path}.1')
+        else:
+            os.remove(path)
+        self._open()
+
+
+def install_capture(app, writer: CaptureWriter) -> None:
+    """Record every /api/* request handled by app."""
+
+    @app.before_request
+    def _start_capture():
+        if request.path.startswith('/api/'):
+            g.capture_started = time.time()
+            g.capture_timer = time.perf_counter()
+
+    @app.after_request
+    def _finish_capture(response):
+        timer = g.pop('capture_timer', None)
+        if timer is None:
+            return response
+        latency_ms = (time.perf_counter() - timer) * 1000
+        payload = request.get_json(silent=True)
+        operands = dict(payload) if isinstance(payload, dict) else {}
+        operation = operands.pop('operation', None)
+        body = None if response.is_streamed else response.get_json(silent=True)
+        if isinstance(body, dict):
+            result = body.get('result', body.get('error'))
+        else:
+            result = None
+        route = request.full_path.rstrip('?')
+        writer.write(CaptureRecord(
+            g.pop('capture_started'), latency_ms, response.status_code,
+            f'{request.method} {route}', operation, operands, result,
+        ))
+        return response
+
+    atexit.register(writer.close)
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Pre-fork warm-up of the preloaded web_app (see gunicorn_conf.py).
+
+With ``preload_app`` the gunicorn master imports web_app once, which already
+renders the index template into the in-memory asset store. warm() then runs
+a snapshot of representative calculations through the same parsing, kernels
+and result representation the API uses. That fills the shared caches
+(``bigint._cached_pow10`` for large results, compiled regexes, the decimal
+context) and triggers lazy imports in Flask and werkzeug. prepare() finally freezes
+the heap with ``gc.freeze()``, so collections in the workers never touch
+(and copy) the shared pages.
+
+Each worker records its boot time (fork to ready) for /api/metrics.
+
+The default snapshot is built in. A snapshot of real traffic can be built
+from traffic captures (see traffic_capture.py):
+
+    python src/warmup.py captures/ -o warmup.json --top 50
+"""
+
+import gc
+import json
+import os
+import time
+from collections import Counter
+from urllib.parse import parse_qs, urlsplit
+
+import click
+
+import numeric
+import ops
+from bigint import represent
+
+DEFAULT_SNAPSHOT = [
+    {'operation': 'add', 'a': 15, 'b': 25},
+    {'operation': 'subtract', 'a': 2.5, 'b': 0.5},
+    {'operation': 'multiply', 'a': 12, 'b': 12},
+    {'operation': 'divide', 'a': 7, 'b': 2},
+    {'operation': 'power', 'a': 2, 'b': 64},
+    {'operation': 'power', 'a': 7, 'b': 500},
+    {'operation': 'modulo', 'a': 17, 'b': 5},
+    {'operation': 'percentage', 'a': 200, 'b': 15},
+    {'operation': 'add', 'a': 0.1, 'b': 0.2, 'precision': 'decimal'},
+    {'operation': 'sqrt', 'value': 16},
+    {'operation': 'factorial', 'value': 20},
+    {'operation': 'factorial', 'value': 1000},
+]
+
+# Stateless routes requested once to warm the request machinery.
+WARMUP_ROUTES = ('/health', '/')
+
+_CALCULATE_ROUTES = ('POST /api/calculate', 'POST /api/calculate-single')
+
+_boot = {
+    'pid': None,
+    'preloaded': False,
+    'warmup_ms': None,
+    'frozen_objects': 0,
+    'boot_ms': None,
+}
+
+
+def load_snapshot(path=None) -> list:
+    """Warm-up requests from a snapshot file, or the built-in default."""
+    if not path:
+        return list(DEFAULT_SNAPSHOT)
+    with open(path, 'r', encoding='utf-8') as fh:
+        return json.load(fh)['requests']
+
+
+def compute(entry: dict):
+    """Compute one snapshot entry the way the calculation API does."""
+    operation = entry['operation']
+    if operation == 'factorial':
+        return ops.factorial(int(entry['value']))
+    values = (entry['value'],) if 'value' in entry else (entry['a'], entry['b'])
+    kernels, operands = numeric.parse_operands(values, entry.get('precision', 'auto'))
+    name = 'square_root' if operation == 'sqrt' else operation
+    return getattr(kernels, name)(*operands)
+
+
+def warm(app, snapshot) -> int:
+    """Compile templates, run the snapshot and the warm-up routes.
+
+    Returns the number of snapshot entries computed. Only stateless work is
+    done: no session, history service, job pool or traffic capture is
+    touched, so the workers inherit nothing from it but warm caches.
+    """
+    for name in app.jinja_env.list_templates():
+        app.jinja_env.get_template(name)
+    computed = 0
+    for entry in snapshot:
+        try:
+            result = compute(entry)
+            json.dumps({'result': represent(result)}, default=str)
+            computed += 1
+        except (ArithmeticError, KeyError, TypeError, ValueError):
+            continue
+    with app.test_client() as client:
+        for path in WARMUP_ROUTES:
+            client.get(path)
+    return computed
+
+
+def prepare(app, snapshot) -> dict:
+    """Warm the preloaded app, then freeze the heap (call before forking)."""
+    started = time.perf_counter()
+    computed = warm(app, snapshot)
+    _boot['warmup_ms'] = (time.perf_counter() - started) * 1000
+    _boot['preloaded'] = True
+    gc.freeze()
+    _boot['frozen_objects'] = gc.get_freeze_count()
+    # The gunicorn config disables collection while preloading so no pages
+    # are dirtied before the freeze; collect normally from here on.
+    gc.enable()
+    return dict(_boot, computed=computed)
+
+
+def record_boot(started: float) -> float:
+    """Record this worker's boot time since ``started`` (time.monotonic())."""
+    boot_ms = (time.monotonic() - started) * 1000
+    _boot['pid'] = os.getpid()
+    _boot['boot_ms'] = boot_ms
+    return boot_ms
+
+
+def boot_stats() -> dict:
+    """Preload, warm-up and boot figures of this process."""
+    return dict(_boot, pid=os.getpid())
+
+
+def snapshot_from_records(records, top=50) -> list:
+    """The most frequent calculation requests in captured traffic."""
+    counts = Counter()
+    for record in records:
+        method, path = record.route.split(' ', 1)
+        url = urlsplit(path)
+        if f'{method} {url.path}' not in _CALCULATE_ROUTES or record.operation is None:
+            continue
+        entry = dict(record.operands, operation=record.operation)
+        precision = parse_qs(url.query).get('precision')
+        if precision:
+            entry['precision'] = precision[0]
+        counts[json.dumps(entry, sort_keys=True)] += 1
+    return [json.loads(entry) for entry, _ in counts.most_common(top)]
+
+
+@click.command()
+@click.argument('captures', nargs=-1, required=True, type=click.Path(exists=True))
+@click.option('-o', '--output', required=True, type=click.Path(),
+              help='Snapshot file to write.')
+@click.option('--top', default=50, type=int, help='Number of requests to keep.')
+def main(captures, output, top):
+    """Build a warm-up snapshot from traffic captures."""
+    from replay import load_records
+    requests = snapshot_from_records(load_records(captures), top)
+    with open(output, 'w', encoding='utf-8') as fh:
+        json.dump({'requests': requests}, fh, indent=2)
+    click.echo(f"Wrote {len(requests)} warm-up requests to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,27 +2,241 @@
 Flask Web Application for Calculator.
 """
 
-from flask import Flask, render_template, request, jsonify, session
-from calculator import Calculator
+from flask import (Flask, Response, render_template, request, jsonify, session,
+                   abort, g, stream_with_context)
+from singleflight import SingleFlight, RedisFlightBackend, CoalescingCalculator
+from static_assets import AssetStore
+from runtime_diagnostics import RuntimeDiagnostics
+from bigint import RESULT_FORMATS, represent
+from jobs import JobManager, JobQueueFull, RedisJobStore, JOB_OPERATIONS
+from traffic_capture import CaptureWriter, install_capture
+import history_service
+import numeric
+import ops
+import sequences
+import tracing
+import warmup
+from tracing import span
+import json
+import hmac
+import itertools
+import math
 import os
+import secrets
 
 
 app = Flask(__name__)
 app.secret_key = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
 
 
-def get_calculator():
+def create_flight():
+    """Create the single-flight layer, shared across processes if configured."""
+    redis_url = os.environ.get('SINGLEFLIGHT_REDIS_URL')
+    if redis_url:
+        return SingleFlight(backend=RedisFlightBackend.from_url(redis_url))
+    return SingleFlight()
+
+
+flight = create_flight()
+
+BINARY_OPERATIONS = ('add', 'subtract', 'multiply', 'divide', 'power', 'modulo',
+                     'percentage')
+
+# Spans for every Calculator operation when a trace is being sampled.
+TracedCalculator = tracing.instrument_class(
+    CoalescingCalculator,
+    ('add', 'subtract', 'multiply', 'divide', 'power', 'square_root',
+     'percentage', 'factorial', 'modulo'),
+    prefix='calculator',
+)
+
+
+def create_tracer():
+    """Create the tracer with a ring buffer and an optional JSON-lines file."""
+    buffer_size = int(os.environ.get('TRACE_BUFFER_SIZE', 2048))
+    exporters = [tracing.RingBufferExporter(buffer_size)]
+    export_path = os.environ.get('TRACE_EXPORT_PATH')
+    if export_path:
+        exporters.append(tracing.JsonLinesExporter(export_path))
+    # Clients can force sampling with a traceparent flag; cap how often
+    # (per worker, in traces per second; empty for no cap).
+    incoming_limit = os.environ.get('TRACE_INCOMING_LIMIT', '10')
+    return tracing.Tracer(
+        exporters,
+        sample_rate=float(os.environ.get('TRACE_SAMPLE_RATE', 0.01)),
+        incoming_limit=float(incoming_limit) if incoming_limit else None,
+    )
+
+
+tracer = create_tracer()
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATIC_DIRECTORIES = {
+    '/public': os.path.join(PROJECT_ROOT, 'public'),
+    '/frontend': os.path.join(PROJECT_ROOT, 'frontend', 'public'),
+}
+
+
+def create_asset_store():
+    """Render the page once and load static assets into memory, precompressed."""
+    store = AssetStore(max_age=int(os.environ.get('STATIC_MAX_AGE', 31536000)))
+    with app.app_context():
+        store.add('/', render_template('index.html'), 'text/html')
+    for url_prefix, directory in STATIC_DIRECTORIES.items():
+        if os.path.isdir(directory):
+            store.add_directory(url_prefix, directory)
+    return store
+
+
+assets = create_asset_store()
+
+
+def create_job_manager():
+    """Create the job manager, sharing job state through Redis if configured.
+
+    Without a shared store a job is only visible to the worker that accepted
+    it, so the jobs API stays disabled when gunicorn runs several workers
+    (JOBS_REQUIRE_SHARED_STORE, set by gunicorn_conf.py).
+    """
+    redis_url = os.environ.get('JOBS_REDIS_URL')
+    store = RedisJobStore.from_url(redis_url) if redis_url else None
+    if store is None and os.environ.get('JOBS_REQUIRE_SHARED_STORE') == '1':
+        app.logger.warning("Jobs API disabled: several workers and no JOBS_REDIS_URL")
+        return None
+    return JobManager(
+        max_workers=int(os.environ.get('JOBS_MAX_WORKERS', 2)),
+        max_pending=int(os.environ.get('JOBS_MAX_PENDING', 32)),
+        timeout=float(os.environ.get('JOBS_TIMEOUT', 300)),
+        result_ttl=float(os.environ.get('JOBS_RESULT_TTL', 600)),
+        store=store,
+    )
+
+
+jobs = create_job_manager()
+
+MAX_SERIES_LENGTH = int(os.environ.get('MAX_SERIES_LENGTH', 1000000))
+SERIES_CHUNK_SIZE = 256
+
+# Opt-in capture of /api/* traffic for replay (see replay.py).
+TRAFFIC_CAPTURE_DIR = os.environ.get('TRAFFIC_CAPTURE_DIR')
+if TRAFFIC_CAPTURE_DIR:
+    install_capture(app, CaptureWriter(
+        TRAFFIC_CAPTURE_DIR,
+        max_bytes=int(os.environ.get('TRAFFIC_CAPTURE_MAX_BYTES', 64 * 1024 * 1024)),
+    ))
+
+
+def create_history_service():
+    """Shard session histories across HISTORY_NODES, if configured.
+
+    Without HISTORY_NODES the history stays in the session cookie.
+    """
+    nodes = [node.strip() for node in os.environ.get('HISTORY_NODES', '').split(',')
+             if node.strip()]
+    if not nodes:
+        return None
+    return history_service.connect(
+        nodes,
+        replication=int(os.environ.get('HISTORY_REPLICATION', 2)),
+        pool_size=int(os.environ.get('HISTORY_POOL_SIZE', 8)),
+        timeout=float(os.environ.get('HISTORY_TIMEOUT', 2.0)),
+    )
+
+
+history = create_history_service()
+
+# /debug/runtime is disabled unless a token is configured.
+DEBUG_RUNTIME_TOKEN = os.environ.get('DEBUG_RUNTIME_TOKEN')
+diagnostics = RuntimeDiagnostics()
+if DEBUG_RUNTIME_TOKEN:
+    diagnostics.enable()
+
+
+@app.before_request
+def start_request_trace():
+    """Open the root span, continuing any incoming traceparent."""
+    root = tracer.start_trace(f'{request.method} {request.path}',
+                              request.headers.get('traceparent'))
+    if root is not tracing.NOOP_SPAN:
+        root.__enter__()
+        root.set_attribute('http.route', request.path)
+        g.trace_root = root
+
+
+@app.after_request
+def tag_request_trace(response):
+    """Record the status and return the trace context to the client."""
+    root = g.get('trace_root')
+    if root is not None:
+        root.set_attribute('http.status_code', response.status_code)
+        response.headers['traceparent'] = root.traceparent
+    return response
+
+
+@app.teardown_request
+def end_request_trace(error):
+    """Close the root span (after the session cookie has been written)."""
+    root = g.pop('trace_root', None)
+    if root is not None:
+        if error is not None:
+            root.__exit__(type(error), error, error.__traceback__)
+        else:
+            root.__exit__(None, None, None)
+
+
+def history_key():
+    """Key of this session's history in the history service."""
+    if 'history_id' not in session:
+        session['history_id'] = secrets.token_urlsafe(16)
+    return session['history_id']
+
+
+class SessionHistory(list):
+    """History loaded from the history service.
+
+    Remembers what this request changed, so only that is written back.
+    """
+
+    def __init__(self, entries):
+        """Wrap the loaded entries."""
+        super().__init__(entries)
+        self.recorded = []
+        self.cleared = False
+
+    def append(self, entry):
+        """Record a new entry."""
+        super().append(entry)
+        self.recorded.append(entry)
+
+    def clear(self):
+        """Drop all entries, including those recorded so far."""
+        super().clear()
+        self.recorded.clear()
+        self.cleared = True
+
+
+def get_calculator(kernels=ops):
     """Get calculator instance from session."""
+    calc = TracedCalculator(flight, kernels)
+    if history is not None:
+        calc.history = SessionHistory(history.get(history_key()))
+        return calc
+
     if 'calculator_history' not in session:
         session['calculator_history'] = []
-    
-    calc = Calculator()
     calc.history = session['calculator_history']
     return calc
 
 
 def save_calculator(calc):
     """Save calculator history to session."""
+    if history is not None:
+        # Append rather than overwrite: concurrent requests on the same
+        # session each add their own entries.
+        if calc.history.cleared:
+            history.clear(history_key())
+        history.extend(history_key(), calc.history.recorded)
+        return
     session['calculator_history'] = calc.history
     session.modified = True
 
@@ -30,46 +244,57 @@ def save_calculator(calc):
 @app.route('/')
 def index():
     """Main calculator page."""
-    return render_template('index.html')
+    return assets.serve('/', request)
+
+
+@app.route('/public/<path:filename>')
+@app.route('/frontend/<path:filename>')
+def static_asset(filename):
+    """Static frontend assets served from memory."""
+    return assets.serve(request.path, request)
+
+
+def result_format():
+    """The requested ?format= for results, validated before any work is done."""
+    form = request.args.get('format', 'compact')
+    if form not in RESULT_FORMATS:
+        raise ValueError(f"Unknown result format: {form}")
+    return form
 
 
 @app.route('/api/calculate', methods=['POST'])
 def calculate():
     """API endpoint for calculations."""
     try:
-        data = request.get_json()
+        form = result_format()
+        with span('request.parse_json'):
+            data = request.get_json()
         operation = data.get('operation')
-        a = data.get('a')
-        b = data.get('b')
-        
-        calc = get_calculator()
-        
-        if operation == 'add':
-            result = calc.add(float(a), float(b))
-        elif operation == 'subtract':
-            result = calc.subtract(float(a), float(b))
-        elif operation == 'multiply':
-            result = calc.multiply(float(a), float(b))
-        elif operation == 'divide':
-            result = calc.divide(float(a), float(b))
-        elif operation == 'power':
-            result = calc.power(float(a), float(b))
-        elif operation == 'modulo':
-            result = calc.modulo(float(a), float(b))
-        elif operation == 'percentage':
-            result = calc.percentage(float(a), float(b))
-        else:
+        if operation not in BINARY_OPERATIONS:
             return jsonify({'error': 'Invalid operation'}), 400
+
+        with span('request.parse_operands'):
+            kernels, (a, b) = numeric.parse_operands(
+                (data.get('a'), data.get('b')), request.args.get('precision', 'auto'))
+
+        with span('session.load'):
+            calc = get_calculator(kernels)
+
+        result = getattr(calc, operation)(a, b)
         
-        save_calculator(calc)
+        with span('session.save'):
+            save_calculator(calc)
         
-        return jsonify({
-            'result': result,
-            'history': calc.get_history()[-5:]  # Last 5 operations
-        })
+        with span('response.serialize'):
+            return jsonify({
+                'result': represent(result, form),
+                'history': calc.get_history()[-5:]  # Last 5 operations
+            })
         
     except ValueError as e:
         return jsonify({'error': str(e)}), 400
+    except history_service.HistoryUnavailable:
+        return history_unavailable(None)
     except Exception as e:
         return jsonify({'error': 'Calculation error'}), 500
 
@@ -78,37 +303,203 @@ def calculate():
 def calculate_single():
     """API endpoint for single-value calculations."""
     try:
-        data = request.get_json()
+        form = result_format()
+        with span('request.parse_json'):
+            data = request.get_json()
         operation = data.get('operation')
         value = data.get('value')
         
-        calc = get_calculator()
+        with span('session.load'):
+            calc = get_calculator()
         
         if operation == 'sqrt':
-            result = calc.square_root(float(value))
+            kernels, (value,) = numeric.parse_operands(
+                (value,), request.args.get('precision', 'auto'))
+            calc.kernels = kernels
+            result = calc.square_root(value)
         elif operation == 'factorial':
+            calc.kernels = numeric.INT_KERNELS
             result = calc.factorial(int(value))
         else:
             return jsonify({'error': 'Invalid operation'}), 400
         
-        save_calculator(calc)
+        with span('session.save'):
+            save_calculator(calc)
         
-        return jsonify({
-            'result': result,
-            'history': calc.get_history()[-5:]
-        })
+        with span('response.serialize'):
+            return jsonify({
+                'result': represent(result, form),
+                'history': calc.get_history()[-5:]
+            })
         
     except ValueError as e:
         return jsonify({'error': str(e)}), 400
+    except history_service.HistoryUnavailable:
+        return history_unavailable(None)
     except Exception as e:
         return jsonify({'error': 'Calculation error'}), 500
 
 
+def jobs_unavailable():
+    """503 for the jobs API when no shared job store is configured."""
+    return jsonify({'error': 'Jobs require JOBS_REDIS_URL with several workers'}), 503
+
+
+@app.route('/api/jobs', methods=['POST'])
+def submit_job():
+    """Queue a long-running calculation and return its job id."""
+    if jobs is None:
+        return jobs_unavailable()
+    try:
+        data = request.get_json()
+        operation = data.get('operation')
+        precision = request.args.get('precision', 'auto')
+        if JOB_OPERATIONS.get(operation) == 2:
+            _, args = numeric.parse_operands((data.get('a'), data.get('b')), precision)
+        elif operation == 'factorial':
+            args = (int(data.get('value')),)
+        elif operation == 'sqrt':
+            _, args = numeric.parse_operands((data.get('value'),), precision)
+        else:
+            return jsonify({'error': 'Invalid operation'}), 400
+        timeout = data.get('timeout')
+        job = jobs.submit(operation, args, None if timeout is None else float(timeout))
+    except JobQueueFull as e:
+        return jsonify({'error': str(e)}), 503
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+
+    response = jsonify({'job_id': job.id, 'status': job.status})
+    response.headers['Location'] = f'/api/jobs/{job.id}'
+    return response, 202
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET', 'DELETE'])
+def job_status(job_id):
+    """Get the status and result of a job, or cancel it."""
+    try:
+        form = result_format()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if jobs is None:
+        return jobs_unavailable()
+    if request.method == 'DELETE':
+        job = jobs.cancel(job_id)
+    else:
+        job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    body = job.to_dict()
+    body['result'] = represent(job.result, form)
+    return jsonify(body)
+
+
+def check_finite(*values):
+    """Reject values JSON cannot represent (they would stream as Infinity)."""
+    if not all(math.isfinite(value) for value in values):
+        raise ValueError("Result too large")
+
+
+def series_term(compute):
+    """Compute one term up front, as a ValueError if it overflows."""
+    try:
+        term = compute()
+    except OverflowError:
+        raise ValueError("Result too large")
+    check_finite(term)
+    return term
+
+
+def build_series(data):
+    """Create the generator for a /api/series request.
+
+    Values that would overflow to infinity are refused with a ValueError.
+    Geometric and compound terms are monotonic in magnitude, so checking
+    both ends of the series covers every term; anything else that overflows
+    ends the stream with an error line.
+    """
+    kind = data.get('kind')
+    if kind in ('cumulative_sum', 'cumulative_product', 'scan'):
+        values = data.get('values', [])
+        if len(values) > MAX_SERIES_LENGTH:
+            raise ValueError(f"Series length must be between 0 and {MAX_SERIES_LENGTH}")
+        values = [float(v) for v in values]
+        check_finite(*values)
+        if kind == 'scan':
+            return sequences.scan(data.get('operation'), values)
+        return getattr(sequences, kind)(values)
+
+    length = data.get('periods', data.get('terms'))
+    if length is None or not 0 <= int(length) <= MAX_SERIES_LENGTH:
+        raise ValueError(f"Series length must be between 0 and {MAX_SERIES_LENGTH}")
+    length = int(length)
+    if kind == 'compound_growth':
+        principal, rate = float(data.get('principal')), float(data.get('rate'))
+        check_finite(principal, rate)
+        for t in (1, length) if length else ():
+            series_term(lambda: ops.multiply(principal, ops.power(ops.add(1, rate), t)))
+        return sequences.compound_growth(principal, rate, length)
+    if kind == 'geometric':
+        first, ratio = float(data.get('first')), float(data.get('ratio'))
+        check_finite(first, ratio)
+        for k in (0, length - 1) if length else ():
+            series_term(lambda: ops.multiply(first, ops.power(ratio, k)))
+        return sequences.geometric(first, ratio, length)
+    if kind == 'amortization':
+        principal = float(data.get('principal'))
+        annual_rate = float(data.get('annual_rate'))
+        check_finite(principal, annual_rate)
+        rows = sequences.amortization_schedule(
+            principal, annual_rate, length, int(data.get('periods_per_year', 12)))
+        # The first period has the largest balance, payment and interest.
+        first = next(rows)
+        check_finite(*first[1:])
+        return (row._asdict() for row in itertools.chain([first], rows))
+    raise ValueError('Invalid series')
+
+
+def is_finite_value(value) -> bool:
+    """Whether a streamed value (or amortization row) is valid JSON."""
+    fields = value.values() if isinstance(value, dict) else (value,)
+    return all(not isinstance(field, float) or math.isfinite(field) for field in fields)
+
+
+@app.route('/api/series', methods=['POST'])
+def series():
+    """Stream a lazily generated series as newline-delimited JSON."""
+    try:
+        values = build_series(request.get_json())
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+
+    def generate():
+        chunk = []
+        try:
+            for value in values:
+                if not is_finite_value(value):
+                    # e.g. a running product overflowing; never emit Infinity.
+                    raise OverflowError("Result too large")
+                chunk.append(json.dumps({'value': represent(value)}))
+                if len(chunk) >= SERIES_CHUNK_SIZE:
+                    yield '\n'.join(chunk) + '\n'
+                    chunk = []
+        except OverflowError:
+            chunk.append(json.dumps({'error': 'Result too large'}))
+        except (ArithmeticError, ValueError) as e:
+            chunk.append(json.dumps({'error': str(e)}))
+        if chunk:
+            yield '\n'.join(chunk) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
 @app.route('/api/history')
 def get_history():
     """Get calculation history."""
-    calc = get_calculator()
-    return jsonify({'history': calc.get_history()})
+    with span('session.load'):
+        calc = get_calculator()
+    with span('response.serialize'):
+        return jsonify({'history': calc.get_history()})
 
 
 @app.route('/api/clear-history', methods=['POST'])
@@ -130,6 +521,66 @@ def health_check():
     })
 
 
+@app.route('/api/metrics')
+def metrics():
+    """Runtime metrics for monitoring."""
+    stats = {
+        'singleflight': flight.get_stats(),
+        'jobs': jobs.get_stats() if jobs is not None else None,
+        'worker': warmup.boot_stats(),
+    }
+    if history is not None:
+        stats['history'] = history.get_stats()
+    return jsonify(stats)
+
+
+def check_debug_token():
+    """Return an error response unless the request carries the debug token."""
+    if not DEBUG_RUNTIME_TOKEN:
+        abort(404)
+    token = request.headers.get('X-Debug-Token', '')
+    if not hmac.compare_digest(token, DEBUG_RUNTIME_TOKEN):
+        return jsonify({'error': 'Forbidden'}), 403
+    return None
+
+
+@app.route('/debug/runtime')
+def debug_runtime():
+    """Memory, GC and allocation diagnostics (requires X-Debug-Token).
+
+    Query parameters: ``top`` limits allocation sites (default 10) and
+    ``tracemalloc=start|stop`` toggles allocation tracing. While tracing,
+    each call also reports the diff against the previous call's snapshot.
+    """
+    denied = check_debug_token()
+    if denied:
+        return denied
+
+    action = request.args.get('tracemalloc')
+    if action == 'start':
+        diagnostics.allocations.start()
+    elif action == 'stop':
+        diagnostics.allocations.stop()
+    top = request.args.get('top', 10, type=int)
+    return jsonify(diagnostics.report(top))
+
+
+@app.route('/debug/traces')
+def debug_traces():
+    """Recently finished spans from the ring buffer (requires X-Debug-Token)."""
+    denied = check_debug_token()
+    if denied:
+        return denied
+    buffer = tracer.exporters[0]
+    return jsonify({'spans': buffer.get_spans(request.args.get('trace_id'))})
+
+
+@app.errorhandler(history_service.HistoryUnavailable)
+def history_unavailable(error):
+    """Handle an unreachable history service."""
+    return jsonify({'error': 'History service unavailable'}), 503
+
+
 @app.errorhandler(404)
 def not_found(error):
     """Handle 404 errors."""
@@ -0,0 +1,92 @@
+"""
+Tests for big-integer result representations.
+"""
+
+import math
+import pytest
+import sys
+import os
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import bigint
+
+
+@pytest.fixture
+def unlimited_str_digits():
+    """Lift the int-to-str digit limit so expected values can use str()."""
+    previous = sys.get_int_max_str_digits()
+    sys.set_int_max_str_digits(0)
+    yield
+    sys.set_int_max_str_digits(previous)
+
+
+LARGE_VALUES = [
+    10 ** 5000,
+    10 ** 5000 - 1,
+    math.factorial(2000),
+    -(3 ** 20001),
+    2 ** 100000 + 12345,
+]
+
+
+@pytest.mark.parametrize("n", LARGE_VALUES, ids=range(len(LARGE_VALUES)))
+def test_digit_forms_match_str(n, unlimited_str_digits):
+    """Test digit count and leading/trailing digits against str()."""
+    digits = str(abs(n))
+    assert bigint.digit_count(n) == len(digits)
+    assert bigint.leading_digits(n) == digits[:10]
+    assert bigint.trailing_digits(n) == digits[-10:]
+
+
+@pytest.mark.parametrize("n", LARGE_VALUES + [0, 7, -12345], ids=range(8))
+def test_to_decimal_string(n, unlimited_str_digits):
+    """Test the divide-and-conquer converter against str()."""
+    assert bigint.to_decimal_string(n) == str(n)
+
+
+def test_to_decimal_string_beyond_str_limit():
+    """Test that full conversion works past the int-to-str digit limit."""
+    result = bigint.to_decimal_string(math.factorial(3000))
+    assert len(result) == 9131
+    assert result.startswith('4149359603')
+
+
+def test_only_small_powers_of_ten_are_cached():
+    """Test that large powers of ten are computed without entering the cache."""
+    bigint._cached_pow10.cache_clear()
+    assert bigint._pow10(bigint._POW10_CACHE_MAX_EXPONENT + 1) == 10 ** (
+        bigint._POW10_CACHE_MAX_EXPONENT + 1
+    )
+    assert bigint._cached_pow10.cache_info().currsize == 0
+    assert bigint._pow10(3) == 1000
+    assert bigint._cached_pow10.cache_info().currsize == 1
+
+
+def test_truncated_and_scientific():
+    """Test cheap forms of a large factorial."""
+    n = math.factorial(2000)
+    assert bigint.truncated(n) == '3316275092...0000000000 (5736 digits)'
+    assert bigint.scientific(n) == '3.316275092e+5735'
+    assert bigint.scientific(-(10 ** 5000)) == '-1.000000000e+5000'
+    assert bigint.to_hex(255) == '0xff'
+
+
+def test_compact_keeps_small_values():
+    """Test that short integers and floats are returned unchanged."""
+    assert bigint.compact(120) == 120
+    assert bigint.compact(10 ** 99) == 10 ** 99
+    assert bigint.compact(2.5) == 2.5
+    assert bigint.compact(10 ** 100) == '1000000000...0000000000 (101 digits)'
+
+
+def test_represent_forms():
+    """Test each requested representation."""
+    n = math.factorial(30)
+    assert bigint.represent(n) == n
+    assert bigint.represent(n, 'hex') == hex(n)
+    assert bigint.represent(n, 'scientific') == '2.652528598e+32'
+    assert bigint.represent(3.5, 'hex') == 3.5
+    with pytest.raises(ValueError):
+        bigint.represent(n, 'roman')
@@ -4,6 +4,8 @@ Unit tests for calculator module.
 
 import pytest
 import math
+import threading
+from src import ops
 from src.calculator import Calculator, add, subtract, multiply, divide
 
 
@@ -138,6 +140,12 @@ class TestCalculator:
         result = self.calc.factorial(0)
         assert result == 1
 
+    def test_factorial_large_result_history(self):
+        """Test that huge factorials are recorded in truncated form."""
+        result = self.calc.factorial(2000)
+        assert result == math.factorial(2000)
+        assert self.calc.history[-1] == "2000! = 3316275092...0000000000 (5736 digits)"
+
     def test_factorial_negative_raises_error(self):
         """Test that factorial of negative number raises ValueError."""
         with pytest.raises(ValueError, match="Factorial is not defined for negative numbers"):
@@ -221,6 +229,115 @@ class TestConvenienceFunctions:
             divide(5, 0)
 
 
+class TestOps:
+    """Test suite for the stateless ops kernels."""
+
+    def test_binary_operations(self):
+        """Test the arithmetic kernels."""
+        assert ops.add(2, 3) == 5
+        assert ops.subtract(2, 3) == -1
+        assert ops.multiply(2, 3) == 6
+        assert ops.divide(3, 2) == 1.5
+        assert ops.power(2, 10) == 1024
+        assert ops.percentage(200, 15) == 30
+        assert ops.modulo(43, 2) == 1
+
+    def test_unary_operations(self):
+        """Test the single-value kernels."""
+        assert ops.sqrt(16) == 4.0
+        assert ops.square_root(9) == 3.0
+        assert ops.factorial(5) == 120
+
+    @pytest.mark.parametrize("func,args", [
+        (ops.divide, (1, 0)),
+        (ops.modulo, (1, 0)),
+        (ops.square_root, (-1,)),
+        (ops.factorial, (-1,)),
+        (ops.factorial, (2.5,)),
+    ])
+    def test_validation_matches_calculator(self, func, args):
+        """Test that kernels raise the same errors as Calculator."""
+        with pytest.raises(ValueError) as kernel_error:
+            func(*args)
+        with pytest.raises(ValueError) as method_error:
+            getattr(Calculator(), func.__name__)(*args)
+        assert str(kernel_error.value) == str(method_error.value)
+
+    def test_convenience_functions_are_kernels(self):
+        """Test that module-level functions do not build a Calculator."""
+        assert add is ops.add
+        assert divide is ops.divide
+
+    def test_calculator_without_history(self):
+        """Test that record_history=False skips history."""
+        calc = Calculator(record_history=False)
+        assert calc.add(5, 3) == 8
+        assert calc.factorial(4) == 24
+        assert calc.get_history() == []
+
+
+class TestThreadSafeCalculator:
+    """Test suite for the thread-safe history mode."""
+
+    def test_single_thread_matches_plain_history(self):
+        """Test that one thread sees the same history as the plain mode."""
+        plain, shared = Calculator(), Calculator(thread_safe=True)
+        for calc in (plain, shared):
+            for i in range(150):
+                calc.add(i, 1)
+        assert shared.thread_safe
+        assert shared.get_history() == plain.get_history()
+
+    def test_concurrent_recording(self):
+        """Test many threads recording into one calculator."""
+        calc = Calculator(thread_safe=True)
+        threads, per_thread = 8, 500
+        start = threading.Barrier(threads)
+
+        def work(index):
+            start.wait()
+            for i in range(per_thread):
+                calc.multiply(index, i)
+
+        workers = [threading.Thread(target=work, args=(n,)) for n in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        history = calc.get_history()
+        assert len(history) == 100
+        # Merged in call order: each thread's entries stay in sequence.
+        for index in range(threads):
+            own = [int(entry.split(' ')[2]) for entry in history
+                   if entry.startswith(f"{index} * ")]
+            assert own == sorted(own)
+            assert all(i >= per_thread - 100 for i in own)
+
+    def test_clear_history_all_threads(self):
+        """Test that clearing empties every thread's buffer."""
+        calc = Calculator(thread_safe=True)
+        worker = threading.Thread(target=calc.add, args=(1, 2))
+        worker.start()
+        worker.join()
+        calc.add(3, 4)
+        assert calc.get_history() == ["1 + 2 = 3", "3 + 4 = 7"]
+        calc.clear_history()
+        assert calc.get_history() == []
+
+    def test_finished_threads_are_pruned(self):
+        """Test that dead threads' buffers are dropped but their entries kept."""
+        calc = Calculator(thread_safe=True)
+        for i in range(5):
+            worker = threading.Thread(target=calc.add, args=(i, i))
+            worker.start()
+            worker.join()
+        calc.add(10, 10)
+        assert len(calc._thread_history._buffers) == 1
+        assert calc.get_history() == [f"{i} + {i} = {2 * i}" for i in range(5)] + [
+            "10 + 10 = 20"]
+
+
 @pytest.mark.parametrize("a,b,expected", [
     (1, 2, 3),
     (0, 0, 0),
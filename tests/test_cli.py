@@ -0,0 +1,38 @@
+"""
+Tests for the calc command line.
+"""
+
+import sys
+import os
+
+from click.testing import CliRunner
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from cli import cli
+
+
+class TestSeriesCommands:
+    """Test suite for the series and schedule commands."""
+
+    def test_compound(self):
+        """Test that compound prints one balance per period."""
+        result = CliRunner().invoke(cli, ['compound', '100', '0.5', '2'])
+        assert result.exit_code == 0
+        assert result.output == "1\t150.0\n2\t225.0\n"
+
+    def test_compound_overflow(self):
+        """Test that an overflowing balance is an error, not a traceback."""
+        result = CliRunner(mix_stderr=False).invoke(
+            cli, ['compound', '1', '1e10', '50'])
+        assert result.exit_code == 0
+        assert result.stderr == "Error: Result too large\n"
+
+    def test_series_overflow(self):
+        """Test that an overflowing scan is an error, not a traceback."""
+        result = CliRunner(mix_stderr=False).invoke(
+            cli, ['series', 'power', '10', '400'])
+        assert result.exit_code == 0
+        assert result.stdout == "10.0\n"
+        assert result.stderr == "Error: Result too large\n"
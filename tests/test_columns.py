@@ -0,0 +1,172 @@
+"""
+Tests for columnar CSV evaluation.
+"""
+
+import io
+import math
+import pytest
+import sys
+import os
+
+from click.testing import CliRunner
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import columns
+from array import array
+from bigint import to_decimal_string
+from cli import cli
+
+
+CSV = "price,rate,qty\n100,15,2\n80,abc,4\n-4,2,0\n"
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    """Small CSV with a bad cell, a zero and a negative value."""
+    path = tmp_path / 'data.csv'
+    path.write_text(CSV)
+    return str(path)
+
+
+class TestParseExpression:
+    """Test suite for expression parsing."""
+
+    @pytest.mark.parametrize("text,operation,operands", [
+        ("percentage(price, rate)", 'percentage', ['price', 'rate']),
+        ("sqrt(x)", 'sqrt', ['x']),
+        ("a / b", 'divide', ['a', 'b']),
+        ("a ** 2", 'power', ['a', 2.0]),
+        ("price * -1.5", 'multiply', ['price', -1.5]),
+    ])
+    def test_valid(self, text, operation, operands):
+        """Test call and infix forms, with constants."""
+        expression = columns.parse_expression(text)
+        assert expression.operation == operation
+        assert expression.operands == operands
+
+    @pytest.mark.parametrize("text", ["foo(a)", "sqrt(a, b)", "a", "divide(a,)"])
+    def test_invalid(self, text):
+        """Test that bad expressions raise ValueError."""
+        with pytest.raises(ValueError):
+            columns.parse_expression(text)
+
+
+class TestEvaluate:
+    """Test suite for column-wise evaluation."""
+
+    def test_read_only_needed_columns(self, csv_path):
+        """Test that referenced columns are parsed into typed buffers."""
+        header, data, rows, errors = columns.read_columns(csv_path, ['qty'])
+        assert header == ['price', 'rate', 'qty']
+        assert list(data) == ['qty']
+        assert data['qty'].typecode == 'd'
+        assert list(data['qty']) == [2.0, 4.0, 0.0]
+        assert rows == 3
+        assert errors == {}
+
+    def test_errors_do_not_abort(self, csv_path):
+        """Test that bad rows are reported while the rest are computed."""
+        values, errors = columns.evaluate_csv(csv_path, 'price / qty')
+        assert values[0] == 50.0
+        assert values[1] == 20.0
+        assert math.isnan(values[2])
+        assert errors == {2: "Cannot divide by zero"}
+
+    def test_parse_errors_reported(self, csv_path):
+        """Test that unparseable cells become error rows."""
+        values, errors = columns.evaluate_csv(csv_path, 'percentage(price, rate)')
+        assert values[0] == 15.0
+        assert errors[1] == "Invalid number in column rate"
+
+    def test_sqrt_negative(self, csv_path):
+        """Test that negative square roots are reported per row."""
+        _, errors = columns.evaluate_csv(csv_path, 'sqrt(price)')
+        assert errors == {2: "Cannot calculate square root of negative number"}
+
+    def test_factorial_keeps_integers(self, csv_path):
+        """Test that factorial results stay exact integers."""
+        values, errors = columns.evaluate_csv(csv_path, 'factorial(qty)')
+        assert values == [2, 24, 1]
+        assert errors == {}
+
+    def test_unknown_column(self, csv_path):
+        """Test that missing columns are rejected."""
+        with pytest.raises(ValueError, match="Unknown column"):
+            columns.evaluate_csv(csv_path, 'sqrt(cost)')
+
+
+class TestWriters:
+    """Test suite for bulk output."""
+
+    def test_write_column(self):
+        """Test the two-column result output."""
+        out = io.StringIO()
+        columns.write_column(out, 'r', [1.5, math.nan], {1: 'a, b'})
+        assert out.getvalue() == 'r,r_error\n1.5,\n,"a, b"\n'
+
+    def test_augmented_cli(self, csv_path):
+        """Test the calc columns command writing an augmented CSV."""
+        result = CliRunner(mix_stderr=False).invoke(
+            cli, ['columns', csv_path, 'price / qty', '--augment', '--name', 'unit'])
+        assert result.exit_code == 0
+        lines = result.stdout.splitlines()
+        assert lines[0] == 'price,rate,qty,unit,unit_error'
+        assert lines[1] == '100,15,2,50.0,'
+        assert lines[3] == '-4,2,0,,Cannot divide by zero'
+        assert '1 of 3 rows failed' in result.stderr
+
+    def test_large_factorial(self, tmp_path):
+        """Test that factorials beyond str()'s digit limit are written in full."""
+        path = tmp_path / 'n.csv'
+        path.write_text("n\n2000\n")
+        result = CliRunner(mix_stderr=False).invoke(
+            cli, ['columns', str(path), 'factorial(n)', '--augment'])
+        assert result.exit_code == 0
+        row = result.stdout.splitlines()[1]
+        assert row == f'2000,{to_decimal_string(math.factorial(2000))},'
+        assert len(row) > 5000
+
+
+class TestNumpyPath:
+    """Test suite for the vectorized evaluation."""
+
+    @pytest.fixture(autouse=True)
+    def numpy(self):
+        return pytest.importorskip('numpy')
+
+    @pytest.mark.parametrize("operation,a,b,expected_errors", [
+        ('divide', [6, 1, math.nan], [3, 0, 1],
+         {1: "Cannot divide by zero", 2: "Missing operand"}),
+        ('modulo', [7, -7, 5], [3, 3, 0],
+         {2: "Cannot perform modulo with zero"}),
+        ('power', [2, 0, -8, 10], [10, -1, 0.5, 400],
+         {1: "0.0 cannot be raised to a negative power",
+          2: "Result is not a real number", 3: "Result too large"}),
+    ])
+    def test_binary_error_masks(self, operation, a, b, expected_errors):
+        """Test that each row's error and value match the ops kernels."""
+        operands = [array('d', a), array('d', b)]
+        values, errors = columns._evaluate_numpy(operation, operands)
+        expected, python_errors = columns._evaluate_python(operation, operands, len(a))
+        assert errors == expected_errors == python_errors
+        for row, value in enumerate(values):
+            if row in errors:
+                assert math.isnan(value)
+            else:
+                assert value == expected[row]
+
+    def test_sqrt_error_mask(self):
+        """Test that negative square roots are masked."""
+        values, errors = columns._evaluate_numpy('sqrt', [array('d', [16, -4, 2])])
+        assert errors == {1: "Cannot calculate square root of negative number"}
+        assert values[0] == 4.0 and math.isnan(values[1])
+        assert values[2] == pytest.approx(math.sqrt(2))
+
+    def test_evaluate_uses_numpy(self, csv_path):
+        """Test that evaluate_csv takes the vectorized path with NumPy."""
+        assert columns.np is not None
+        values, errors = columns.evaluate_csv(csv_path, 'price / qty')
+        assert list(values[:2]) == [50.0, 20.0]
+        assert errors == {2: "Cannot divide by zero"}
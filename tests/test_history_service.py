@@ -0,0 +1,346 @@
+"""
+Tests for the sharded history service.
+"""
+
+import pytest
+import sys
+import os
+import threading
+
+from click.testing import CliRunner
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import history_service
+from history_service import (HashRing, HistoryClient, HistoryServer, HistoryUnavailable,
+                             LocalClient, LocalHistoryStore, ShardedHistory)
+import web_app
+
+
+@pytest.fixture
+def servers():
+    """Three local history nodes."""
+    nodes = [HistoryServer().start() for _ in range(3)]
+    yield nodes
+    for node in nodes:
+        node.stop()
+
+
+class TestHashRing:
+    """Test suite for consistent hashing."""
+
+    def test_distinct_replicas(self):
+        """Test that replicas are distinct nodes."""
+        ring = HashRing(['a', 'b', 'c'])
+        for i in range(50):
+            replicas = ring.nodes_for(f'session-{i}', 2)
+            assert len(set(replicas)) == 2
+        assert len(ring.nodes_for('x', 5)) == 3
+        assert HashRing().nodes_for('x', 2) == []
+
+    def test_join_moves_few_keys(self):
+        """Test that adding a node only remaps keys onto that node."""
+        keys = [f'session-{i}' for i in range(1000)]
+        ring = HashRing(['a', 'b', 'c'])
+        before = {key: ring.nodes_for(key)[0] for key in keys}
+        ring.add('d')
+        after = {key: ring.nodes_for(key)[0] for key in keys}
+        moved = [key for key in keys if before[key] != after[key]]
+        assert all(after[key] == 'd' for key in moved)
+        assert 100 < len(moved) < 450
+
+    def test_remove(self):
+        """Test that a removed node no longer owns keys."""
+        ring = HashRing(['a', 'b'])
+        ring.remove('a')
+        assert ring.nodes_for('anything', 2) == ['b']
+
+
+class TestLocalHistoryStore:
+    """Test suite for the in-memory store."""
+
+    def test_commands(self):
+        """Test the protocol commands."""
+        store = LocalHistoryStore()
+        store.execute({'op': 'set', 'key': 's', 'entries': ['1 + 1 = 2']})
+        for i in range(5):
+            store.execute({'op': 'append', 'key': 's', 'entry': str(i), 'limit': 3})
+        assert store.execute({'op': 'get', 'key': 's'}) == ['2', '3', '4']
+        assert store.execute({'op': 'keys'}) == ['s']
+        store.execute({'op': 'delete', 'key': 's'})
+        assert store.get('s') == []
+        with pytest.raises(ValueError, match="Unknown command"):
+            store.execute({'op': 'flush'})
+
+    def test_versions(self):
+        """Test that writes bump the version and copies only apply if newer."""
+        store = LocalHistoryStore()
+        assert store.read('s') == [0, []]
+        store.append('s', 'a')
+        store.append('s', 'b')
+        assert store.read('s') == [2, ['a', 'b']]
+        assert not store.set('s', ['old'], version=1)
+        assert store.set('s', ['new'], version=5)
+        store.clear('s')
+        assert store.read('s') == [6, []]
+        assert store.keys() == ['s']
+        assert not store.set('s', ['stale'], version=5)
+
+
+class TestHistoryClient:
+    """Test suite for the TCP client and server."""
+
+    def test_pipeline_and_pooling(self, servers):
+        """Test pipelined commands reuse one pooled connection."""
+        client = HistoryClient(servers[0].address)
+        values = client.pipeline([
+            {'op': 'append', 'key': 's', 'entry': 'a'},
+            {'op': 'append', 'key': 's', 'entry': 'b'},
+            {'op': 'get', 'key': 's'},
+        ])
+        assert values == [None, None, ['a', 'b']]
+        assert client.execute({'op': 'keys'}) == ['s']
+        assert client.get_stats() == {'connects': 1, 'idle': 1}
+        client.close()
+
+    def test_server_error(self, servers):
+        """Test that a rejected command raises ValueError."""
+        client = HistoryClient(servers[0].address)
+        with pytest.raises(ValueError, match="Unknown command"):
+            client.execute({'op': 'flush'})
+        assert client.execute({'op': 'keys'}) == []
+
+    def test_unreachable(self, servers):
+        """Test that a stopped node raises a connection error."""
+        address = servers[0].address
+        servers[0].stop()
+        servers[0] = HistoryServer().start()
+        with pytest.raises(OSError):
+            HistoryClient(address, timeout=0.5).execute({'op': 'keys'})
+
+
+class TestShardedHistory:
+    """Test suite for replicated, sharded histories."""
+
+    def test_replication(self, servers):
+        """Test that each session is stored on exactly two nodes."""
+        sharded = history_service.connect([s.address for s in servers], replication=2)
+        for i in range(20):
+            sharded.append(f'session-{i}', f'{i} + 0 = {i}')
+        for i in range(20):
+            key = f'session-{i}'
+            holders = [s.address for s in servers if key in s.store.keys()]
+            assert sorted(holders) == sorted(sharded.replicas(key))
+            assert sharded.get(key) == [f'{i} + 0 = {i}']
+
+    def test_failover(self, servers):
+        """Test that reads fall back to a surviving replica."""
+        sharded = history_service.connect([s.address for s in servers],
+                                          replication=2, timeout=0.5)
+        sharded.set('session', ['1 + 2 = 3'])
+        primary = sharded.replicas('session')[0]
+        next(s for s in servers if s.address == primary).stop()
+        assert sharded.get('session') == ['1 + 2 = 3']
+        sharded.clear('session')
+        assert sharded.get('session') == []
+
+    def test_all_replicas_down(self):
+        """Test that losing every replica raises HistoryUnavailable."""
+        server = HistoryServer().start()
+        sharded = history_service.connect([server.address], replication=1, timeout=0.5)
+        server.stop()
+        with pytest.raises(HistoryUnavailable):
+            sharded.get('session')
+        with pytest.raises(HistoryUnavailable):
+            sharded.set('session', [])
+
+    def test_node_error_drains_other_replicas(self, servers, monkeypatch):
+        """Test that a node error is HistoryUnavailable once all replies are read."""
+        sharded = history_service.connect([s.address for s in servers[:2]],
+                                          replication=2, timeout=0.5)
+        sharded.set('session', ['1 + 2 = 3'])
+        primary, secondary = sharded.replicas('session')
+
+        def fail(command):
+            raise ValueError("disk full")
+
+        store = next(s for s in servers if s.address == primary).store
+        monkeypatch.setattr(store, 'execute', fail)
+        with pytest.raises(HistoryUnavailable):
+            sharded.get('session')
+        assert sharded.clients[secondary].get_stats()['idle'] == 1
+        assert sharded.clients[primary].get_stats()['idle'] == 1
+
+    def test_set_truncates(self):
+        """Test that stored histories are capped at the limit."""
+        sharded = ShardedHistory({'a': LocalClient()}, replication=1, limit=3)
+        sharded.set('s', [str(i) for i in range(10)])
+        assert sharded.get('s') == ['7', '8', '9']
+
+    def test_stale_replica_repaired(self):
+        """Test that reads return the newest copy and repair older ones."""
+        stores = {name: LocalHistoryStore() for name in 'ab'}
+        sharded = ShardedHistory({name: LocalClient(store)
+                                  for name, store in stores.items()}, replication=2)
+        sharded.extend('s', ['1 + 1 = 2', '2 + 2 = 4'])
+        # The primary missed the last write (e.g. it was briefly down).
+        primary, secondary = (stores[name] for name in sharded.replicas('s'))
+        secondary.append('s', '3 + 3 = 6')
+        assert sharded.get('s') == ['1 + 1 = 2', '2 + 2 = 4', '3 + 3 = 6']
+        assert primary.read('s') == secondary.read('s') == [3, sharded.get('s')]
+
+    def test_writes_overlap_replicas(self):
+        """Test that a write is sent to every replica before awaiting any."""
+        events = []
+
+        class RecordingClient(LocalClient):
+            def __init__(self, name):
+                super().__init__()
+                self.name = name
+
+            def send(self, commands):
+                events.append(('send', self.name, len(commands)))
+                receive = super().send(commands)
+
+                def recorded():
+                    events.append(('receive', self.name))
+                    return receive()
+                return recorded
+
+        sharded = ShardedHistory({name: RecordingClient(name) for name in 'ab'})
+        sharded.extend('s', ['a', 'b', 'c'])
+        assert [event[0] for event in events] == ['send', 'send', 'receive', 'receive']
+        assert all(event[2] == 3 for event in events[:2])
+        assert sharded.get('s') == ['a', 'b', 'c']
+
+    def test_new_ring_reads_old_replicas(self):
+        """Test that a node joined without copying is filled by read-repair."""
+        stores = {name: LocalHistoryStore() for name in 'abcd'}
+        old = ShardedHistory({name: LocalClient(stores[name]) for name in 'abc'})
+        keys = [f'session-{i}' for i in range(50)]
+        for key in keys:
+            old.append(key, key)
+        new = ShardedHistory({name: LocalClient(store)
+                              for name, store in stores.items()})
+        moved = [key for key in keys if 'd' in new.replicas(key)]
+        assert moved
+        for key in keys:
+            assert new.get(key) == [key]
+        assert sorted(stores['d'].keys()) == sorted(moved)
+
+    def test_rebalance_on_join(self):
+        """Test that a joining node receives the sessions it now owns."""
+        stores = {name: LocalHistoryStore() for name in 'abc'}
+        sharded = ShardedHistory({name: LocalClient(store)
+                                  for name, store in stores.items()}, replication=2)
+        keys = [f'session-{i}' for i in range(200)]
+        for key in keys:
+            sharded.set(key, [key])
+
+        stores['d'] = LocalHistoryStore()
+        moved = sharded.add_node('d', LocalClient(stores['d']))
+        # A rerun copies nothing new.
+        rerun = ShardedHistory({name: LocalClient(stores[name]) for name in 'abc'})
+        assert rerun.add_node('d', LocalClient(stores['d'])) == 0
+        assert moved == len(stores['d'].keys()) > 0
+        for key in keys:
+            assert sharded.get(key) == [key]
+            holders = sorted(name for name, store in stores.items()
+                             if key in store.keys())
+            assert holders == sorted(sharded.replicas(key))
+
+
+def test_rebalance_command(servers):
+    """Test the operator command that joins a node to live history nodes."""
+    old, joining = [s.address for s in servers[:2]], servers[2]
+    sharded = history_service.connect(old)
+    keys = [f'session-{i}' for i in range(40)]
+    for key in keys:
+        sharded.append(key, key)
+
+    runner = CliRunner()
+    args = ['rebalance', '--nodes', ','.join(old), '--add', joining.address]
+    result = runner.invoke(history_service.main, args)
+    assert result.exit_code == 0, result.output
+    copied = len(joining.store.keys())
+    assert f"Copied {copied} sessions" in result.output and copied > 0
+    assert "--prune" in result.output
+
+    result = runner.invoke(history_service.main, args + ['--prune'])
+    assert result.exit_code == 0, result.output
+    new = history_service.connect(old + [joining.address])
+    for key in keys:
+        holders = sorted(s.address for s in servers if key in s.store.keys())
+        assert holders == sorted(new.replicas(key))
+        assert new.get(key) == [key]
+
+
+class TestWebAppIntegration:
+    """Test suite for web_app with sharded history."""
+
+    def test_history_across_replicas(self, servers, monkeypatch):
+        """Test that two app replicas share a session's history."""
+        sharded = history_service.connect([s.address for s in servers])
+        monkeypatch.setattr(web_app, 'history', sharded)
+        web_app.app.config['TESTING'] = True
+        with web_app.app.test_client() as client:
+            client.post('/api/calculate', json={'operation': 'add', 'a': 1, 'b': 2})
+            response = client.post('/api/calculate-single',
+                                   json={'operation': 'factorial', 'value': 4})
+            assert response.get_json()['history'] == ['1 + 2 = 3', '4! = 24']
+            with client.session_transaction() as session:
+                key = session['history_id']
+                assert 'calculator_history' not in session
+
+        # A different replica only needs the history id from the cookie.
+        other = history_service.connect([s.address for s in servers])
+        assert other.get(key) == ['1 + 2 = 3', '4! = 24']
+
+        with web_app.app.test_client() as client:
+            with client.session_transaction() as session:
+                session['history_id'] = key
+            assert client.get('/api/history').get_json()['history'] == \
+                ['1 + 2 = 3', '4! = 24']
+            client.post('/api/clear-history')
+        assert other.get(key) == []
+        assert 'history' in client.get('/api/metrics').get_json()
+
+    def test_concurrent_requests_keep_all_entries(self, monkeypatch):
+        """Test that concurrent requests on one session lose no entries."""
+        stores = [LocalHistoryStore() for _ in range(2)]
+        monkeypatch.setattr(web_app, 'history', ShardedHistory(
+            {str(i): LocalClient(store) for i, store in enumerate(stores)}))
+        threads, per_thread = 4, 10
+        start = threading.Barrier(threads)
+
+        def work(index):
+            with web_app.app.test_client() as client:
+                with client.session_transaction() as session:
+                    session['history_id'] = 'shared'
+                start.wait()
+                for i in range(per_thread):
+                    client.post('/api/calculate',
+                                json={'operation': 'add', 'a': index, 'b': i})
+
+        workers = [threading.Thread(target=work, args=(n,)) for n in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        entries = web_app.history.get('shared')
+        assert len(entries) == threads * per_thread
+        assert sorted(entries) == sorted(f"{n} + {i} = {n + i}" for n in range(threads)
+                                         for i in range(per_thread))
+
+    def test_history_unavailable(self, monkeypatch):
+        """Test that an unreachable history service returns 503."""
+        server = HistoryServer().start()
+        sharded = history_service.connect([server.address], timeout=0.5)
+        server.stop()
+        monkeypatch.setattr(web_app, 'history', sharded)
+        with web_app.app.test_client() as client:
+            response = client.post('/api/calculate',
+                                   json={'operation': 'add', 'a': 1, 'b': 2})
+            assert response.status_code == 503
+            assert client.get('/api/history').status_code == 503
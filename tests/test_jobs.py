@@ -0,0 +1,282 @@
+"""
+Tests for asynchronous calculation jobs.
+"""
+
+import pytest
+import sys
+import os
+import time
+from concurrent.futures import Future
+from decimal import Decimal
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import jobs
+from jobs import (
+    MAX_FACTORIAL_OPERAND, JobManager, JobQueueFull, RedisJobStore, execute,
+)
+
+
+class ManualExecutor:
+    """Executor whose futures are completed by the test."""
+
+    def __init__(self, max_workers=None):
+        self.futures = []
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.call = (fn, args)
+        self.futures.append(future)
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def manager(clock):
+    executors = []
+
+    def factory(max_workers):
+        executors.append(ManualExecutor(max_workers))
+        return executors[-1]
+
+    manager = JobManager(max_pending=2, timeout=10, result_ttl=60,
+                         executor_factory=factory, clock=clock)
+    manager.executors = executors
+    return manager
+
+
+class FakeRedis:
+    """Minimal in-memory stand-in for the redis client calls the store uses."""
+
+    def __init__(self):
+        self.data = {}
+
+    def set(self, key, value, nx=False, px=None):
+        if nx and key in self.data:
+            return False
+        self.data[key] = value.encode('utf-8') if isinstance(value, str) else value
+        return True
+
+    def get(self, key):
+        return self.data.get(key)
+
+
+@pytest.fixture
+def workers(clock):
+    """Two managers, as in two gunicorn workers, sharing one Redis."""
+    redis = FakeRedis()
+    managers = []
+    for _ in range(2):
+        executors = []
+
+        def factory(max_workers, executors=executors):
+            executors.append(ManualExecutor(max_workers))
+            return executors[-1]
+
+        manager = JobManager(timeout=10, result_ttl=60, executor_factory=factory,
+                             clock=clock, store=RedisJobStore(redis, clock=clock))
+        manager.executors = executors
+        managers.append(manager)
+    return managers
+
+
+def complete(manager, index):
+    """Run the index-th submitted call and resolve its future."""
+    future = manager.executors[0].futures[index]
+    fn, args = future.call
+    future.set_running_or_notify_cancel()
+    try:
+        future.set_result(fn(*args))
+    except ValueError as e:
+        future.set_exception(e)
+
+
+class TestJobManager:
+    """Test suite for JobManager."""
+
+    def test_job_lifecycle(self, manager):
+        """Test a job from queued to succeeded."""
+        job = manager.submit('factorial', (5,))
+        assert manager.get(job.id).status == 'queued'
+        complete(manager, 0)
+        job = manager.get(job.id)
+        assert job.status == 'succeeded'
+        assert job.result == 120
+
+    def test_failed_job_reports_error(self, manager):
+        """Test that validation errors become failed jobs."""
+        job = manager.submit('divide', (1.0, 0.0))
+        complete(manager, 0)
+        job = manager.get(job.id)
+        assert job.status == 'failed'
+        assert job.error == 'Cannot divide by zero'
+
+    def test_invalid_operation(self, manager):
+        """Test that unknown operations and arities are rejected."""
+        with pytest.raises(ValueError):
+            manager.submit('factorial', (1, 2))
+        with pytest.raises(ValueError):
+            manager.submit('__import__', ('os',))
+
+    def test_queue_is_bounded(self, manager):
+        """Test that submissions beyond max_pending are refused."""
+        manager.submit('factorial', (5,))
+        manager.submit('factorial', (6,))
+        with pytest.raises(JobQueueFull):
+            manager.submit('factorial', (7,))
+        complete(manager, 0)
+        manager.submit('factorial', (7,))
+
+    def test_cancel(self, manager):
+        """Test that a queued job can be cancelled."""
+        job = manager.submit('factorial', (5,))
+        assert manager.cancel(job.id).status == 'cancelled'
+        assert manager.executors[0].futures[0].cancelled()
+
+    def test_deadline(self, manager, clock):
+        """Test that jobs past their deadline time out."""
+        job = manager.submit('factorial', (5,), timeout=1)
+        clock.now = 2
+        job = manager.get(job.id)
+        assert job.status == 'timed_out'
+
+    def test_running_job_timeout_replaces_pool(self, manager, clock):
+        """Test that timing out a running job requeues the others on a new pool."""
+        slow = manager.submit('factorial', (5,), timeout=1)
+        quick = manager.submit('add', (1, 2))
+        manager.executors[0].futures[0].set_running_or_notify_cancel()
+        clock.now = 2
+        assert manager.get(slow.id).status == 'timed_out'
+        assert len(manager.executors) == 2
+        assert manager.get(quick.id).status == 'queued'
+        future = manager.executors[1].futures[0]
+        fn, args = future.call
+        future.set_result(fn(*args))
+        assert manager.get(quick.id).result == 3
+
+    def test_operand_bounds(self, manager):
+        """Test that oversized job operands are rejected."""
+        with pytest.raises(ValueError):
+            manager.submit('factorial', (MAX_FACTORIAL_OPERAND + 1,))
+        with pytest.raises(ValueError):
+            manager.submit('multiply', (1 << (1 << 21), 2))
+
+    def test_result_ttl_eviction(self, manager, clock):
+        """Test that finished jobs are evicted after the result TTL."""
+        job = manager.submit('factorial', (5,))
+        complete(manager, 0)
+        assert manager.get(job.id).status == 'succeeded'
+        clock.now = 61
+        assert manager.get(job.id) is None
+
+    def test_process_pool(self):
+        """Test running a job on a real worker process."""
+        manager = JobManager(max_workers=1)
+        try:
+            job = manager.submit('power', (2, 100))
+            deadline = time.monotonic() + 30
+            while manager.get(job.id).status not in ('succeeded', 'failed'):
+                assert time.monotonic() < deadline
+                time.sleep(0.01)
+            assert manager.get(job.id).result == 2 ** 100
+        finally:
+            manager.shutdown()
+
+    def test_timed_out_job_does_not_delay_the_next(self, monkeypatch):
+        """Test that a timed-out running job stops occupying the worker."""
+        # A calculation of several seconds, beyond the production bound.
+        monkeypatch.setattr(jobs, 'MAX_FACTORIAL_OPERAND', 3_000_000)
+        manager = JobManager(max_workers=1, timeout=0.5)
+        try:
+            slow = manager.submit('factorial', (3_000_000,))
+            quick = manager.submit('add', (1, 2), timeout=0.5)
+            deadline = time.monotonic() + 0.4
+            while manager.get(slow.id).status != 'running':
+                assert time.monotonic() < deadline
+                time.sleep(0.001)
+            manager.cancel(slow.id)
+            deadline = time.monotonic() + 0.4
+            while manager.get(quick.id).status != 'succeeded':
+                assert manager.get(quick.id).status in ('queued', 'running')
+                assert time.monotonic() < deadline
+                time.sleep(0.01)
+            slow = manager.submit('factorial', (3_000_000,), timeout=0.2)
+            time.sleep(0.3)
+            assert manager.get(slow.id).status == 'timed_out'
+            job = manager.submit('add', (2, 3), timeout=0.5)
+            deadline = time.monotonic() + 0.4
+            while manager.get(job.id).status != 'succeeded':
+                assert time.monotonic() < deadline
+                time.sleep(0.01)
+        finally:
+            manager.shutdown()
+
+
+class TestSharedJobs:
+    """Test suite for job state shared across workers."""
+
+    def test_poll_from_another_worker(self, workers):
+        """Test that a job submitted on one worker is visible on another."""
+        first, second = workers
+        job = first.submit('power', (2, 100))
+        assert second.get(job.id).status == 'queued'
+        complete(first, 0)
+        polled = second.get(job.id)
+        assert polled.status == 'succeeded'
+        assert polled.result == 2 ** 100
+        job = first.submit('add', (Decimal('0.1'), Decimal('0.2')))
+        complete(first, 1)
+        assert second.get(job.id).result == Decimal('0.3')
+        assert second.get('unknown') is None
+
+    def test_failure_from_another_worker(self, workers):
+        """Test that a failed job's error is shared."""
+        first, second = workers
+        job = first.submit('divide', (1, 0))
+        complete(first, 0)
+        polled = second.get(job.id)
+        assert polled.status == 'failed'
+        assert 'divide by zero' in polled.error
+
+    def test_cancel_from_another_worker(self, workers):
+        """Test that a cancel on another worker discards the result."""
+        first, second = workers
+        job = first.submit('factorial', (5,))
+        assert second.cancel(job.id).status == 'cancelled'
+        complete(first, 0)
+        assert first.get(job.id).status == 'cancelled'
+        assert second.get(job.id).status == 'cancelled'
+        assert second.cancel('unknown') is None
+
+    def test_deadline_from_another_worker(self, workers, clock):
+        """Test that a job past its deadline times out for every worker."""
+        first, second = workers
+        job = first.submit('factorial', (5,))
+        clock.now = 11
+        assert second.get(job.id).status == 'timed_out'
+        assert first.get(job.id).status == 'timed_out'
+
+
+def test_execute():
+    """Test the worker entry point."""
+    assert execute('sqrt', (16,)) == 4.0
+    assert execute('multiply', (2 ** 60, 2 ** 60)) == 2 ** 120
+    assert execute('add', (Decimal('0.1'), Decimal('0.2'))) == Decimal('0.3')
@@ -0,0 +1,152 @@
+"""
+Tests for typed operand parsing and kernels.
+"""
+
+import pytest
+import sys
+import os
+from decimal import Decimal
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import loadtest
+import numeric
+import ops
+from calculator import Calculator
+from numeric import DECIMAL_KERNELS, INT_KERNELS, parse_operand, parse_operands
+
+
+class TestParsing:
+    """Test suite for operand parsing."""
+
+    @pytest.mark.parametrize("value,precision,expected,kind", [
+        (7, 'auto', 7, int),
+        (2.5, 'auto', 2.5, float),
+        (' 12 ', 'auto', 12, int),
+        ('1e3', 'auto', 1000.0, float),
+        (7, 'float', 7.0, float),
+        ('7', 'float', 7.0, float),
+        (0.1, 'decimal', Decimal('0.1'), Decimal),
+        (2 ** 70, 'decimal', Decimal(2 ** 70), Decimal),
+        ('1.50', 'decimal', Decimal('1.50'), Decimal),
+    ])
+    def test_parse_operand(self, value, precision, expected, kind):
+        """Test that operands keep their JSON type in each mode."""
+        parsed = parse_operand(value, precision)
+        assert parsed == expected
+        assert type(parsed) is kind
+
+    @pytest.mark.parametrize("value,precision", [
+        (None, 'auto'), (True, 'auto'), ([1], 'auto'), ('abc', 'auto'),
+        ('abc', 'decimal'), ('NaN', 'decimal'), (1, 'exact'),
+    ])
+    def test_invalid(self, value, precision):
+        """Test that bad operands and modes raise ValueError."""
+        with pytest.raises(ValueError):
+            parse_operand(value, precision)
+
+    def test_kernel_selection(self):
+        """Test which kernel set each operand mix is routed to."""
+        assert parse_operands((1, 2)) == (INT_KERNELS, (1, 2))
+        kernels, operands = parse_operands((1, 2.5))
+        assert kernels is numeric.ops and operands == (1.0, 2.5)
+        assert type(operands[0]) is float
+        assert parse_operands((1, 2), 'float')[0] is numeric.ops
+        assert parse_operands((1, 2), 'decimal')[0] is DECIMAL_KERNELS
+
+    def test_kernels_for(self):
+        """Test kernel selection from already parsed operands."""
+        assert numeric.kernels_for((1, 2)) is INT_KERNELS
+        assert numeric.kernels_for((1, 2.0)) is numeric.ops
+        assert numeric.kernels_for((Decimal(1), 2)) is DECIMAL_KERNELS
+
+
+class TestIntKernels:
+    """Test suite for the exact integer kernels."""
+
+    def test_exact_above_float_precision(self):
+        """Test that large integers stay exact."""
+        big = 2 ** 53 + 1
+        assert INT_KERNELS.add(big, 1) == 2 ** 53 + 2
+        assert INT_KERNELS.multiply(big, big) == big * big
+        assert INT_KERNELS.power(3, 40) == 3 ** 40
+
+    def test_divide(self):
+        """Test that integral quotients stay int and others become float."""
+        assert INT_KERNELS.divide(10 ** 30, 10 ** 10) == 10 ** 20
+        assert type(INT_KERNELS.divide(10, 2)) is int
+        assert INT_KERNELS.divide(7, 2) == 3.5
+        with pytest.raises(ValueError, match="Cannot divide by zero"):
+            INT_KERNELS.divide(1, 0)
+
+    def test_power(self):
+        """Test negative exponents and the result size guard."""
+        assert INT_KERNELS.power(2, -3) == 0.125
+        with pytest.raises(ValueError, match="Result too large"):
+            INT_KERNELS.power(10, 10 ** 9)
+        assert INT_KERNELS.power(1, 10 ** 9) == 1
+        with pytest.raises(ValueError):
+            INT_KERNELS.power(0, -1)
+
+    def test_inline_result_limit(self):
+        """Test that inline kernels refuse results jobs may still compute."""
+        with pytest.raises(ValueError, match="Result too large"):
+            INT_KERNELS.power(10, 100_000)
+        with pytest.raises(ValueError, match="Result too large"):
+            INT_KERNELS.factorial(10_000)
+        assert INT_KERNELS.factorial(3000) == numeric.ops.factorial(3000)
+        jobs = numeric.kernels_for((10, 100_000), numeric.JOB_INT_KERNELS)
+        assert jobs.power(10, 100_000) == 10 ** 100_000
+
+    def test_square_root_and_percentage(self):
+        """Test exact roots of perfect squares and integral percentages."""
+        assert INT_KERNELS.square_root(10 ** 40) == 10 ** 20
+        assert INT_KERNELS.square_root(2) == pytest.approx(1.41421356)
+        assert INT_KERNELS.percentage(200, 15) == 30
+        assert INT_KERNELS.percentage(5, 3) == 0.15
+
+    def test_modulo(self):
+        """Test that modulo stays int."""
+        assert INT_KERNELS.modulo(2 ** 64 + 5, 7) == (2 ** 64 + 5) % 7
+
+
+class TestDecimalKernels:
+    """Test suite for the Decimal kernels."""
+
+    def test_exact_decimal_arithmetic(self):
+        """Test that decimal fractions add exactly."""
+        a, b = parse_operand(0.1, 'decimal'), parse_operand(0.2, 'decimal')
+        assert DECIMAL_KERNELS.add(a, b) == Decimal('0.3')
+        assert DECIMAL_KERNELS.divide(Decimal(1), Decimal(4)) == Decimal('0.25')
+        assert DECIMAL_KERNELS.square_root(Decimal(2)).quantize(Decimal('0.0001')) == \
+            Decimal('1.4142')
+
+    def test_modulo_sign_matches_python(self):
+        """Test that the remainder takes the sign of the divisor."""
+        assert DECIMAL_KERNELS.modulo(Decimal(-7), Decimal(3)) == Decimal(-7 % 3)
+        assert DECIMAL_KERNELS.modulo(Decimal(7), Decimal(-3)) == Decimal(7 % -3)
+        with pytest.raises(ValueError, match="modulo with zero"):
+            DECIMAL_KERNELS.modulo(Decimal(1), Decimal(0))
+
+    def test_power_errors(self):
+        """Test that decimal signals become ValueError."""
+        with pytest.raises(ValueError, match="Result too large"):
+            DECIMAL_KERNELS.power(Decimal(10), Decimal(10 ** 7))
+        with pytest.raises(ValueError, match="not a real number"):
+            DECIMAL_KERNELS.power(Decimal(-8), Decimal('0.5'))
+
+
+def test_calculator_with_kernels():
+    """Test that a Calculator routes through its kernel set."""
+    calc = Calculator(kernels=INT_KERNELS)
+    assert calc.divide(9, 3) == 3
+    assert calc.get_history() == ["9 / 3 = 3"]
+    assert Calculator().kernels is ops
+
+
+def test_kernel_benchmark():
+    """Test that the per-mode benchmark times every precision mode."""
+    timings = loadtest.kernel_benchmark('multiply', number=10)
+    assert set(timings) == set(numeric.PRECISION_MODES)
+    assert all(ns > 0 for ns in timings.values())
@@ -0,0 +1,50 @@
+"""
+Tests for runtime memory and allocation diagnostics.
+"""
+
+import gc
+import sys
+import os
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from calculator import Calculator
+from runtime_diagnostics import GCMonitor, live_object_counts
+
+
+class TestGCMonitor:
+    """Test suite for GCMonitor."""
+
+    def test_records_collections(self):
+        """Test that collections and pauses are recorded per generation."""
+        monitor = GCMonitor()
+        monitor.install()
+        try:
+            gc.collect()
+        finally:
+            monitor.uninstall()
+        stats = monitor.get_stats()
+        assert stats['generations'][2]['collections'] >= 1
+        assert stats['generations'][2]['max_pause_ms'] >= 0
+
+    def test_install_is_idempotent(self):
+        """Test that installing twice registers one callback."""
+        monitor = GCMonitor()
+        monitor.install()
+        monitor.install()
+        try:
+            assert gc.callbacks.count(monitor._callback) == 1
+        finally:
+            monitor.uninstall()
+
+
+def test_live_object_counts():
+    """Test that live calculators and history records are counted."""
+    before = live_object_counts()
+    calcs = [Calculator() for _ in range(3)]
+    for calc in calcs:
+        calc.add(1, 2)
+    after = live_object_counts()
+    assert after['calculators'] - before['calculators'] == 3
+    assert after['history_records'] - before['history_records'] == 3
@@ -0,0 +1,93 @@
+"""
+Tests for lazy series and schedule generators.
+"""
+
+import itertools
+import pytest
+import types
+from src import sequences
+from src.calculator import Calculator
+
+
+class TestScan:
+    """Test suite for running accumulations."""
+
+    def test_cumulative_sum_and_product(self):
+        """Test running totals and products."""
+        assert list(sequences.cumulative_sum([1, 2, 3, 4])) == [1, 3, 6, 10]
+        assert list(sequences.cumulative_product([1, 2, 3, 4])) == [1, 2, 6, 24]
+
+    def test_scan_with_operation_name_and_initial(self):
+        """Test scanning with a named operation and a starting value."""
+        assert list(sequences.scan('subtract', [1, 2, 3], initial=10)) == [9, 7, 4]
+
+    def test_scan_with_callable(self):
+        """Test scanning with any binary callable."""
+        assert list(sequences.scan(max, [3, 1, 4, 1, 5])) == [3, 3, 4, 4, 5]
+
+    def test_scan_empty(self):
+        """Test that an empty input yields nothing."""
+        assert list(sequences.cumulative_sum([])) == []
+
+    def test_scan_is_lazy(self):
+        """Test that values are consumed only on demand."""
+        totals = sequences.cumulative_sum(itertools.count(1))
+        assert isinstance(totals, types.GeneratorType)
+        assert list(itertools.islice(totals, 4)) == [1, 3, 6, 10]
+
+    def test_unknown_operation_fails_eagerly(self):
+        """Test that bad arguments raise before iteration starts."""
+        with pytest.raises(ValueError):
+            sequences.scan('factorial', [1, 2])
+        with pytest.raises(ValueError):
+            sequences.scan(None, [1, 2])
+
+
+class TestSchedules:
+    """Test suite for growth and amortization schedules."""
+
+    def test_compound_growth(self):
+        """Test compounding matches P(1 + r)^t per period."""
+        balances = list(sequences.compound_growth(1000, 0.05, 3))
+        assert balances == pytest.approx([1050, 1102.5, 1157.625])
+
+    def test_compound_growth_unbounded(self):
+        """Test that an unbounded schedule can be consumed partially."""
+        balances = sequences.compound_growth(1, 1)
+        assert list(itertools.islice(balances, 4)) == [2, 4, 8, 16]
+
+    def test_geometric(self):
+        """Test geometric terms and their partial sums."""
+        assert list(sequences.geometric(3, 2, 4)) == [3, 6, 12, 24]
+        series = sequences.cumulative_sum(sequences.geometric(1, 0.5, 3))
+        assert list(series) == [1, 1.5, 1.75]
+
+    def test_amortization_schedule(self):
+        """Test that payments are level and the loan is fully repaid."""
+        rows = list(sequences.amortization_schedule(1000, 0.12, 12))
+        assert len(rows) == 12
+        assert rows[0].interest == pytest.approx(10)
+        assert rows[0].payment == pytest.approx(88.8488, abs=1e-4)
+        assert rows[-1].balance == 0.0
+        assert sum(row.principal for row in rows) == pytest.approx(1000)
+
+    def test_amortization_zero_rate(self):
+        """Test a zero-interest schedule."""
+        rows = list(sequences.amortization_schedule(1200, 0, 12))
+        assert all(row.payment == pytest.approx(100) for row in rows)
+
+    @pytest.mark.parametrize("periods", [-1, 0, 1.5])
+    def test_amortization_invalid_periods(self, periods):
+        """Test that invalid period counts are rejected."""
+        with pytest.raises(ValueError):
+            sequences.amortization_schedule(1000, 0.1, periods)
+
+
+def test_calculator_sequences_skip_history():
+    """Test the Calculator API and that steps are not recorded."""
+    calc = Calculator()
+    assert list(calc.cumulative_sum([1, 2, 3])) == [1, 3, 6]
+    assert list(calc.scan('multiply', [2, 3])) == [2, 6]
+    assert list(calc.compound_growth(100, 0.1, 2)) == pytest.approx([110, 121])
+    assert len(list(calc.amortization_schedule(100, 0.1, 6))) == 6
+    assert calc.get_history() == []
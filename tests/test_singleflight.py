@@ -0,0 +1,210 @@
+"""
+Tests for request coalescing (single-flight).
+"""
+
+import pytest
+import sys
+import os
+import threading
+from decimal import Decimal
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import singleflight
+from singleflight import SingleFlight, RedisFlightBackend, CoalescingCalculator
+from numeric import DECIMAL_KERNELS
+
+
+class FakeRedis:
+    """Minimal in-memory stand-in for the redis client calls the backend uses."""
+
+    def __init__(self):
+        self.data = {}
+
+    def set(self, key, value, nx=False, px=None):
+        if nx and key in self.data:
+            return False
+        self.data[key] = value.encode('utf-8') if isinstance(value, str) else value
+        return True
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+    def eval(self, script, numkeys, *args):
+        # Only the lock release script is used: compare and delete.
+        assert script == singleflight._RELEASE_LOCK and numkeys == 1
+        key, token = args
+        if self.data.get(key) == token.encode('utf-8'):
+            del self.data[key]
+            return 1
+        return 0
+
+
+class TestSingleFlight:
+    """Test suite for SingleFlight."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.flight = SingleFlight()
+
+    def test_sequential_calls_compute_each_time(self):
+        """Test that calls which do not overlap are not coalesced."""
+        assert self.flight.do('k', lambda: 1) == 1
+        assert self.flight.do('k', lambda: 2) == 2
+        stats = self.flight.get_stats()
+        assert stats['computations'] == 2
+        assert stats['coalesced'] == 0
+
+    def test_concurrent_identical_calls_share_one_computation(self):
+        """Test that concurrent callers wait on the leader's computation."""
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow():
+            started.set()
+            release.wait(5)
+            return 42
+
+        leader = threading.Thread(target=lambda: self.flight.do('k', slow))
+        leader.start()
+        started.wait(5)
+
+        def follower():
+            return self.flight.do('k', lambda: pytest.fail("follower computed"))
+
+        followers = [threading.Thread(target=follower) for _ in range(5)]
+        for t in followers:
+            t.start()
+        while self.flight.get_stats()['coalesced'] < 5:
+            pass
+        release.set()
+        leader.join()
+        for t in followers:
+            t.join()
+
+        stats = self.flight.get_stats()
+        assert stats['calls'] == 6
+        assert stats['computations'] == 1
+        assert stats['coalesced'] == 5
+        assert stats['in_flight'] == 0
+
+    def test_error_is_shared_with_followers(self):
+        """Test that a failed computation raises for every waiting caller."""
+        started = threading.Event()
+        release = threading.Event()
+
+        def failing():
+            started.set()
+            release.wait(5)
+            raise ValueError("boom")
+
+        errors = []
+
+        def call():
+            try:
+                self.flight.do('k', failing)
+            except ValueError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=call) for _ in range(3)]
+        threads[0].start()
+        started.wait(5)
+        for t in threads[1:]:
+            t.start()
+        while self.flight.get_stats()['coalesced'] < 2:
+            pass
+        release.set()
+        for t in threads:
+            t.join()
+
+        assert len(errors) == 3
+        assert self.flight.get_stats()['in_flight'] == 0
+
+
+class TestRedisFlightBackend:
+    """Test suite for the cross-process backend."""
+
+    def test_leader_publishes_result(self):
+        """Test that the leader stores its result for other processes."""
+        client = FakeRedis()
+        backend = RedisFlightBackend(client)
+        assert backend.run(('factorial', 30), lambda: 2 ** 100) == (2 ** 100, True)
+        # Another process holding the lock finds the published result.
+        published = [k for k in client.data if ':result:' in k]
+        assert len(published) == 1
+        client.set(published[0].replace(':result:', ':lock:'), 'other-process')
+        assert backend.run(('factorial', 30), lambda: 0) == (2 ** 100, False)
+
+    def test_lock_taken_over_is_not_released(self):
+        """Test that a leader whose lock expired leaves the new holder's lock."""
+        client = FakeRedis()
+        backend = RedisFlightBackend(client)
+
+        def slow():
+            # Our lock expired and another process took it meanwhile.
+            lock = next(k for k in client.data if ':lock:' in k)
+            client.set(lock, 'other-process')
+            return 1
+
+        assert backend.run('k', slow) == (1, True)
+        locks = [value for key, value in client.data.items() if ':lock:' in key]
+        assert locks == [b'other-process']
+        # An uncontended leader still releases its own lock.
+        backend.run('j', lambda: 2)
+        assert len([k for k in client.data if ':lock:' in k]) == 1
+
+    def test_published_error_is_raised(self):
+        """Test that a leader's ValueError is re-raised by followers."""
+        client = FakeRedis()
+        backend = RedisFlightBackend(client)
+
+        def invalid():
+            raise ValueError("bad")
+
+        with pytest.raises(ValueError):
+            backend.run('k', invalid)
+        published = [k for k in client.data if ':result:' in k]
+        client.set(published[0].replace(':result:', ':lock:'), 'other-process')
+        with pytest.raises(ValueError, match="bad"):
+            backend.run('k', lambda: 0)
+
+
+class TestCoalescingCalculator:
+    """Test suite for CoalescingCalculator."""
+
+    def test_results_and_history_match_calculator(self):
+        """Test that coalesced operations behave like Calculator ones."""
+        calc = CoalescingCalculator(SingleFlight())
+        assert calc.factorial(5) == 120
+        assert calc.power(2, 3) == 8
+        assert calc.add(1, 2) == 3
+        assert calc.get_history() == ["5! = 120", "2 ^ 3 = 8", "1 + 2 = 3"]
+
+    def test_validation_errors_propagate(self):
+        """Test that invalid input still raises ValueError."""
+        calc = CoalescingCalculator(SingleFlight())
+        with pytest.raises(ValueError):
+            calc.factorial(-1)
+        assert calc.get_history() == []
+
+    def test_int_and_float_are_not_coalesced_together(self):
+        """Test that equal operands of different types keep their result type."""
+        flight = SingleFlight()
+        calc = CoalescingCalculator(flight)
+        assert isinstance(calc.power(2, 3), int)
+        assert isinstance(calc.power(2.0, 3), float)
+
+    def test_decimals_keyed_by_exponent(self):
+        """Test that equal Decimals with different exponents are not coalesced."""
+        flight = SingleFlight()
+        keys = []
+        do = flight.do
+        flight.do = lambda key, fn: keys.append(key) or do(key, fn)
+        calc = CoalescingCalculator(flight, kernels=DECIMAL_KERNELS)
+        assert str(calc.power(Decimal('2'), Decimal('3'))) == '8'
+        assert str(calc.power(Decimal('2.0'), Decimal('3'))) == '8.000'
+        assert keys[0] != keys[1]
@@ -0,0 +1,124 @@
+"""
+Tests for local tracing spans.
+"""
+
+import json
+import pytest
+import sys
+import os
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import tracing
+from calculator import Calculator
+
+
+@pytest.fixture
+def buffer():
+    return tracing.RingBufferExporter(capacity=16)
+
+
+class TestTracer:
+    """Test suite for span creation and sampling."""
+
+    def test_nested_spans(self, buffer):
+        """Test that child spans share the trace and point at their parent."""
+        tracer = tracing.Tracer([buffer], sample_rate=1.0)
+        with tracer.start_trace('root') as root:
+            with tracing.span('child', step=1) as child:
+                assert tracing.current_span() is child
+        assert tracing.current_span() is None
+
+        spans = {s['name']: s for s in buffer.get_spans()}
+        assert spans['child']['parent_id'] == root.span_id
+        assert spans['child']['trace_id'] == root.trace_id
+        assert spans['child']['attributes'] == {'step': 1}
+        assert spans['root']['duration_ms'] >= spans['child']['duration_ms']
+
+    def test_unsampled_trace_is_noop(self, buffer):
+        """Test that unsampled traces create and export nothing."""
+        tracer = tracing.Tracer([buffer], sample_rate=0.0)
+        with tracer.start_trace('root') as root:
+            assert root is tracing.NOOP_SPAN
+            assert tracing.span('child') is tracing.NOOP_SPAN
+        assert buffer.get_spans() == []
+
+    def test_incoming_traceparent_is_continued(self, buffer):
+        """Test that a sampled parent context overrides the sample rate."""
+        tracer = tracing.Tracer([buffer], sample_rate=0.0)
+        header = '00-' + 'a' * 32 + '-' + 'b' * 16 + '-01'
+        with tracer.start_trace('root', header) as root:
+            assert root.trace_id == 'a' * 32
+            assert root.parent_id == 'b' * 16
+            assert root.traceparent.startswith('00-' + 'a' * 32)
+
+    def test_incoming_sampled_flag_is_rate_capped(self, buffer):
+        """Test that forced traces beyond the limit fall back to sampling."""
+        now = [0.0]
+        tracer = tracing.Tracer([buffer], sample_rate=0.0, incoming_limit=2,
+                                clock=lambda: now[0])
+        header = '00-' + 'a' * 32 + '-' + 'b' * 16 + '-01'
+        forced = [tracer.start_trace('root', header) for _ in range(3)]
+        assert forced[2] is tracing.NOOP_SPAN
+        assert all(root is not tracing.NOOP_SPAN for root in forced[:2])
+        now[0] = 0.5
+        assert tracer.start_trace('root', header) is not tracing.NOOP_SPAN
+        assert tracer.start_trace('root', header) is tracing.NOOP_SPAN
+
+    def test_incoming_sampled_flag_ignored(self, buffer):
+        """Test that a limit of 0 ignores the incoming sampled flag."""
+        tracer = tracing.Tracer([buffer], sample_rate=1.0, incoming_limit=0)
+        header = '00-' + 'a' * 32 + '-' + 'b' * 16 + '-01'
+        root = tracer.start_trace('root', header)
+        assert (root.trace_id, root.parent_id) == ('a' * 32, 'b' * 16)
+        tracer.sample_rate = 0.0
+        assert tracer.start_trace('root', header) is tracing.NOOP_SPAN
+
+    def test_error_status(self, buffer):
+        """Test that exceptions mark the span as failed."""
+        tracer = tracing.Tracer([buffer], sample_rate=1.0)
+        with pytest.raises(ValueError):
+            with tracer.start_trace('root'):
+                raise ValueError("boom")
+        (span,) = buffer.get_spans()
+        assert span['status'] == 'error'
+        assert span['attributes']['error.type'] == 'ValueError'
+
+
+@pytest.mark.parametrize("header,expected", [
+    ('00-' + 'a' * 32 + '-' + 'b' * 16 + '-01', ('a' * 32, 'b' * 16, True)),
+    ('00-' + 'a' * 32 + '-' + 'b' * 16 + '-00', ('a' * 32, 'b' * 16, False)),
+    ('00-' + '0' * 32 + '-' + 'b' * 16 + '-01', None),
+    ('garbage', None),
+])
+def test_parse_traceparent(header, expected):
+    """Test W3C traceparent parsing."""
+    assert tracing.parse_traceparent(header) == expected
+
+
+def test_json_lines_exporter(tmp_path):
+    """Test that spans are appended as JSON lines."""
+    path = tmp_path / 'traces' / 'spans.jsonl'
+    exporter = tracing.JsonLinesExporter(str(path))
+    tracer = tracing.Tracer([exporter], sample_rate=1.0)
+    with tracer.start_trace('a'):
+        pass
+    with tracer.start_trace('b'):
+        pass
+    exporter.close()
+    names = [json.loads(line)['name'] for line in path.read_text().splitlines()]
+    assert names == ['a', 'b']
+
+
+def test_instrument_class(buffer):
+    """Test that instrumented methods emit spans only inside a trace."""
+    traced = tracing.instrument_class(Calculator, ['add'], prefix='calculator')
+    calc = traced()
+    assert calc.add(1, 2) == 3
+    assert buffer.get_spans() == []
+    tracer = tracing.Tracer([buffer], sample_rate=1.0)
+    with tracer.start_trace('root'):
+        assert calc.add(2, 2) == 4
+    assert [s['name'] for s in buffer.get_spans()] == ['calculator.add', 'root']
+    assert calc.get_history() == ['1 + 2 = 3', '2 + 2 = 4']
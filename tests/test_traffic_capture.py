@@ -0,0 +1,103 @@
+"""
+Tests for traffic capture and replay.
+"""
+
+import pytest
+import sys
+import os
+
+from flask import Flask, jsonify, request
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from traffic_capture import CaptureRecord, CaptureWriter, install_capture, read_records
+from replay import app_sender, load_records, replay, route_key, summarize
+import web_app
+
+
+def make_record(timestamp, operation='add', operands=None, result=3.0, status=200):
+    """Build a captured /api/calculate record."""
+    return CaptureRecord(timestamp, 1.5, status, 'POST /api/calculate', operation,
+                         operands or {'a': 1, 'b': 2}, result)
+
+
+class TestCaptureWriter:
+    """Test suite for the binary capture format and writer."""
+
+    def test_round_trip(self, tmp_path):
+        """Test that written records read back unchanged."""
+        writer = CaptureWriter(str(tmp_path))
+        records = [make_record(100.0), make_record(100.5, 'divide', {'a': 1, 'b': 0},
+                                                   'Cannot divide by zero', 400)]
+        for record in records:
+            writer.write(record)
+        writer.close()
+        assert list(read_records(writer.path)) == records
+
+    def test_rotation(self, tmp_path):
+        """Test that files rotate at max_bytes and keep backup_count copies."""
+        writer = CaptureWriter(str(tmp_path), max_bytes=200, backup_count=2)
+        for i in range(20):
+            writer.write(make_record(float(i)))
+        writer.close()
+        names = sorted(os.listdir(tmp_path))
+        assert len(names) == 3
+        assert all(os.path.getsize(tmp_path / name) <= 200 for name in names)
+        assert len(load_records([str(tmp_path)])) < 20
+
+    def test_rejects_other_files(self, tmp_path):
+        """Test that non-capture files are refused."""
+        path = tmp_path / 'other.bin'
+        path.write_bytes(b'not a capture')
+        with pytest.raises(ValueError):
+            list(read_records(str(path)))
+
+
+def test_install_capture_records_api_requests(tmp_path):
+    """Test that the middleware captures /api/* requests only."""
+    app = Flask(__name__)
+
+    @app.route('/api/echo', methods=['POST'])
+    def echo():
+        return jsonify({'result': request.get_json()['a']})
+
+    @app.route('/health')
+    def health():
+        return jsonify({'status': 'healthy'})
+
+    writer = CaptureWriter(str(tmp_path))
+    install_capture(app, writer)
+    client = app.test_client()
+    client.post('/api/echo?format=full', json={'operation': 'echo', 'a': 7})
+    client.get('/health')
+    writer.close()
+
+    (record,) = read_records(writer.path)
+    assert record.route == 'POST /api/echo?format=full'
+    assert record.operation == 'echo'
+    assert record.operands == {'a': 7}
+    assert record.result == 7
+    assert record.status == 200
+    assert record.latency_ms >= 0
+
+
+class TestReplay:
+    """Test suite for replaying captures."""
+
+    def test_replay_in_process(self):
+        """Test replaying against web_app and comparing results."""
+        records = [make_record(10.0), make_record(10.2, result=4.0)]
+        sleeps = []
+        results = replay(records, app_sender(web_app.app), speed=2, sleep=sleeps.append)
+        assert [r.status for r in results] == [200, 200]
+        summary = summarize(results)['POST /api/calculate']
+        assert summary['requests'] == 2
+        assert summary['mismatches'] == 1
+        assert summary['replayed_ms']['p50'] is not None
+        assert all(delay <= 0.1 for delay in sleeps)
+
+    def test_route_key(self):
+        """Test that job ids and query strings are grouped."""
+        assert route_key('GET /api/jobs/abc123?format=hex') == 'GET /api/jobs/<id>'
+        assert route_key('POST /api/calculate') == 'POST /api/calculate'
@@ -0,0 +1,139 @@
+"""
+Tests for the pre-fork warm-up and gunicorn configuration.
+"""
+
+import gc
+import importlib
+import json
+import logging
+import pytest
+import sys
+import os
+import time
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import bigint
+import warmup
+import web_app
+from traffic_capture import CaptureRecord
+
+
+@pytest.fixture
+def unfreeze():
+    """Undo gc.freeze() and restore collection after the test."""
+    yield
+    gc.unfreeze()
+    gc.enable()
+
+
+class TestWarmup:
+    """Test suite for warming up the preloaded app."""
+
+    def test_load_snapshot(self, tmp_path):
+        """Test the built-in and file snapshots."""
+        assert warmup.load_snapshot() == warmup.DEFAULT_SNAPSHOT
+        path = tmp_path / 'warmup.json'
+        entry = {'operation': 'add', 'a': 1, 'b': 2}
+        path.write_text(json.dumps({'requests': [entry]}))
+        assert warmup.load_snapshot(str(path)) == [{'operation': 'add', 'a': 1, 'b': 2}]
+
+    def test_compute(self):
+        """Test that snapshot entries compute like the API."""
+        assert warmup.compute({'operation': 'power', 'a': 2, 'b': 10}) == 1024
+        assert warmup.compute({'operation': 'sqrt', 'value': 16}) == 4
+        assert warmup.compute({'operation': 'factorial', 'value': 5}) == 120
+        assert str(warmup.compute({'operation': 'add', 'a': 0.1, 'b': 0.2,
+                                   'precision': 'decimal'})) == '0.3'
+
+    def test_warm_fills_caches(self):
+        """Test that warming populates the large-result cache."""
+        bigint._cached_pow10.cache_clear()
+        snapshot = warmup.DEFAULT_SNAPSHOT + [{'operation': 'divide', 'a': 1, 'b': 0}]
+        assert warmup.warm(web_app.app, snapshot) == len(warmup.DEFAULT_SNAPSHOT)
+        assert bigint._cached_pow10.cache_info().currsize > 0
+
+    def test_prepare_freezes_heap(self, unfreeze):
+        """Test that prepare freezes the heap and re-enables collection."""
+        gc.disable()
+        stats = warmup.prepare(web_app.app, [{'operation': 'add', 'a': 1, 'b': 2}])
+        assert stats['preloaded'] and stats['computed'] == 1
+        assert stats['frozen_objects'] > 0 and gc.get_freeze_count() > 0
+        assert gc.isenabled()
+
+    def test_boot_stats_in_metrics(self):
+        """Test that the worker boot time is reported in /api/metrics."""
+        warmup.record_boot(time.monotonic() - 0.25)
+        with web_app.app.test_client() as client:
+            worker = client.get('/api/metrics').get_json()['worker']
+        assert worker['pid'] == os.getpid()
+        assert worker['boot_ms'] >= 250
+
+    def test_snapshot_from_records(self):
+        """Test that the most frequent calculations are kept."""
+        def record(route, operation, operands):
+            return CaptureRecord(0.0, 1.0, 200, route, operation, operands, None)
+
+        records = [record('POST /api/calculate', 'add', {'a': 1, 'b': 2})] * 3 + [
+            record('POST /api/calculate?precision=decimal', 'add', {'a': 1, 'b': 2}),
+            record('POST /api/calculate-single', 'factorial', {'value': 9}),
+            record('POST /api/jobs', 'factorial', {'args': [9]}),
+            record('GET /api/history', None, {}),
+        ]
+        assert warmup.snapshot_from_records(records, top=2) == [
+            {'operation': 'add', 'a': 1, 'b': 2},
+            {'operation': 'add', 'a': 1, 'b': 2, 'precision': 'decimal'},
+        ]
+        assert len(warmup.snapshot_from_records(records)) == 3
+
+
+class TestGunicornConfig:
+    """Test suite for the gunicorn config hooks."""
+
+    class _Server:
+        def __init__(self):
+            self.log = logging.getLogger('test.gunicorn')
+            self.app = self
+
+        def wsgi(self):
+            return web_app.app
+
+    class _Worker:
+        pid = 1234
+        log = logging.getLogger('test.gunicorn')
+
+    def test_settings_and_hooks(self, unfreeze, monkeypatch):
+        """Test preload settings and the warm-up, fork and boot hooks."""
+        monkeypatch.setenv('GUNICORN_WORKER_CLASS', 'gthread')
+        monkeypatch.setenv('GUNICORN_THREADS', '8')
+        monkeypatch.delenv('JOBS_REQUIRE_SHARED_STORE', raising=False)
+        conf = importlib.import_module('gunicorn_conf')
+        conf = importlib.reload(conf)
+        assert conf.preload_app is True
+        assert (conf.worker_class, conf.threads) == ('gthread', 8)
+        assert conf.max_requests == 1000
+        assert os.environ['JOBS_REQUIRE_SHARED_STORE'] == '1'
+        assert not gc.isenabled()
+
+        conf.when_ready(self._Server())
+        assert gc.isenabled() and gc.get_freeze_count() > 0
+        worker = self._Worker()
+        conf.pre_fork(self._Server(), worker)
+        conf.post_worker_init(worker)
+        assert warmup.boot_stats()['boot_ms'] >= 0
+
+    def test_reload_reenables_gc(self, unfreeze, monkeypatch):
+        """Test that a reload (config re-executed, when_ready not rerun) collects."""
+        monkeypatch.delenv('JOBS_REQUIRE_SHARED_STORE', raising=False)
+        conf = importlib.reload(importlib.import_module('gunicorn_conf'))
+        conf.when_ready(self._Server())
+        # SIGHUP: gunicorn executes the config again and preloads again.
+        conf = importlib.reload(conf)
+        assert not gc.isenabled()
+        conf.on_reload(self._Server())
+        assert gc.isenabled() and gc.get_freeze_count() > 0
+
+        gc.disable()
+        conf.post_fork(self._Server(), self._Worker())
+        assert gc.isenabled()
@@ -0,0 +1,406 @@
+"""
+Tests for the Flask web application.
+"""
+
+import gzip
+import json
+import pytest
+import threading
+import time
+import sys
+import os
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import web_app
+import loadtest
+
+
+@pytest.fixture
+def client():
+    """Flask test client."""
+    web_app.app.config['TESTING'] = True
+    with web_app.app.test_client() as client:
+        yield client
+
+
+class TestCalculateApi:
+    """Test suite for the calculation endpoints."""
+
+    def test_calculate_add(self, client):
+        """Test a binary calculation."""
+        response = client.post('/api/calculate', json={'operation': 'add', 'a': 15, 'b': 25})
+        assert response.status_code == 200
+        assert response.get_json()['result'] == 40
+
+    def test_calculate_invalid_operation(self, client):
+        """Test that unknown operations are rejected."""
+        response = client.post('/api/calculate', json={'operation': 'nope', 'a': 1, 'b': 2})
+        assert response.status_code == 400
+
+    def test_integer_results_are_exact(self, client):
+        """Test that integer operands take the exact integer path."""
+        big = 2 ** 53 + 1
+        response = client.post('/api/calculate', json={'operation': 'add', 'a': big, 'b': 1})
+        assert response.get_json()['result'] == big + 1
+        response = client.post('/api/calculate', json={'operation': 'power', 'a': 3, 'b': 4})
+        assert response.get_json()['history'][-1] == '3 ^ 4 = 81'
+
+    def test_precision_modes(self, client):
+        """Test the float and decimal precision modes."""
+        response = client.post('/api/calculate?precision=float',
+                               json={'operation': 'add', 'a': 1, 'b': 2})
+        assert response.get_json()['history'][-1] == '1.0 + 2.0 = 3.0'
+        response = client.post('/api/calculate?precision=decimal',
+                               json={'operation': 'add', 'a': 0.1, 'b': 0.2})
+        assert response.get_json()['result'] == '0.3'
+        response = client.post('/api/calculate?precision=exact',
+                               json={'operation': 'add', 'a': 1, 'b': 2})
+        assert response.status_code == 400
+
+    def test_invalid_operand(self, client):
+        """Test that a missing operand is a client error."""
+        response = client.post('/api/calculate', json={'operation': 'add', 'a': 1})
+        assert response.status_code == 400
+
+    def test_calculate_single_factorial(self, client):
+        """Test a single-value calculation."""
+        response = client.post('/api/calculate-single', json={'operation': 'factorial', 'value': 5})
+        assert response.get_json()['result'] == 120
+        assert response.get_json()['history'] == ['5! = 120']
+
+
+class TestMetricsApi:
+    """Test suite for the metrics endpoint."""
+
+    def test_singleflight_metrics(self, client):
+        """Test that coalescing counters are reported."""
+        before = client.get('/api/metrics').get_json()['singleflight']
+        client.post('/api/calculate-single', json={'operation': 'factorial', 'value': 6})
+        after = client.get('/api/metrics').get_json()['singleflight']
+        assert after['calls'] == before['calls'] + 1
+        assert after['computations'] == before['computations'] + 1
+        assert 'coalesced' in after
+
+
+class TestStaticAssets:
+    """Test suite for precompressed static delivery."""
+
+    def test_index_served_with_etag(self, client):
+        """Test that the page carries a strong ETag and revalidation headers."""
+        response = client.get('/')
+        assert response.status_code == 200
+        assert response.headers['ETag'].startswith('"')
+        assert b'<html' in response.data.lower()
+
+    def test_frontend_index_served(self, client):
+        """Test that the frontend page is served from memory."""
+        response = client.get('/frontend/index.html')
+        assert response.status_code == 200
+
+    def test_static_directories_in_image(self):
+        """Test that the Docker image ships every static directory."""
+        with open(os.path.join(web_app.PROJECT_ROOT, 'docker', 'Dockerfile')) as fh:
+            dockerfile = fh.read()
+        for directory in web_app.STATIC_DIRECTORIES.values():
+            relative = os.path.relpath(directory, web_app.PROJECT_ROOT)
+            assert f'COPY {relative}/ ./{relative}/' in dockerfile
+
+    def test_index_gzip(self, client):
+        """Test that gzip is negotiated from Accept-Encoding."""
+        response = client.get('/', headers={'Accept-Encoding': 'gzip'})
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert response.headers['Vary'] == 'Accept-Encoding'
+        assert gzip.decompress(response.data) == client.get('/').data
+
+    def test_conditional_request_returns_304(self, client):
+        """Test that a matching If-None-Match answers 304 without a body."""
+        etag = client.get('/', headers={'Accept-Encoding': 'gzip'}).headers['ETag']
+        response = client.get('/', headers={'If-None-Match': etag})
+        assert response.status_code == 304
+        assert response.data == b''
+
+    def test_public_asset_long_lived(self, client):
+        """Test that frontend assets are served from memory."""
+        response = client.get('/public/README.md')
+        assert response.status_code == 200
+        assert 'max-age=31536000' in response.headers['Cache-Control']
+
+    def test_unknown_asset_404(self, client):
+        """Test that unknown assets are not found."""
+        assert client.get('/public/missing.js').status_code == 404
+
+
+class TestDebugRuntime:
+    """Test suite for the runtime diagnostics endpoint."""
+
+    def test_disabled_without_token(self, client, monkeypatch):
+        """Test that the endpoint does not exist unless configured."""
+        monkeypatch.setattr(web_app, 'DEBUG_RUNTIME_TOKEN', None)
+        assert client.get('/debug/runtime').status_code == 404
+
+    def test_requires_token(self, client, monkeypatch):
+        """Test that a wrong token is rejected."""
+        monkeypatch.setattr(web_app, 'DEBUG_RUNTIME_TOKEN', 'secret')
+        response = client.get('/debug/runtime', headers={'X-Debug-Token': 'nope'})
+        assert response.status_code == 403
+
+    def test_report_with_tracemalloc_diff(self, client, monkeypatch):
+        """Test GC, object counts and snapshot diffing between two calls."""
+        monkeypatch.setattr(web_app, 'DEBUG_RUNTIME_TOKEN', 'secret')
+        headers = {'X-Debug-Token': 'secret'}
+        try:
+            first = client.get('/debug/runtime?tracemalloc=start&top=5',
+                               headers=headers).get_json()
+            assert len(first['gc']['generations']) == 3
+            assert 'calculators' in first['objects']
+            assert first['tracemalloc']['diff'] is None
+
+            second = client.get('/debug/runtime?top=5', headers=headers).get_json()
+            assert second['tracemalloc']['tracing'] is True
+            assert isinstance(second['tracemalloc']['diff'], list)
+        finally:
+            client.get('/debug/runtime?tracemalloc=stop', headers=headers)
+
+
+class TestLargeResults:
+    """Test suite for big-integer results in API responses."""
+
+    def test_large_factorial_is_compact(self, client):
+        """Test that huge results are sent in truncated form."""
+        response = client.post('/api/calculate-single',
+                               json={'operation': 'factorial', 'value': 2000})
+        assert response.status_code == 200
+        assert response.get_json()['result'] == '3316275092...0000000000 (5736 digits)'
+
+    def test_full_format(self, client):
+        """Test that every digit can be requested explicitly."""
+        response = client.post('/api/calculate-single?format=full',
+                               json={'operation': 'factorial', 'value': 3000})
+        assert len(response.get_json()['result']) == 9131
+
+    def test_exact_int_beyond_str_limit(self, client):
+        """Test that int results over 4300 digits are recorded in history."""
+        response = client.post('/api/calculate', json={
+            'operation': 'multiply', 'a': 10 ** 4000, 'b': 10 ** 4000})
+        assert response.status_code == 200
+        body = response.get_json()
+        assert body['result'] == '1000000000...0000000000 (8001 digits)'
+        assert body['history'][-1].endswith('= 1000000000...0000000000 (8001 digits)')
+
+    def test_inline_result_limit(self, client):
+        """Test that results far beyond the inline limit are refused."""
+        response = client.post('/api/calculate', json={
+            'operation': 'power', 'a': 7, 'b': 1_500_000})
+        assert response.status_code == 400
+        assert response.get_json() == {'error': 'Result too large'}
+        response = client.post('/api/calculate-single',
+                               json={'operation': 'factorial', 'value': 3_000_000})
+        assert response.status_code == 400
+
+    def test_unknown_format_rejected_before_calculating(self, client):
+        """Test that a bad ?format= is refused without touching history."""
+        before = client.get('/api/history').get_json()['history']
+        response = client.post('/api/calculate?format=bogus',
+                               json={'operation': 'add', 'a': 1, 'b': 2})
+        assert response.status_code == 400
+        assert response.get_json()['error'] == 'Unknown result format: bogus'
+        response = client.post('/api/calculate-single?format=bogus',
+                               json={'operation': 'factorial', 'value': 5})
+        assert response.status_code == 400
+        assert client.get('/api/history').get_json()['history'] == before
+
+
+class TestJobsApi:
+    """Test suite for the asynchronous job endpoints."""
+
+    def test_submit_and_poll(self, client):
+        """Test that a job id is returned and its result can be fetched."""
+        response = client.post('/api/jobs', json={'operation': 'factorial', 'value': 10})
+        assert response.status_code == 202
+        job_id = response.get_json()['job_id']
+        assert response.headers['Location'] == f'/api/jobs/{job_id}'
+
+        deadline = time.monotonic() + 30
+        while True:
+            body = client.get(f'/api/jobs/{job_id}').get_json()
+            if body['status'] == 'succeeded' or time.monotonic() > deadline:
+                break
+            time.sleep(0.01)
+        assert body['result'] == 3628800
+
+    def poll(self, client, job_id):
+        deadline = time.monotonic() + 30
+        while True:
+            body = client.get(f'/api/jobs/{job_id}').get_json()
+            if body['status'] not in ('queued', 'running'):
+                return body
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+
+    @pytest.mark.parametrize("query,body,expected", [
+        ('', {'operation': 'power', 'a': 3, 'b': 40}, 3 ** 40),
+        ('', {'operation': 'sqrt', 'value': 10 ** 40}, 10 ** 20),
+        ('?precision=decimal', {'operation': 'add', 'a': 0.1, 'b': 0.2}, '0.3'),
+    ])
+    def test_typed_operands(self, client, query, body, expected):
+        """Test that jobs parse operands like /api/calculate."""
+        response = client.post('/api/jobs' + query, json=body)
+        assert response.status_code == 202
+        result = self.poll(client, response.get_json()['job_id'])
+        assert result['status'] == 'succeeded'
+        assert result['result'] == expected
+
+    def test_invalid_job(self, client):
+        """Test that invalid jobs are rejected up front."""
+        response = client.post('/api/jobs', json={'operation': 'nope'})
+        assert response.status_code == 400
+
+    def test_unknown_job(self, client):
+        """Test that unknown job ids are not found."""
+        assert client.get('/api/jobs/missing').status_code == 404
+        assert client.delete('/api/jobs/missing').status_code == 404
+
+    def test_disabled_without_shared_store(self, client, monkeypatch):
+        """Test that several workers without JOBS_REDIS_URL disable the API."""
+        monkeypatch.delenv('JOBS_REDIS_URL', raising=False)
+        monkeypatch.setenv('JOBS_REQUIRE_SHARED_STORE', '1')
+        monkeypatch.setattr(web_app, 'jobs', web_app.create_job_manager())
+        assert web_app.jobs is None
+        response = client.post('/api/jobs', json={'operation': 'factorial', 'value': 10})
+        assert response.status_code == 503
+        assert client.get('/api/jobs/abc').status_code == 503
+        assert client.get('/api/metrics').get_json()['jobs'] is None
+
+
+class TestSeriesApi:
+    """Test suite for the streamed series endpoint."""
+
+    def test_compound_growth_stream(self, client):
+        """Test that a schedule is streamed as newline-delimited JSON."""
+        response = client.post('/api/series', json={
+            'kind': 'compound_growth', 'principal': 1000, 'rate': 0.05, 'periods': 3})
+        assert response.status_code == 200
+        assert response.mimetype == 'application/x-ndjson'
+        values = [json.loads(line)['value'] for line in response.data.splitlines()]
+        assert values == pytest.approx([1050, 1102.5, 1157.625])
+
+    def test_error_mid_stream(self, client):
+        """Test that a failing step ends the stream with an error line."""
+        response = client.post('/api/series', json={
+            'kind': 'scan', 'operation': 'divide', 'values': [1, 0]})
+        lines = [json.loads(line) for line in response.data.splitlines()]
+        assert lines == [{'value': 1.0}, {'error': 'Cannot divide by zero'}]
+
+    def test_length_limit(self, client):
+        """Test that overly long schedules are refused up front."""
+        response = client.post('/api/series', json={
+            'kind': 'geometric', 'first': 1, 'ratio': 2, 'terms': 10 ** 9})
+        assert response.status_code == 400
+
+    def test_scan_requires_operation(self, client):
+        """Test that a scan without a known operation is a 400, not a broken stream."""
+        response = client.post('/api/series', json={
+            'kind': 'scan', 'values': [1, 2, 3]})
+        assert response.status_code == 400
+        assert 'Unknown operation' in response.get_json()['error']
+
+    def test_values_limit(self, client, monkeypatch):
+        """Test that too many values are refused instead of truncated."""
+        monkeypatch.setattr(web_app, 'MAX_SERIES_LENGTH', 3)
+        response = client.post('/api/series', json={
+            'kind': 'cumulative_sum', 'values': [1, 2, 3, 4]})
+        assert response.status_code == 400
+
+    @pytest.mark.parametrize("body", [
+        {'kind': 'geometric', 'first': 1, 'ratio': 10, 'terms': 400},
+        {'kind': 'compound_growth', 'principal': 1, 'rate': 1e10, 'periods': 50},
+        {'kind': 'amortization', 'principal': 1e308, 'annual_rate': 1e10, 'periods': 2},
+        {'kind': 'cumulative_sum', 'values': ['inf', 1]},
+    ])
+    def test_overflow_rejected(self, client, body):
+        """Test that series that would overflow are refused up front."""
+        response = client.post('/api/series', json=body)
+        assert response.status_code == 400
+        assert response.get_json() == {'error': 'Result too large'}
+
+    def test_overflow_mid_stream(self, client):
+        """Test that a running product overflowing ends with an error line."""
+        response = client.post('/api/series', json={
+            'kind': 'cumulative_product', 'values': [1e200, 1e200]})
+        assert b'Infinity' not in response.data
+        lines = [json.loads(line) for line in response.data.splitlines()]
+        assert lines == [{'value': 1e200}, {'error': 'Result too large'}]
+
+
+class TestTracing:
+    """Test suite for request tracing."""
+
+    def test_traceparent_propagation(self, client, monkeypatch):
+        """Test that a sampled request records nested phase spans."""
+        monkeypatch.setattr(web_app, 'DEBUG_RUNTIME_TOKEN', 'secret')
+        trace_id = 'c' * 32
+        response = client.post(
+            '/api/calculate', json={'operation': 'add', 'a': 1, 'b': 2},
+            headers={'traceparent': f'00-{trace_id}-{"d" * 16}-01'})
+        assert response.headers['traceparent'].startswith(f'00-{trace_id}-')
+
+        spans = client.get(f'/debug/traces?trace_id={trace_id}',
+                           headers={'X-Debug-Token': 'secret'}).get_json()['spans']
+        names = {s['name'] for s in spans}
+        assert {'request.parse_json', 'session.load', 'calculator.add',
+                'session.save', 'response.serialize',
+                'POST /api/calculate'} <= names
+
+    def test_unsampled_request_has_no_traceparent(self, client, monkeypatch):
+        """Test that unsampled requests are not traced."""
+        monkeypatch.setattr(web_app.tracer, 'sample_rate', 0.0)
+        response = client.get('/api/history')
+        assert 'traceparent' not in response.headers
+
+
+class TestThreadedWorkers:
+    """Concurrent stress tests, as served by threaded (gthread) workers."""
+
+    def test_concurrent_sessions(self):
+        """Test that concurrent clients each get correct results and history."""
+        threads, per_thread = 8, 25
+        failures = []
+        start = threading.Barrier(threads)
+
+        def session(index):
+            with web_app.app.test_client() as client:
+                start.wait()
+                for i in range(per_thread):
+                    response = client.post('/api/calculate', json={
+                        'operation': 'multiply', 'a': index, 'b': i})
+                    if response.get_json().get('result') != index * i:
+                        failures.append((index, i, response.get_json()))
+                history = client.get('/api/history').get_json()['history']
+                expected = [f"{index} * {i} = {index * i}" for i in range(per_thread)]
+                if history != expected:
+                    failures.append((index, 'history', history))
+
+        workers = [threading.Thread(target=session, args=(n,)) for n in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        assert failures == []
+
+    def test_loadtest_in_process(self):
+        """Test the throughput tool against the in-process app."""
+        stats = loadtest.run(lambda: loadtest.app_sender(web_app.app),
+                             threads=4, duration=0.2, operation='factorial')
+        assert stats['requests'] > 0
+        assert stats['errors'] == 0
+        assert stats['requests_per_second'] > 0
+
+    @pytest.mark.parametrize("operation", ['sqrt', 'square_root'])
+    def test_loadtest_square_root(self, operation):
+        """Test that square roots are requested with the name the API accepts."""
+        stats = loadtest.run(lambda: loadtest.app_sender(web_app.app),
+                             threads=1, duration=0.05, operation=operation)
+        assert stats['requests'] > 0
+        assert stats['errors'] == 0